@@ -1,8 +1,9 @@
 # apps/applications/admin.py
 from django.contrib import admin
+from apps.core.admin_paging import EstimatedCountMixin, PaginatedInline
 from .models import (
     Application, AcademicHistory, UniversityChoice,
-    ApplicationDocument, ApplicationLog, ApplicationTask
+    ApplicationDocument, ApplicationLog, ApplicationTask, ApplicationImport
 )
 
 class AcademicHistoryInline(admin.TabularInline):
@@ -12,16 +13,18 @@ class AcademicHistoryInline(admin.TabularInline):
 class UniversityChoiceInline(admin.TabularInline):
     model = UniversityChoice
     extra = 1
+    autocomplete_fields = ('university', 'program')  # A full <select> per row would load every program
 
 class ApplicationDocumentInline(admin.TabularInline):
     model = ApplicationDocument
     extra = 1
 
-class ApplicationLogInline(admin.TabularInline):
+class ApplicationLogInline(PaginatedInline):
+    """The log grows with every action on the application, so it is shown a page at a time."""
     model = ApplicationLog
-    readonly_fields = ('actor', 'action', 'comment', 'timestamp')
-    can_delete = False
-    extra = 0
+    fields = ('actor', 'action', 'comment', 'timestamp')
+    readonly_fields = fields
+    list_select_related = ('actor',)
 
 class ApplicationTaskInline(admin.TabularInline):
     model = ApplicationTask
@@ -29,12 +32,17 @@ class ApplicationTaskInline(admin.TabularInline):
     can_delete = False
     extra = 0
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('university', 'assigned_expert')
+
 @admin.register(Application)
-class ApplicationAdmin(admin.ModelAdmin):
+class ApplicationAdmin(EstimatedCountMixin, admin.ModelAdmin):
     list_display = ('tracking_code', 'full_name', 'applicant', 'status', 'created_at')
+    list_select_related = ('applicant',)
     list_filter = ('status', 'country_of_residence', 'created_at')
     search_fields = ('tracking_code', 'full_name', 'applicant__email')
     readonly_fields = ('tracking_code', 'created_at', 'updated_at')
+    autocomplete_fields = ('applicant', 'submitted_by_institution')
     inlines = [
         UniversityChoiceInline,
         AcademicHistoryInline,
@@ -44,10 +52,22 @@ class ApplicationAdmin(admin.ModelAdmin):
     ]
 
 @admin.register(ApplicationTask)
-class ApplicationTaskAdmin(admin.ModelAdmin):
+class ApplicationTaskAdmin(EstimatedCountMixin, admin.ModelAdmin):
     list_display = ('application', 'university', 'status', 'decision', 'assigned_expert')
     list_filter = ('status', 'decision', 'university')
     search_fields = ('application__tracking_code', 'assigned_expert__email')
+    list_select_related = ('application', 'university', 'assigned_expert')
+    raw_id_fields = ('application',)
+    autocomplete_fields = ('university', 'assigned_expert')
+
+@admin.register(ApplicationImport)
+class ApplicationImportAdmin(admin.ModelAdmin):
+    list_display = ('id', 'submitted_by', 'status', 'total_rows', 'created_count', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('submitted_by__email',)
+    readonly_fields = ('status', 'total_rows', 'created_count', 'errors', 'created_at', 'finished_at')
+    list_select_related = ('submitted_by',)
+    raw_id_fields = ('submitted_by',)
 
 # We don't need to register the other models separately
 # as they are accessible via the ApplicationAdmin inlines.
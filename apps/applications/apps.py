@@ -13,4 +13,11 @@ class ApplicationsConfig(AppConfig):
         """
         # --- FIX: This line is crucial to make the signals work. ---
         import apps.applications.signals
+        # Registers the outbox handlers with the dispatcher.
+        import apps.applications.handlers
+        # Workers dedicated to exports load openpyxl and reportlab at boot; others on first export.
+        from django.conf import settings
+        if settings.APPLICATION_EXPORTERS_PRELOAD:
+            from apps.applications.exports import preload
+            preload()
 # end of apps/applications/apps.py
\ No newline at end of file
@@ -0,0 +1,123 @@
+# apps/applications/bundles.py
+import hashlib
+import json
+import logging
+import os
+import zipfile
+from collections import namedtuple
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils.text import get_valid_filename
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 256 * 1024
+MANIFEST_NAME = 'manifest.json'
+
+BundleEntry = namedtuple('BundleEntry', ['arcname', 'field_file', 'size', 'modified', 'kind', 'record_id', 'tracking_code'])
+
+
+class _StreamBuffer:
+    """Write-only, unseekable sink for ZipFile; the generator drains it after every write."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _safe(text, fallback):
+    try:
+        return get_valid_filename(text)
+    except SuspiciousFileOperation:
+        return fallback
+
+
+def _entry(arcname, field_file, kind, record_id, tracking_code):
+    try:
+        size = field_file.size
+        modified = field_file.storage.get_modified_time(field_file.name)
+    except (OSError, NotImplementedError):
+        logger.warning("[BUNDLE] Skipping missing file %s of %s", field_file.name, tracking_code)
+        return None
+    return BundleEntry(arcname, field_file, size, modified, kind, record_id, tracking_code)
+
+
+def bundle_entries(applications, per_application_folder=False):
+    """
+    Lists the files of `applications` in a stable order (application, then record id).
+    Prefetch `documents` and `academic_histories` on the queryset to avoid a query per application.
+    """
+    entries = []
+    for application in applications:
+        prefix = f"{application.tracking_code}/" if per_application_folder else ''
+        for document in sorted(application.documents.all(), key=lambda document: document.id):
+            if not document.file:
+                continue
+            extension = os.path.splitext(document.file.name)[1].lower()
+            name = _safe(document.document_type, 'document')
+            entries.append(_entry(
+                f"{prefix}documents/{document.id}_{name}{extension}",
+                document.file, 'document', document.id, application.tracking_code,
+            ))
+        for history in sorted(application.academic_histories.all(), key=lambda history: history.id):
+            if not history.certificate_file:
+                continue
+            extension = os.path.splitext(history.certificate_file.name)[1].lower()
+            name = _safe(history.degree_level, 'certificate')
+            entries.append(_entry(
+                f"{prefix}certificates/{history.id}_{name}{extension}",
+                history.certificate_file, 'certificate', history.id, application.tracking_code,
+            ))
+    return [entry for entry in entries if entry is not None]
+
+
+def build_manifest(entries):
+    """
+    The bundle's table of contents. `version` changes whenever a file is added, removed
+    or replaced, so a client resuming with `start` can check it is still fetching the same bundle.
+    """
+    items = [
+        {'index': index, 'name': entry.arcname, 'size': entry.size, 'kind': entry.kind,
+         'record_id': entry.record_id, 'tracking_code': entry.tracking_code}
+        for index, entry in enumerate(entries)
+    ]
+    fingerprint = json.dumps([(entry.arcname, entry.field_file.name, entry.size) for entry in entries])
+    return {
+        'version': hashlib.sha256(fingerprint.encode()).hexdigest()[:32],
+        'count': len(items),
+        'total_size': sum(entry.size for entry in entries),
+        'entries': items,
+    }
+
+
+def stream_zip(entries, manifest, start=0):
+    """
+    Yields a ZIP archive of `entries[start:]`, preceded by `manifest.json`, as it is built.
+    Files are read from storage in blocks and stored uncompressed (scans and PDFs are
+    already compressed); nothing is buffered beyond one block and nothing touches disk.
+    """
+    sink = _StreamBuffer()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+        yield sink.drain()
+        for entry in entries[start:]:
+            info = zipfile.ZipInfo(entry.arcname, date_time=entry.modified.timetuple()[:6])
+            info.file_size = entry.size
+            info.compress_type = zipfile.ZIP_STORED
+            with entry.field_file.storage.open(entry.field_file.name, 'rb') as source, archive.open(info, 'w') as target:
+                for block in iter(lambda: source.read(READ_SIZE), b''):
+                    target.write(block)
+                    yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
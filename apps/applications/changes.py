@@ -0,0 +1,92 @@
+# apps/applications/changes.py
+from django.db import transaction
+from django.db.models import Q
+
+from apps.core.sequences import next_value
+from .models import Application, ApplicationTask
+
+CHANGE_SEQUENCE = 'applications.change_feed'
+
+
+def mark_changed(*applications):
+    """
+    Moves applications to the head of the change feed once the current transaction
+    commits. Call it from the transaction that changed them (or their logs, tasks,
+    documents or notes); outside a transaction they move at once.
+    """
+    ids = [application.pk for application in applications]
+    transaction.on_commit(lambda: advance(ids))
+
+
+def advance(ids):
+    """
+    Gives the applications the next change sequence value, in a short transaction of
+    its own: the sequence row is locked for one update instead of for the whole change,
+    and values are still handed out in commit order, so a client's cursor never skips
+    a committed change.
+    """
+    with transaction.atomic():
+        seq = next_value(CHANGE_SEQUENCE)
+        Application.objects.filter(pk__in=ids).update(change_seq=seq)
+    return seq
+
+
+def parse_cursor(value):
+    """
+    (change_seq, id) of a feed cursor, 'seq:id' as returned by the changes endpoint;
+    a bare 'seq' starts after every application of that position. Raises ValueError.
+    """
+    seq, _, application_id = str(value).partition(':')
+    return int(seq), int(application_id) if application_id else None
+
+
+def format_cursor(seq, application_id):
+    return f'{seq}:{application_id}'
+
+
+def changed_after(queryset, cursor):
+    """The applications of `queryset` after `cursor` in the feed, in feed order."""
+    seq, application_id = cursor
+    after = Q(change_seq__gt=seq)
+    if application_id is not None:
+        after |= Q(change_seq=seq, id__gt=application_id)
+    return queryset.filter(after).order_by('change_seq', 'id')
+
+
+# --- Scopes ---
+def workbench_application_ids(user, universities):
+    """Applications under review with a task the expert may claim or already holds."""
+    unclaimed_q = Q(university__in=universities, status=ApplicationTask.StatusChoices.UNCLAIMED)
+    assigned_q = Q(assigned_expert=user, status=ApplicationTask.StatusChoices.ASSIGNED)
+    return ApplicationTask.objects.filter(unclaimed_q | assigned_q).filter(
+        application__status=Application.StatusChoices.PENDING_REVIEW
+    ).values_list('application_id', flat=True).distinct()
+
+
+def scoped_applications(user, scope):
+    """
+    The applications a list screen shows for `scope`, mirroring the `my`, `my-submitted`,
+    `university-apps`, `workbench` and `all` endpoints. Returns None if the user's
+    roles do not give access to the scope.
+    """
+    roles = set(user.roles.values_list('name', flat=True))
+    if scope == 'my':
+        return Application.objects.filter(applicant=user)
+    if scope == 'submitted' and 'Recruitment Institution' in roles:
+        return Application.objects.filter(university_choices__university__in=user.universities.all())
+    if scope == 'university' and 'UniversityExpert' in roles:
+        return Application.objects.filter(university_choices__university__in=user.universities.all())
+    if scope == 'workbench' and 'UniversityExpert' in roles:
+        return Application.objects.filter(id__in=workbench_application_ids(user, user.universities.all()))
+    if scope == 'all' and 'HeadOfOrganization' in roles:
+        return Application.objects.all()
+    return None
+
+
+def related_applications(user):
+    """Every application the user could ever see in some scope; tombstones are limited to these."""
+    if user.roles.filter(name='HeadOfOrganization').exists():
+        return Application.objects.all()
+    return Application.objects.filter(
+        Q(applicant=user) | Q(university_choices__university__in=user.universities.all())
+    )
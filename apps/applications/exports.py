@@ -0,0 +1,25 @@
+# apps/applications/exports.py
+"""
+Registry of application export formats. APPLICATION_EXPORTERS maps a format to the
+dotted path of a function taking a queryset and returning the download response.
+Exporters are imported on first use, so openpyxl and reportlab stay out of workers
+that never export; a worker dedicated to exports sets APPLICATION_EXPORTERS_PRELOAD
+to pay that cost at boot instead of on its first request.
+"""
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def formats():
+    return tuple(settings.APPLICATION_EXPORTERS)
+
+
+def get_exporter(file_format):
+    """The export function for `file_format`, imported on first use, or None for an unknown format."""
+    path = settings.APPLICATION_EXPORTERS.get(file_format)
+    return import_string(path) if path else None
+
+
+def preload():
+    for file_format in formats():
+        get_exporter(file_format)
@@ -0,0 +1,71 @@
+# apps/applications/handlers.py
+"""
+Outbox handlers: the downstream work triggered by application state changes.
+They run in the outbox dispatcher, after the transaction that made the change has
+committed: in Celery, or in the web process when the event stream is in-process.
+"""
+from apps.core.events import publish_event
+from apps.core.models import Notification, NotificationTemplate
+from apps.core.notifications import notify_users, queue_template_emails
+from apps.users.models import User
+from .models import Application
+from .outbox import handles
+
+STATUS_NOTIFICATION_TEMPLATE = 'application_status_changed'
+STATUS_EMAIL_TEMPLATE = 'application_status_changed_email'
+
+
+@handles('application.status_changed')
+def notify_applicant_of_status_change(event):
+    """Tells the applicant about the new status in-app and, if they opted in, by email."""
+    application = Application.objects.select_related('applicant__notification_settings').get(pk=event.application_id)
+    applicant = application.applicant
+    context = {
+        'tracking_code': application.tracking_code,
+        'status': application.get_status_display(),
+        'comment': event.payload.get('comment', ''),
+    }
+
+    if NotificationTemplate.objects.filter(name=STATUS_NOTIFICATION_TEMPLATE).exists():
+        notify_users(STATUS_NOTIFICATION_TEMPLATE, [(applicant, context)])
+    else:
+        Notification.objects.create(
+            user=applicant,
+            title=f"Application {application.tracking_code} updated",
+            message=f"The status of your application is now: {context['status']}.",
+        )
+
+    preferences = getattr(applicant, 'notification_settings', None)
+    if preferences is not None and preferences.email_on_status_update and NotificationTemplate.objects.filter(
+        name=STATUS_EMAIL_TEMPLATE, type=NotificationTemplate.TemplateType.EMAIL
+    ).exists():
+        # The dedupe key makes a redelivered event send its email only once.
+        queue_template_emails(STATUS_EMAIL_TEMPLATE, [(applicant, context)], dedupe_prefix=f"outbox-event:{event.pk}")
+
+
+def publish_workbench_change(task):
+    """
+    Streams a task change to every workbench it can appear on or disappear from:
+    those of all experts of the task's university, which includes the assigned expert.
+    """
+    recipients = set(
+        User.objects.filter(roles__name='UniversityExpert', universities=task.university_id)
+        .values_list('id', flat=True)
+    )
+    recipients.add(task.assigned_expert_id)
+    publish_event(recipients, 'workbench', {
+        'task_id': task.id,
+        'application': task.application.tracking_code,
+        'university': task.university_id,
+        'status': task.status,
+        'decision': task.decision,
+        'assigned_expert': task.assigned_expert_id,
+    })
+
+
+@handles('application.submitted', 'application.resubmitted', 'task.claimed', 'task.reassigned', 'task.completed')
+def refresh_workbenches(event):
+    """Streams the application's current tasks to the workbenches they appear on."""
+    application = Application.objects.get(pk=event.application_id)
+    for task in application.tasks.select_related('application'):
+        publish_workbench_change(task)
@@ -0,0 +1,358 @@
+# apps/applications/imports.py
+"""
+Bulk application import for recruitment institutions.
+
+One spreadsheet row is one application, exactly what `POST /applications/` creates
+for each university choice. Every row is validated before anything is written; an
+import with any invalid row creates nothing and reports every problem at once.
+A valid import is written with a fixed number of queries, whatever its size.
+"""
+import csv
+import io
+import logging
+import os
+import zipfile
+from datetime import datetime
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from openpyxl import load_workbook
+from rest_framework import serializers
+
+from apps.core.images import is_image, schedule_variants
+from apps.core.models import Program
+from apps.uploads.storage import UploadError, validate_announced_file
+from apps.users.models import Role, User
+from .changes import mark_changed
+from .models import (
+    AcademicHistory, Application, ApplicationDocument, ApplicationImport,
+    ApplicationLog, ApplicationTask, OutboxEvent, UniversityChoice
+)
+from .outbox import _schedule_dispatch
+from .serializers import validate_application_form_data
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+SOURCE_EXTENSIONS = ('csv', 'xlsx')
+HISTORY_FIELDS = ('degree_level', 'country', 'university_name', 'field_of_study', 'gpa')
+
+
+class ImportFileError(Exception):
+    """The uploaded file as a whole cannot be read."""
+
+
+class ImportRowSerializer(serializers.Serializer):
+    """
+    Validates one spreadsheet row. Universities and programs are plain ids here and
+    are checked against the database once for the whole file, not once per row.
+    """
+    applicant_email = serializers.EmailField()
+    full_name = serializers.CharField(max_length=255)
+    application_type = serializers.ChoiceField(
+        choices=Application.ApplicationType.choices, default=Application.ApplicationType.NEW_ADMISSION
+    )
+    date_of_birth = serializers.DateField(required=False, allow_null=True)
+    country_of_residence = serializers.CharField(max_length=100, required=False, default='')
+    father_name = serializers.CharField(max_length=255, required=False, default='')
+    grandfather_name = serializers.CharField(max_length=255, required=False, allow_null=True)
+    email = serializers.EmailField(required=False, default='')
+    form_data = serializers.JSONField(binary=True, required=False, default=dict)
+    university = serializers.IntegerField()
+    program = serializers.IntegerField()
+    priority = serializers.IntegerField(min_value=1, default=1)
+    degree_level = serializers.CharField(max_length=100, required=False)
+    country = serializers.CharField(max_length=100, required=False)
+    university_name = serializers.CharField(max_length=255, required=False)
+    field_of_study = serializers.CharField(max_length=255, required=False)
+    gpa = serializers.DecimalField(max_digits=4, decimal_places=2, required=False)
+    # "Passport=passport.pdf; Diploma=scans/diploma.jpg": names of files in the ZIP archive.
+    documents = serializers.CharField(required=False, default='')
+
+    def validate_form_data(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Must be a JSON object.")
+        return value
+
+    def validate_documents(self, value):
+        documents = []
+        for item in filter(None, (part.strip() for part in value.split(';'))):
+            document_type, separator, member = item.partition('=')
+            if not separator or not document_type.strip() or not member.strip():
+                raise serializers.ValidationError(f"'{item}' is not of the form 'Type=file name'.")
+            documents.append((document_type.strip()[:100], member.strip()))
+        return documents
+
+    def validate(self, data):
+        app_type = data['application_type']
+        if app_type != Application.ApplicationType.NEW_ADMISSION and not data['form_data']:
+            raise serializers.ValidationError({"form_data": "This field is required for the selected application type."})
+        data['form_data'] = validate_application_form_data(app_type, data['form_data'])
+
+        given = [field for field in HISTORY_FIELDS if field in data]
+        if given and len(given) != len(HISTORY_FIELDS):
+            missing = [field for field in HISTORY_FIELDS if field not in data]
+            raise serializers.ValidationError({field: "Required when any academic history column is filled." for field in missing})
+        if app_type == Application.ApplicationType.NEW_ADMISSION and not given:
+            raise serializers.ValidationError({"degree_level": "Academic history is required for New Admission."})
+        return data
+
+
+# --- Reading ---
+def _header(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value in (None, '') else value
+
+
+def _read_csv(handle):
+    reader = csv.reader(io.TextIOWrapper(handle, encoding='utf-8-sig', newline=''))
+    return list(reader)
+
+
+def _read_xlsx(handle):
+    workbook = load_workbook(handle, read_only=True, data_only=True)
+    try:
+        return [list(row) for row in workbook.active.iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+
+def read_rows(field_file):
+    """Returns [(row number, {column: value})] for every non-empty row, numbered as in the sheet."""
+    extension = os.path.splitext(field_file.name)[1].lstrip('.').lower()
+    if extension not in SOURCE_EXTENSIONS:
+        raise ImportFileError(f"Unsupported file type '{extension}'. Use {' or '.join(SOURCE_EXTENSIONS)}.")
+    try:
+        with field_file.open('rb') as handle:
+            table = _read_csv(handle) if extension == 'csv' else _read_xlsx(handle)
+    except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile, KeyError, ValueError) as exc:
+        raise ImportFileError(f"The file could not be read: {exc}")
+    if not table:
+        raise ImportFileError("The file is empty.")
+
+    headers = [_header(value) for value in table[0]]
+    missing = {'applicant_email', 'full_name', 'university', 'program'} - set(headers)
+    if missing:
+        raise ImportFileError(f"Missing columns: {', '.join(sorted(missing))}.")
+
+    rows = []
+    for number, values in enumerate(table[1:], start=2):
+        row = {header: _cell(value) for header, value in zip(headers, values) if header}
+        row = {header: value for header, value in row.items() if value is not None}
+        if row:
+            rows.append((number, row))
+    if len(rows) > settings.APPLICATION_IMPORT_MAX_ROWS:
+        raise ImportFileError(f"Too many rows: {len(rows)}. An import may hold at most {settings.APPLICATION_IMPORT_MAX_ROWS}.")
+    return rows
+
+
+def _flatten_errors(number, errors):
+    report = []
+    for field, messages in errors.items():
+        for message in messages if isinstance(messages, list) else [messages]:
+            report.append({'row': number, 'field': None if field == 'non_field_errors' else field, 'message': str(message)})
+    return report
+
+
+# --- Validation ---
+def validate_rows(rows, archive=None):
+    """
+    Validates every row in one pass and returns (valid rows, error report). References to
+    programs and universities are resolved with a single query for the whole file.
+    """
+    members = {info.filename: info for info in archive.infolist() if not info.is_dir()} if archive else {}
+    valid, report = [], []
+    for number, row in rows:
+        serializer = ImportRowSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((number, serializer.validated_data))
+        else:
+            report.extend(_flatten_errors(number, serializer.errors))
+
+    programs = dict(
+        Program.objects.filter(pk__in={data['program'] for _, data in valid}).values_list('pk', 'university_id')
+    )
+    priorities = {}
+    for number, data in valid:
+        row_errors = {}
+        if data['program'] not in programs:
+            row_errors['program'] = f"Program {data['program']} does not exist."
+        elif programs[data['program']] != data['university']:
+            row_errors['program'] = f"Program {data['program']} is not offered by university {data['university']}."
+
+        key = (data['applicant_email'].lower(), data['priority'])
+        if key in priorities:
+            row_errors['priority'] = f"Priority {data['priority']} is already used for this applicant on row {priorities[key]}."
+        priorities.setdefault(key, number)
+
+        for document_type, member in data['documents']:
+            info = members.get(member)
+            if info is None:
+                row_errors.setdefault('documents', []).append(f"'{member}' is not in the documents archive.")
+                continue
+            try:
+                validate_announced_file(member, info.file_size)
+            except UploadError as exc:
+                row_errors.setdefault('documents', []).append(f"'{member}': {exc}")
+        if row_errors:
+            report.extend(_flatten_errors(number, row_errors))
+
+    report.sort(key=lambda error: error['row'])
+    return ([data for _, data in valid] if not report else []), report
+
+
+# --- Writing ---
+def _resolve_applicants(rows):
+    """
+    Finds the applicant of every row with one case-insensitive lookup and creates the
+    missing ones, with their Applicant role, in bulk. Returns {lowercased email: user}.
+    """
+    names = {}
+    for data in rows:
+        names.setdefault(data['applicant_email'].lower(), data['full_name'])
+
+    def lookup():
+        return {
+            user.email_lower: user
+            for user in User.objects.annotate(email_lower=Lower('email')).filter(email_lower__in=names)
+        }
+
+    applicants = lookup()
+    missing = [email for email in names if email not in applicants]
+    if missing:
+        # Another request may create one of these users meanwhile: skip it and read back the winners.
+        User.objects.bulk_create(
+            [User(email=email, full_name=names[email]) for email in missing], batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
+        applicants = lookup()
+        applicant_role, _ = Role.objects.get_or_create(name='Applicant')
+        through = User.roles.through
+        through.objects.bulk_create(
+            [through(user_id=applicants[email].pk, role_id=applicant_role.pk) for email in missing],
+            batch_size=BATCH_SIZE, ignore_conflicts=True,
+        )
+    return applicants
+
+
+def _store_documents(rows, archive):
+    """Copies each referenced archive member into storage once; returns {member: stored name}."""
+    stored = {}
+    for data in rows:
+        for _, member in data['documents']:
+            if member in stored:
+                continue
+            name = f"application_docs/{get_valid_filename(os.path.basename(member)) or 'document'}"
+            with archive.open(member) as source:
+                stored[member] = default_storage.save(name, source)
+    return stored
+
+
+def create_applications(institution, rows, archive=None, comment=''):
+    """
+    Creates one application per validated row, with its choice, academic history,
+    documents, log entry, review task and outbox event, using bulk inserts throughout.
+    """
+    stored = _store_documents(rows, archive) if archive else {}
+    try:
+        with transaction.atomic():
+            applicants = _resolve_applicants(rows)
+            applications = Application.objects.bulk_create([
+                Application(
+                    applicant=applicants[data['applicant_email'].lower()], submitted_by_institution=institution,
+                    application_type=data['application_type'], form_data=data['form_data'],
+                    full_name=data['full_name'], date_of_birth=data.get('date_of_birth'),
+                    country_of_residence=data['country_of_residence'], father_name=data['father_name'],
+                    grandfather_name=data.get('grandfather_name'), email=data['email'],
+                )
+                for data in rows
+            ], batch_size=BATCH_SIZE)
+
+            pairs = list(zip(applications, rows))
+            UniversityChoice.objects.bulk_create([
+                UniversityChoice(application=application, university_id=data['university'],
+                                 program_id=data['program'], priority=data['priority'])
+                for application, data in pairs
+            ], batch_size=BATCH_SIZE)
+            AcademicHistory.objects.bulk_create([
+                AcademicHistory(application=application, **{field: data[field] for field in HISTORY_FIELDS})
+                for application, data in pairs if 'degree_level' in data
+            ], batch_size=BATCH_SIZE)
+            documents = ApplicationDocument.objects.bulk_create([
+                ApplicationDocument(application=application, document_type=document_type, file=stored[member])
+                for application, data in pairs for document_type, member in data['documents']
+            ], batch_size=BATCH_SIZE)
+            ApplicationLog.objects.bulk_create([
+                ApplicationLog(application=application, actor=institution, action="Application submitted.", comment=comment)
+                for application in applications
+            ], batch_size=BATCH_SIZE)
+            ApplicationTask.objects.bulk_create([
+                ApplicationTask(application=application, university_id=data['university'])
+                for application, data in pairs
+            ], batch_size=BATCH_SIZE)
+            events = OutboxEvent.objects.bulk_create([
+                OutboxEvent(application=application, topic='application.submitted', payload={'actor_id': institution.pk})
+                for application in applications
+            ], batch_size=BATCH_SIZE)
+            mark_changed(*applications)
+            event_ids = [event.pk for event in events]
+            transaction.on_commit(lambda: _schedule_dispatch(event_ids))
+            # bulk_create sends no post_save signals, so queue the scan derivatives here.
+            for document in documents:
+                if is_image(document.file.name):
+                    schedule_variants(document, 'file')
+    except Exception:
+        for name in stored.values():
+            default_storage.delete(name)
+        raise
+    return applications
+
+
+# --- Jobs ---
+def _finish(job, status, errors=()):
+    job.status = status
+    job.errors = list(errors)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'errors', 'total_rows', 'created_count', 'finished_at'])
+    return job
+
+
+def process_import(job):
+    """Runs an import job: reads and validates the whole file, then creates every application or none."""
+    try:
+        rows = read_rows(job.source_file)
+    except ImportFileError as exc:
+        return _finish(job, ApplicationImport.StatusChoices.FAILED, [{'row': None, 'field': None, 'message': str(exc)}])
+    job.total_rows = len(rows)
+
+    archive = None
+    try:
+        if job.documents_archive:
+            try:
+                archive = zipfile.ZipFile(job.documents_archive.open('rb'))
+            except zipfile.BadZipFile:
+                return _finish(job, ApplicationImport.StatusChoices.FAILED,
+                               [{'row': None, 'field': 'documents_archive', 'message': "Not a valid ZIP archive."}])
+
+        valid, report = validate_rows(rows, archive)
+        if report:
+            return _finish(job, ApplicationImport.StatusChoices.FAILED, report)
+        applications = create_applications(job.submitted_by, valid, archive, comment=f"Imported with bulk import #{job.pk}.")
+    finally:
+        if archive is not None:
+            archive.close()
+            job.documents_archive.close()
+
+    job.created_count = len(applications)
+    logger.info("[IMPORT] Import #%s created %s applications", job.pk, job.created_count)
+    return _finish(job, ApplicationImport.StatusChoices.COMPLETED)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-19 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0004_outboxevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, help_text='Position of the latest change to this application or its children in the change feed.', verbose_name='Change Sequence'),
+        ),
+    ]
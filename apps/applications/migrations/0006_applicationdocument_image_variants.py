@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-19 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0005_application_change_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applicationdocument',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Derivatives of image scans, filled in by a background task.', verbose_name='Image Variants'),
+        ),
+    ]
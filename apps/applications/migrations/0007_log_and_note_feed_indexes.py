@@ -0,0 +1,21 @@
+# Generated by Django 4.2.13 on 2026-10-19 03:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0006_applicationdocument_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='applicationlog',
+            index=models.Index(fields=['application', '-timestamp', '-id'], name='applications_log_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='internalnote',
+            index=models.Index(fields=['application', '-timestamp', '-id'], name='applications_note_feed_idx'),
+        ),
+    ]
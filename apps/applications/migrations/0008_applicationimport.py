@@ -0,0 +1,36 @@
+# Generated by Django 4.2.13 on 2026-10-19 03:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('applications', '0007_log_and_note_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_file', models.FileField(upload_to='application_imports/', verbose_name='Source File')),
+                ('documents_archive', models.FileField(blank=True, null=True, upload_to='application_imports/', verbose_name='Documents Archive')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('PROCESSING', 'Processing'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=20, verbose_name='Status')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='Total Rows')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='Applications Created')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Errors')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+                ('submitted_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='application_imports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Application Import',
+                'verbose_name_plural': 'Application Imports',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.db.models import F
+
+CHANGE_SEQUENCE = 'applications.change_feed'
+
+
+def backfill_change_seq(apps, schema_editor):
+    """
+    Applications created before the change feed kept the default of 0 and would never
+    be returned to a client syncing from `since=0`; move them all to one new position.
+    """
+    Application = apps.get_model('applications', 'Application')
+    Sequence = apps.get_model('core', 'Sequence')
+    existing = Application.objects.filter(change_seq=0)
+    if not existing.exists():
+        return
+    if not Sequence.objects.filter(name=CHANGE_SEQUENCE).update(value=F('value') + 1):
+        Sequence.objects.create(name=CHANGE_SEQUENCE, value=1)
+    existing.update(change_seq=Sequence.objects.get(name=CHANGE_SEQUENCE).value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_sequence'),
+        ('applications', '0008_applicationimport'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_change_seq, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.13 on 2026-10-19 04:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0009_backfill_change_seq'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='application',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, help_text='Position of the latest change to this application or its children in the change feed.', verbose_name='Change Sequence'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['change_seq', 'id'], name='applications_change_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+# Roles that worked with internal notes before the permission was enforced.
+EXPERT_ROLES = ('UniversityExpert', 'HeadOfOrganization')
+
+
+def grant_view_internal_notes(apps, schema_editor):
+    Permission = apps.get_model('users', 'Permission')
+    Role = apps.get_model('users', 'Role')
+    permission, _ = Permission.objects.get_or_create(
+        codename='view_internal_notes', defaults={'name': 'Can view internal notes', 'group': 'applications'},
+    )
+    for role in Role.objects.filter(name__in=EXPERT_ROLES):
+        role.permissions.add(permission)
+
+
+def revoke_view_internal_notes(apps, schema_editor):
+    apps.get_model('users', 'Permission').objects.filter(codename='view_internal_notes').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0010_change_feed_cursor_index'),
+        ('users', '0005_user_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(grant_view_internal_notes, revoke_view_internal_notes),
+    ]
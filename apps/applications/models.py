@@ -1,15 +1,13 @@
 # apps/applications/models.py
-import uuid
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 def generate_tracking_code():
-    """Generates a unique tracking code like 'ISA-2024-ABC12'."""
-    from django.utils import timezone
-    code = str(uuid.uuid4().hex[:5]).upper()
-    year = timezone.now().year
-    return f"ISA-{year}-{code}"
+    """Allocates the next tracking code of the year, like 'ISA-2026-0001ZK' (see apps/core/identifiers.py)."""
+    from apps.core.identifiers import allocate
+    return allocate('tracking_code')
 
 class Application(models.Model):
     class StatusChoices(models.TextChoices):
@@ -50,9 +48,15 @@ class Application(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(
+        _("Change Sequence"), default=0, editable=False,
+        help_text=_("Position of the latest change to this application or its children in the change feed.")
+    )
     
     class Meta:
         ordering = ['-created_at']
+        # The change feed pages on (change_seq, id): one change can move many applications.
+        indexes = [models.Index(fields=['change_seq', 'id'], name='applications_change_feed_idx')]
 
     def __str__(self):
         return f"Application {self.tracking_code} ({self.get_application_type_display()})"
@@ -79,6 +83,10 @@ class ApplicationDocument(models.Model):
     application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name="documents")
     document_type = models.CharField(_("Document Type"), max_length=100)
     file = models.FileField(_("File"), upload_to='application_docs/')
+    image_variants = models.JSONField(
+        _("Image Variants"), default=dict, blank=True, editable=False,
+        help_text=_("Derivatives of image scans, filled in by a background task.")
+    )
 
 class ApplicationLog(models.Model):
     application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name="logs")
@@ -88,6 +96,7 @@ class ApplicationLog(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     class Meta:
         ordering = ['-timestamp']
+        indexes = [models.Index(fields=['application', '-timestamp', '-id'], name='applications_log_feed_idx')]
 
 class ApplicationTask(models.Model):
     class StatusChoices(models.TextChoices):
@@ -112,4 +121,61 @@ class InternalNote(models.Model):
     class Meta:
         verbose_name = _("Internal Note")
         verbose_name_plural = _("Internal Notes")
-        ordering = ['-timestamp']
\ No newline at end of file
+        ordering = ['-timestamp']
+        indexes = [models.Index(fields=['application', '-timestamp', '-id'], name='applications_note_feed_idx')]
+class OutboxEvent(models.Model):
+    """
+    A side effect of an application state change, written in the same transaction
+    as the change and delivered afterwards by the outbox dispatcher. Events of one
+    application are delivered in id order; delivery is at-least-once.
+    """
+    class StatusChoices(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        DONE = 'DONE', _('Done')
+        FAILED = 'FAILED', _('Failed')
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, null=True, blank=True, related_name="outbox_events")
+    topic = models.CharField(_("Topic"), max_length=100)
+    payload = models.JSONField(_("Payload"), default=dict, blank=True)
+    status = models.CharField(_("Status"), max_length=10, choices=StatusChoices.choices, default=StatusChoices.PENDING)
+    attempts = models.PositiveSmallIntegerField(_("Attempts"), default=0)
+    available_at = models.DateTimeField(_("Available At"), default=timezone.now)
+    last_error = models.TextField(_("Last Error"), blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(_("Processed At"), null=True, blank=True)
+    class Meta:
+        verbose_name = _("Outbox Event")
+        verbose_name_plural = _("Outbox Events")
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='applications_outbox_due_idx'),
+            models.Index(fields=['application', 'status'], name='applications_outbox_app_idx'),
+        ]
+    def __str__(self):
+        return f"{self.topic} #{self.pk} ({self.status})"
+
+class ApplicationImport(models.Model):
+    """
+    A spreadsheet of applicants submitted by a recruitment institution, with an optional
+    ZIP of their documents. Rows are validated and created in bulk by a background job;
+    `errors` holds the row-level report when the file is rejected.
+    """
+    class StatusChoices(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        PROCESSING = 'PROCESSING', _('Processing')
+        COMPLETED = 'COMPLETED', _('Completed')
+        FAILED = 'FAILED', _('Failed')
+    submitted_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="application_imports")
+    source_file = models.FileField(_("Source File"), upload_to='application_imports/')
+    documents_archive = models.FileField(_("Documents Archive"), upload_to='application_imports/', blank=True, null=True)
+    status = models.CharField(_("Status"), max_length=20, choices=StatusChoices.choices, default=StatusChoices.PENDING)
+    total_rows = models.PositiveIntegerField(_("Total Rows"), default=0)
+    created_count = models.PositiveIntegerField(_("Applications Created"), default=0)
+    errors = models.JSONField(_("Errors"), default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(_("Finished At"), null=True, blank=True)
+    class Meta:
+        verbose_name = _("Application Import")
+        verbose_name_plural = _("Application Imports")
+        ordering = ['-created_at']
+    def __str__(self):
+        return f"Import #{self.pk} by {self.submitted_by} ({self.status})"
@@ -0,0 +1,162 @@
+# apps/applications/outbox.py
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# topic -> list of handler callables, filled by @handles
+HANDLERS = defaultdict(list)
+
+
+def handles(*topics):
+    """Registers a function as a handler for one or more outbox topics."""
+    def decorator(func):
+        for topic in topics:
+            HANDLERS[topic].append(func)
+        return func
+    return decorator
+
+
+def _schedule_dispatch(event_ids):
+    if not getattr(settings, 'EVENT_STREAM_REDIS_URL', None):
+        # The event stream lives in this process: handlers run by a Celery worker would publish
+        # to a broadcaster no client is connected to, so deliver the new events here once the
+        # change commits. Only those, in one batch: the backlog is left to the periodic run.
+        try:
+            dispatch_events(event_ids=event_ids, max_batches=1)
+        except Exception:
+            logger.exception("[OUTBOX] In-process dispatch failed; the periodic run will deliver the events.")
+        return
+
+    from .tasks import dispatch_outbox_events
+    try:
+        dispatch_outbox_events.delay()
+    except Exception:
+        logger.warning("[OUTBOX] Could not schedule dispatch_outbox_events; the periodic run will deliver the events.")
+
+
+def record_event(application, topic, actor=None, **payload):
+    """
+    Records a side effect of a state change. Must be called inside the transaction
+    that makes the change, so the event exists if and only if the change committed.
+    It also advances the application in the change feed.
+    """
+    from .changes import mark_changed
+
+    if application is not None:
+        mark_changed(application)
+    if actor is not None:
+        payload.setdefault('actor_id', actor.pk)
+    event = OutboxEvent.objects.create(application=application, topic=topic, payload=payload)
+    transaction.on_commit(lambda: _schedule_dispatch([event.pk]))
+    return event
+
+
+def retry_delay(attempts):
+    base = getattr(settings, 'OUTBOX_RETRY_BASE_SECONDS', 30)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 6 * 60 * 60))
+
+
+def _deliver(event):
+    for handler in HANDLERS.get(event.topic, ()):
+        handler(event)
+
+
+def dispatch_events(batch_size=None, max_batches=None, event_ids=None):
+    """
+    Delivers due outbox events to their handlers in batches.
+
+    An event is only delivered once every older pending event of the same
+    application has been delivered, so handlers see each application's events
+    in order. A failing event is retried with backoff and holds back the later
+    events of its application until it succeeds or is given up on.
+    `event_ids` limits the run to those events. Returns the number of events delivered.
+    """
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 200)
+    due = OutboxEvent.objects.filter(status=OutboxEvent.StatusChoices.PENDING)
+    if event_ids is not None:
+        due = due.filter(id__in=event_ids)
+    max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 10)
+    delivered, batches = 0, 0
+
+    while max_batches is None or batches < max_batches:
+        now = timezone.now()
+        # Events stuck behind an older event that is waiting for a retry cannot go yet;
+        # leaving them out keeps them from filling every batch.
+        waiting_for_retry = OutboxEvent.objects.filter(
+            application_id=OuterRef('application_id'), id__lt=OuterRef('id'),
+            status=OutboxEvent.StatusChoices.PENDING, available_at__gt=now,
+        )
+        with transaction.atomic():
+            events = list(
+                due.select_for_update(skip_locked=True).filter(available_at__lte=now)
+                .exclude(Exists(waiting_for_retry))
+                .order_by('id')[:batch_size]
+            )
+            if not events:
+                break
+
+            # Every pending event of the applications in this batch, including ones that are
+            # not due yet or are locked by another worker: they decide what may go first.
+            application_ids = {event.application_id for event in events if event.application_id}
+            pending_ids = defaultdict(list)
+            for application_id, event_id in (
+                OutboxEvent.objects.filter(status=OutboxEvent.StatusChoices.PENDING, application_id__in=application_ids)
+                .order_by('id').values_list('application_id', 'id')
+            ):
+                pending_ids[application_id].append(event_id)
+
+            finished, touched = set(), []
+            for event in events:
+                if event.application_id and any(
+                    event_id < event.id and event_id not in finished for event_id in pending_ids[event.application_id]
+                ):
+                    continue  # An older event of this application has not been delivered yet.
+
+                touched.append(event)
+                event.attempts += 1
+                try:
+                    with transaction.atomic():
+                        _deliver(event)
+                except Exception as exc:
+                    logger.exception("[OUTBOX] Handler failed for event %s (%s)", event.pk, event.topic)
+                    event.last_error = str(exc)[:2000]
+                    if event.attempts >= max_attempts:
+                        event.status = OutboxEvent.StatusChoices.FAILED
+                        finished.add(event.id)
+                    else:
+                        event.available_at = timezone.now() + retry_delay(event.attempts)
+                    continue
+
+                event.status = OutboxEvent.StatusChoices.DONE
+                event.processed_at = timezone.now()
+                event.last_error = ''
+                finished.add(event.id)
+                delivered += 1
+
+            OutboxEvent.objects.bulk_update(touched, ['status', 'attempts', 'available_at', 'last_error', 'processed_at'])
+        batches += 1
+        if len(events) < batch_size or not touched:
+            break
+    return delivered
+
+
+def purge_delivered_events(progress=None):
+    """
+    Deletes events delivered more than OUTBOX_RETENTION_DAYS ago, in batches that
+    never load the rows. Pending and failed events are kept. Returns rows deleted.
+    """
+    from apps.core.purge import Purger
+
+    cutoff = timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    return Purger(progress=progress).purge(
+        OutboxEvent.objects.filter(status=OutboxEvent.StatusChoices.DONE, processed_at__lt=cutoff)
+    )
@@ -0,0 +1,10 @@
+# apps/applications/pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+class TimelineCursorPagination(CursorPagination):
+    """Newest-first cursor pages over (timestamp, id) for application logs and notes."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-timestamp', '-id')
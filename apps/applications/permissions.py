@@ -91,4 +91,14 @@ class IsAssignedExpert(BasePermission):
             university_id=university_pk,
             assigned_expert=user
         ).exists()
-# end of apps/applications/permissions.py
\ No newline at end of file
+
+
+class IsNoteAuthorOrStaff(BasePermission):
+    """Anyone allowed to read internal notes may read a note; only its author or staff may change or delete it."""
+    message = "Only the author of a note can change or delete it."
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return True
+        return obj.author_id == request.user.id or request.user.is_staff
+# end of apps/applications/permissions.py
@@ -0,0 +1,55 @@
+# apps/applications/planner.py
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import ApplicationLog, InternalNote
+
+# Serializer field -> (select_related, prefetch_related) it needs.
+RELATIONS = {
+    'applicant': (['applicant__organization_unit'], ['applicant__roles', 'applicant__universities']),
+    'academic_histories': ([], ['academic_histories']),
+    'university_choices': ([], ['university_choices__university', 'university_choices__program']),
+    'documents': ([], ['documents']),
+    'tasks': ([], [
+        'tasks__university', 'tasks__assigned_expert__organization_unit',
+        'tasks__assigned_expert__roles', 'tasks__assigned_expert__universities',
+    ]),
+}
+
+
+def child_count(model):
+    """Correlated COUNT of `model` rows per application, without joining them into the main query."""
+    counts = model.objects.filter(application=OuterRef('pk')).order_by().values('application').annotate(total=Count('pk'))
+    return Coalesce(Subquery(counts.values('total')), 0)
+
+
+# Serializer field -> (annotation name, expression factory) it reads.
+ANNOTATIONS = {
+    'logs_count': ('logs_total', lambda: child_count(ApplicationLog)),
+    'internal_notes_count': ('internal_notes_total', lambda: child_count(InternalNote)),
+}
+
+
+def plan_queryset(queryset, field_names):
+    """
+    Adds only the joins, prefetches and annotations that the serializer fields in
+    `field_names` will read, so a client asking for `?fields=status,tasks` costs two
+    queries instead of one per relation. Pass ALL_FIELDS to load everything.
+    """
+    field_names = set(field_names)
+    select, prefetch = [], []
+    for name, (select_lookups, prefetch_lookups) in RELATIONS.items():
+        if name in field_names:
+            select.extend(select_lookups)
+            prefetch.extend(prefetch_lookups)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    annotations = {
+        annotation: expression() for name, (annotation, expression) in ANNOTATIONS.items() if name in field_names
+    }
+    return queryset.annotate(**annotations) if annotations else queryset
+
+
+ALL_FIELDS = frozenset(RELATIONS) | frozenset(ANNOTATIONS)
@@ -1,5 +1,6 @@
 # start of apps/applications/serializers.py
 # apps/applications/serializers.py
+from django.conf import settings
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction # --- FIX: Import transaction for atomic operations
 from django.core.validators import FileExtensionValidator
@@ -9,18 +10,23 @@ import copy # --- FIX: Import copy to duplicate nested data
 
 from .models import (
     Application, AcademicHistory, UniversityChoice,
-    ApplicationDocument, ApplicationLog, ApplicationTask, InternalNote
+    ApplicationDocument, ApplicationLog, ApplicationTask, InternalNote, ApplicationImport
 )
+from .outbox import record_event
 from apps.core.models import Program, University
 from apps.users.models import User, Role
 from apps.core.serializers import UniversitySerializer, ProgramSerializer
+from apps.users.permissions import has_role_permission
 from apps.users.serializers import UserSerializer
+from apps.core.images import variant_urls
+from apps.core.fieldsets import SparseFieldsetMixin
+from apps.uploads.serializers import AttachesUploadsMixin, UploadReferenceField
 
 # --- Validation & Helper Functions ---
 def file_size_validator(value):
-    limit = 5 * 1024 * 1024  # 5 MB
+    limit = settings.UPLOAD_MAX_SIZE
     if value.size > limit:
-        raise DjangoValidationError('File too large. Size should not exceed 5 MB.')
+        raise DjangoValidationError(f'File too large. Size should not exceed {limit // (1024 * 1024)} MB.')
 
 def validate_application_form_data(application_type, form_data):
     required_fields = {}
@@ -36,13 +42,21 @@ def validate_application_form_data(application_type, form_data):
             raise serializers.ValidationError(f"'{field}' must be of type {field_type.__name__}.")
     return form_data
 
+def with_user_details(queryset, user_field):
+    """Loads what the nested UserSerializer renders for `user_field` without a query per row."""
+    return queryset.select_related(f'{user_field}__organization_unit').prefetch_related(
+        f'{user_field}__roles', f'{user_field}__universities'
+    )
+
 # --- Nested & Read-Only Serializers ---
 class AcademicHistorySerializer(serializers.ModelSerializer):
     certificate_file = serializers.FileField(use_url=True, read_only=True, required=False, allow_null=True)
+    # The certificate itself is sent through the resumable upload API.
+    certificate_upload_id = UploadReferenceField(source='certificate_file', write_only=True, required=False)
     class Meta:
         model = AcademicHistory
         # --- FIX: INCLUDE 'id' IN THE FIELDS ---
-        fields = ['id', 'degree_level', 'country', 'university_name', 'field_of_study', 'gpa', 'certificate_file']
+        fields = ['id', 'degree_level', 'country', 'university_name', 'field_of_study', 'gpa', 'certificate_file', 'certificate_upload_id']
         # Make 'id' optional for creation
         extra_kwargs = {'id': {'read_only': False, 'required': False}}
 
@@ -60,16 +74,28 @@ class UniversityChoiceSerializer(serializers.ModelSerializer):
 class ApplicationDocumentSerializer(serializers.ModelSerializer):
     # This serializer is now used for both reading (displaying links)
     # and writing (accepting new files). `drf-writable-nested` will handle it.
+    # A file can be sent inline or uploaded beforehand and referenced by `upload_id`.
+    upload_id = UploadReferenceField(source='file', write_only=True, required=False)
+    # Thumbnail/preview URLs for image scans; empty for PDFs and until they are rendered.
+    file_variants = serializers.SerializerMethodField()
     class Meta:
         model = ApplicationDocument
-        fields = ['id', 'document_type', 'file']
+        fields = ['id', 'document_type', 'file', 'upload_id', 'file_variants']
         extra_kwargs = {
             'id': {'read_only': False, 'required': False},
             # File is required when creating, but not when just viewing.
             # The main serializer's 'required=False' on the field handles this.
-            'file': {'use_url': True} 
+            'file': {'use_url': True, 'required': False} 
         }
 
+    def get_file_variants(self, obj):
+        return variant_urls(obj.file, obj.image_variants, self.context.get('request'))
+
+    def validate(self, data):
+        if not data.get('file') and not (data.get('id') or self.instance):
+            raise serializers.ValidationError({"file": "Either 'file' or 'upload_id' is required."})
+        return data
+
 class ApplicationLogSerializer(serializers.ModelSerializer):
     actor = UserSerializer(read_only=True)
     comment = serializers.CharField() # Ensure comment is serialized as a string
@@ -93,28 +119,77 @@ class InternalNoteSerializer(serializers.ModelSerializer):
 
 
 # --- Main Application Serializers ---
-class ApplicationListSerializer(serializers.ModelSerializer):
+class ApplicationListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Application rows for list screens; `?expand=` adds nested collections on demand."""
     applicant = UserSerializer(read_only=True)
+    expandable_fields = {
+        'academic_histories': (AcademicHistorySerializer, {'many': True}),
+        'university_choices': (UniversityChoiceSerializer, {'many': True}),
+        'documents': (ApplicationDocumentSerializer, {'many': True}),
+        'tasks': (ApplicationTaskSerializer, {'many': True}),
+    }
     class Meta:
         model = Application
         fields = ['tracking_code', 'status', 'application_type', 'full_name', 'created_at', 'applicant']
 
 
-class ApplicationDetailSerializer(serializers.ModelSerializer):
+class ApplicationChangeSerializer(ApplicationListSerializer):
+    """List representation plus the change-feed position, for `applications/changes/`."""
+    class Meta(ApplicationListSerializer.Meta):
+        fields = ApplicationListSerializer.Meta.fields + ['change_seq']
+
+
+class ApplicationDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Full application view. Logs and internal notes are capped to the newest
+    RECENT_ITEMS_LIMIT entries, with their totals alongside; the rest is paged through
+    `applications/{tracking_code}/logs/` and `notes/`, so the payload size stays fixed.
+    `?fields=` and `?omit=` trim it further. Internal notes are left out for users
+    without the `view_internal_notes` permission, such as applicants.
+    """
+    RECENT_ITEMS_LIMIT = 10
+
     applicant = UserSerializer(read_only=True)
     academic_histories = AcademicHistorySerializer(many=True, read_only=True)
     university_choices = UniversityChoiceSerializer(many=True, read_only=True)
     # --- FIX: Use the corrected, writable serializer for display ---
     documents = ApplicationDocumentSerializer(many=True, read_only=True)
-    logs = ApplicationLogSerializer(many=True, read_only=True)
+    logs = serializers.SerializerMethodField()
+    logs_count = serializers.SerializerMethodField()
     tasks = ApplicationTaskSerializer(many=True, read_only=True)
-    internal_notes = InternalNoteSerializer(many=True, read_only=True) 
+    internal_notes = serializers.SerializerMethodField()
+    internal_notes_count = serializers.SerializerMethodField()
     class Meta:
         model = Application
         fields = '__all__'
 
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is not None and not has_role_permission(request.user, 'view_internal_notes'):
+            fields.pop('internal_notes', None)
+            fields.pop('internal_notes_count', None)
+        return fields
 
-class ApplicationCreateSerializer(WritableNestedModelSerializer):
+    def get_logs(self, obj):
+        logs = with_user_details(obj.logs.order_by('-timestamp', '-id'), 'actor')[:self.RECENT_ITEMS_LIMIT]
+        return ApplicationLogSerializer(logs, many=True, context=self.context).data
+
+    def get_logs_count(self, obj):
+        # The detail view annotates the counts; fall back to a query for other callers.
+        count = getattr(obj, 'logs_total', None)
+        return count if count is not None else obj.logs.count()
+
+    def get_internal_notes(self, obj):
+        notes = with_user_details(obj.internal_notes.order_by('-timestamp', '-id'), 'author')[:self.RECENT_ITEMS_LIMIT]
+        return InternalNoteSerializer(notes, many=True, context=self.context).data
+
+    def get_internal_notes_count(self, obj):
+        count = getattr(obj, 'internal_notes_total', None)
+        return count if count is not None else obj.internal_notes.count()
+
+
+class ApplicationCreateSerializer(AttachesUploadsMixin, WritableNestedModelSerializer):
     applicant = serializers.HiddenField(default=serializers.CurrentUserDefault())
     applicant_email = serializers.EmailField(write_only=True, required=False)
     application_type = serializers.ChoiceField(choices=Application.ApplicationType.choices)
@@ -197,12 +272,13 @@ class ApplicationCreateSerializer(WritableNestedModelSerializer):
                     ApplicationDocument.objects.create(application=new_application, **doc_data)
                 ApplicationLog.objects.create(application=new_application, actor=request_user, action="Application submitted.")
                 ApplicationTask.objects.create(application=new_application, university=choice_data['university'])
+                record_event(new_application, 'application.submitted', actor=request_user)
                 created_applications.append(new_application)
         return created_applications[0] if created_applications else None
 
 
 # --- THIS IS THE SERIALIZER THAT WAS MISSING ---
-class ApplicationUpdateSerializer(WritableNestedModelSerializer):
+class ApplicationUpdateSerializer(AttachesUploadsMixin, WritableNestedModelSerializer):
     """Serializer for updating/resubmitting an application."""
     academic_histories = AcademicHistorySerializer(many=True, required=False)
     university_choices = UniversityChoiceSerializer(many=True, required=False)
@@ -246,4 +322,22 @@ class ApplicationActionSerializer(serializers.Serializer):
 class TaskReassignmentSerializer(serializers.Serializer):
     user_id = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), label="New Expert User ID")
     
+class ApplicationImportSerializer(serializers.ModelSerializer):
+    """A bulk import: the spreadsheet and documents going in, its progress and error report coming out."""
+    source_file = serializers.FileField(write_only=True, validators=[FileExtensionValidator(allowed_extensions=['csv', 'xlsx'])])
+    documents_archive = serializers.FileField(
+        write_only=True, required=False, allow_null=True,
+        validators=[FileExtensionValidator(allowed_extensions=['zip'])]
+    )
+    class Meta:
+        model = ApplicationImport
+        fields = ['id', 'source_file', 'documents_archive', 'status', 'total_rows', 'created_count', 'errors', 'created_at', 'finished_at']
+        read_only_fields = ['status', 'total_rows', 'created_count', 'errors', 'created_at', 'finished_at']
+
+    def validate_documents_archive(self, value):
+        if value and value.size > settings.APPLICATION_IMPORT_MAX_ARCHIVE_SIZE:
+            limit = settings.APPLICATION_IMPORT_MAX_ARCHIVE_SIZE // (1024 * 1024)
+            raise serializers.ValidationError(f'Archive too large. Size should not exceed {limit} MB.')
+        return value
+
 # end of apps/applications/serializers.py
\ No newline at end of file
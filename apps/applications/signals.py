@@ -3,7 +3,9 @@
 from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from .models import Application, ApplicationLog, ApplicationTask
+from apps.core.images import schedule_variants
+from .models import Application, ApplicationDocument, ApplicationLog, ApplicationTask
+from .outbox import record_event
 
 def process_final_application_decision(application):
     """
@@ -32,14 +34,17 @@ def process_final_application_decision(application):
                 log_action = "Final decision reached: Rejected."
 
             # Update the application status and create a system-generated log entry.
-            application.status = final_status
-            application.save(update_fields=['status'])
-            
-            ApplicationLog.objects.create(
-                application=application,
-                actor=None,  # System action
-                action=log_action
-            )
+            with transaction.atomic():
+                previous_status = application.status
+                application.status = final_status
+                application.save(update_fields=['status'])
+
+                ApplicationLog.objects.create(
+                    application=application,
+                    actor=None,  # System action
+                    action=log_action
+                )
+                record_event(application, 'application.status_changed', previous=previous_status, status=final_status)
 
 @receiver(post_save, sender=ApplicationTask)
 def on_application_task_save(sender, instance, created, **kwargs):
@@ -54,4 +59,10 @@ def on_application_task_save(sender, instance, created, **kwargs):
         # database transaction that saved the task has successfully completed.
         # This prevents race conditions and data inconsistencies.
         transaction.on_commit(lambda: process_final_application_decision(task.application))
-# end of apps/applications/signals.py
\ No newline at end of file
+
+
+@receiver(post_save, sender=ApplicationDocument)
+def on_document_save(sender, instance, **kwargs):
+    """Renders thumbnail and preview copies of scanned documents in the background."""
+    schedule_variants(instance, 'file')
+# end of apps/applications/signals.py
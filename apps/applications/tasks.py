@@ -0,0 +1,46 @@
+# apps/applications/tasks.py
+import logging
+
+from celery import shared_task
+from django.utils import timezone
+
+from .outbox import dispatch_events, purge_delivered_events
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="dispatch_outbox_events", ignore_result=True)
+def dispatch_outbox_events():
+    """
+    Delivers pending OutboxEvents to their handlers. Triggered after each state-changing
+    transaction commits and periodically by celery beat to pick up retries.
+    """
+    return dispatch_events()
+
+
+@shared_task(name="purge_outbox_events", ignore_result=True)
+def purge_outbox_events():
+    """Removes delivered OutboxEvents past their retention period."""
+    return purge_delivered_events()
+
+
+@shared_task(name="run_application_import", ignore_result=True)
+def run_application_import(import_id):
+    """Processes a bulk application import. A job is only picked up once, even if the task is redelivered."""
+    from .imports import process_import
+    from .models import ApplicationImport
+
+    claimed = ApplicationImport.objects.filter(
+        pk=import_id, status=ApplicationImport.StatusChoices.PENDING
+    ).update(status=ApplicationImport.StatusChoices.PROCESSING)
+    if not claimed:
+        return None
+    job = ApplicationImport.objects.select_related('submitted_by').get(pk=import_id)
+    try:
+        process_import(job)
+    except Exception:
+        logger.exception("[IMPORT] Import #%s failed", import_id)
+        ApplicationImport.objects.filter(pk=import_id).update(
+            status=ApplicationImport.StatusChoices.FAILED, finished_at=timezone.now(),
+            errors=[{'row': None, 'field': None, 'message': "The import could not be processed. Please try again."}],
+        )
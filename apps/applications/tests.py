@@ -1,5 +1,34 @@
 # apps/applications/tests.py
-from django.test import TestCase
+import csv
+import importlib
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl import Workbook
+from rest_framework.test import APITestCase
+
+from apps.core.models import Notification, Program, Sequence, University
+from apps.users.models import Permission, Role, User
+from apps.users.permissions import has_role_permission
+from . import exports
+from .changes import CHANGE_SEQUENCE, mark_changed
+from .models import (
+    AcademicHistory, Application, ApplicationDocument, ApplicationImport, ApplicationLog, ApplicationTask, InternalNote,
+    OutboxEvent, UniversityChoice,
+)
+from .outbox import HANDLERS, dispatch_events, purge_delivered_events, record_event
 
 # Create your tests here.
 # Example test structure:
@@ -21,4 +50,587 @@ from django.test import TestCase
 #         # data = {...}
 #         # response = self.client.post(url, data, format='json')
 #         # self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-#         pass
\ No newline at end of file
+#         pass
+
+
+# --- Fixtures ---
+def create_application(applicant, university, program):
+    application = Application.objects.create(applicant=applicant, full_name=applicant.full_name)
+    UniversityChoice.objects.create(application=application, university=university, program=program, priority=1)
+    ApplicationTask.objects.create(application=application, university=university)
+    return application
+
+
+# --- Transactional outbox ---
+class OutboxTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.university = University.objects.create(name='Test University')
+        cls.program = Program.objects.create(name='Software Engineering', university=cls.university)
+        cls.applicant = User.objects.create_user(email='applicant@example.com', password='password123', full_name='Applicant')
+        cls.applicant.roles.add(Role.objects.create(name='Applicant'))
+        cls.expert = User.objects.create_user(email='expert@example.com', password='password123', full_name='Expert')
+        cls.expert.roles.add(Role.objects.create(name='UniversityExpert'))
+        cls.expert.universities.add(cls.university)
+
+    def setUp(self):
+        self.application = create_application(self.applicant, self.university, self.program)
+
+    def test_state_changes_record_events_in_the_same_transaction(self):
+        self.client.force_authenticate(self.expert)
+        url = f'/api/v1/applications/{self.application.tracking_code}/claim/{self.university.pk}/'
+        self.assertEqual(self.client.post(url).status_code, 200)
+        url = f'/api/v1/applications/{self.application.tracking_code}/action/{self.university.pk}/'
+        response = self.client.post(url, {'action': 'CORRECT', 'comment': 'Missing passport scan.'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        events = list(OutboxEvent.objects.filter(application=self.application).values_list('topic', flat=True))
+        self.assertEqual(events, ['task.claimed', 'application.status_changed'])
+
+    def test_status_change_notifies_applicant(self):
+        OutboxEvent.objects.create(
+            application=self.application, topic='application.status_changed',
+            payload={'previous': 'PENDING_REVIEW', 'status': 'PENDING_CORRECTION'},
+        )
+        with mock.patch('apps.core.signals.publish_event'):
+            self.assertEqual(dispatch_events(), 1)
+        self.assertTrue(Notification.objects.filter(user=self.applicant, title__contains=self.application.tracking_code).exists())
+        self.assertEqual(OutboxEvent.objects.get().status, OutboxEvent.StatusChoices.DONE)
+
+    @override_settings(EVENT_STREAM_REDIS_URL=None)
+    def test_in_process_stream_delivers_the_new_event_on_commit(self):
+        self.client.force_authenticate(self.expert)
+        url = f'/api/v1/applications/{self.application.tracking_code}/claim/{self.university.pk}/'
+        with mock.patch('apps.applications.handlers.publish_event') as publish, \
+                mock.patch('apps.applications.tasks.dispatch_outbox_events.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self.client.post(url).status_code, 200)
+        delay.assert_not_called()
+        self.assertEqual(publish.call_args.args[1], 'workbench')
+        self.assertIn(self.expert.pk, publish.call_args.args[0])
+        self.assertEqual(OutboxEvent.objects.get().status, OutboxEvent.StatusChoices.DONE)
+
+    def test_in_process_dispatch_leaves_the_backlog_to_the_periodic_run(self):
+        backlog = OutboxEvent.objects.create(application=None, topic='test.event')
+        with mock.patch.dict(HANDLERS, {'test.event': [mock.Mock()]}, clear=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                event = record_event(None, 'test.event')
+        backlog.refresh_from_db()
+        event.refresh_from_db()
+        self.assertEqual(backlog.status, OutboxEvent.StatusChoices.PENDING)
+        self.assertEqual(event.status, OutboxEvent.StatusChoices.DONE)
+
+    @override_settings(EVENT_STREAM_REDIS_URL='redis://localhost:6379/1')
+    def test_shared_stream_dispatches_in_celery(self):
+        with mock.patch('apps.applications.tasks.dispatch_outbox_events.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                record_event(self.application, 'application.submitted')
+        delay.assert_called_once_with()
+        self.assertEqual(OutboxEvent.objects.get().status, OutboxEvent.StatusChoices.PENDING)
+
+    def test_failed_event_holds_back_later_events_of_the_same_application_only(self):
+        other = create_application(self.applicant, self.university, self.program)
+        delivered = []
+
+        def handler(event):
+            if event.payload.get('fail'):
+                raise RuntimeError('downstream unavailable')
+            delivered.append(event.pk)
+
+        with mock.patch.dict(HANDLERS, {'test.event': [handler]}, clear=True):
+            first = OutboxEvent.objects.create(application=self.application, topic='test.event', payload={'fail': True})
+            second = OutboxEvent.objects.create(application=self.application, topic='test.event')
+            unrelated = OutboxEvent.objects.create(application=other, topic='test.event')
+            self.assertEqual(dispatch_events(), 1)
+            self.assertEqual(delivered, [unrelated.pk])
+
+            first.refresh_from_db()
+            self.assertEqual((first.status, first.attempts), (OutboxEvent.StatusChoices.PENDING, 1))
+            OutboxEvent.objects.filter(pk=first.pk).update(payload={}, available_at=first.created_at)
+            self.assertEqual(dispatch_events(), 2)
+            self.assertEqual(delivered, [unrelated.pk, first.pk, second.pk])
+
+
+# --- Change feed ---
+class ChangeFeedTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.university = University.objects.create(name='Feed University')
+        cls.program = Program.objects.create(name='Physics', university=cls.university)
+        cls.applicant = User.objects.create_user(email='feed-applicant@example.com', password='password123', full_name='Applicant')
+        expert_role = Role.objects.create(name='UniversityExpert')
+        cls.expert = User.objects.create_user(email='feed-expert@example.com', password='password123', full_name='Expert')
+        cls.other_expert = User.objects.create_user(email='feed-other@example.com', password='password123', full_name='Other')
+        for expert in (cls.expert, cls.other_expert):
+            expert.roles.add(expert_role)
+            expert.universities.add(cls.university)
+
+    def setUp(self):
+        self.application = create_application(self.applicant, self.university, self.program)
+
+    def changes(self, user, **params):
+        self.client.force_authenticate(user)
+        return self.client.get('/api/v1/applications/changes/', params)
+
+    def test_changes_after_cursor_only(self):
+        with mock.patch('apps.applications.outbox._schedule_dispatch'), self.captureOnCommitCallbacks(execute=True):
+            record_event(self.application, 'application.submitted')
+        first = self.changes(self.applicant).data
+        self.assertEqual([row['tracking_code'] for row in first['results']], [self.application.tracking_code])
+
+        again = self.changes(self.applicant, since=first['cursor']).data
+        self.assertEqual(again['results'], [])
+        self.assertEqual(again['cursor'], first['cursor'])
+
+    def test_application_leaving_scope_becomes_tombstone(self):
+        with mock.patch('apps.applications.outbox._schedule_dispatch'), self.captureOnCommitCallbacks(execute=True):
+            record_event(self.application, 'application.submitted')
+        cursor = self.changes(self.other_expert, scope='workbench').data['cursor']
+
+        self.client.force_authenticate(self.expert)
+        url = f'/api/v1/applications/{self.application.tracking_code}/claim/{self.university.pk}/'
+        with mock.patch('apps.applications.outbox._schedule_dispatch'), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(url).status_code, 200)
+
+        data = self.changes(self.other_expert, scope='workbench', since=cursor).data
+        self.assertEqual(data['results'], [])
+        self.assertEqual(data['tombstones'], [self.application.tracking_code])
+        data = self.changes(self.expert, scope='workbench', since=cursor).data
+        self.assertEqual([row['tracking_code'] for row in data['results']], [self.application.tracking_code])
+
+    def test_scope_requires_role(self):
+        self.assertEqual(self.changes(self.applicant, scope='workbench').status_code, 403)
+
+    def test_feed_advances_only_when_the_change_commits(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            mark_changed(self.application)
+            self.application.refresh_from_db()
+            self.assertEqual(self.application.change_seq, 0)
+            self.assertFalse(Sequence.objects.filter(name=CHANGE_SEQUENCE).exists())
+        callbacks[0]()
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.change_seq, 1)
+
+    def test_migration_backfills_existing_applications(self):
+        migration = importlib.import_module('apps.applications.migrations.0009_backfill_change_seq')
+        changed = create_application(self.applicant, self.university, self.program)
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_changed(changed)
+        migration.backfill_change_seq(django_apps, None)
+
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.change_seq, 2)
+        data = self.changes(self.applicant).data
+        self.assertEqual(
+            [row['tracking_code'] for row in data['results']], [changed.tracking_code, self.application.tracking_code]
+        )
+
+    def test_pages_through_applications_sharing_a_change(self):
+        applications = [self.application] + [
+            create_application(self.applicant, self.university, self.program) for _ in range(4)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_changed(*applications)
+
+        seen, cursor, has_more = [], '0', True
+        while has_more:
+            data = self.changes(self.applicant, since=cursor, limit=2).data
+            seen += [row['tracking_code'] for row in data['results']]
+            cursor, has_more = data['cursor'], data['has_more']
+        self.assertEqual(seen, [application.tracking_code for application in sorted(applications, key=lambda a: a.pk)])
+        self.assertEqual(self.changes(self.applicant, since='x:1').status_code, 400)
+
+
+# --- Document bundles ---
+class DocumentBundleTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.university = University.objects.create(name='Bundle University')
+        cls.program = Program.objects.create(name='Chemistry', university=cls.university)
+        cls.applicant = User.objects.create_user(email='bundle-applicant@example.com', password='password123', full_name='Applicant')
+        cls.expert = User.objects.create_user(email='bundle-expert@example.com', password='password123', full_name='Expert')
+        cls.expert.roles.add(Role.objects.create(name='UniversityExpert'))
+        cls.expert.universities.add(cls.university)
+        cls.stranger = User.objects.create_user(email='bundle-stranger@example.com', password='password123', full_name='Stranger')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.application = create_application(self.applicant, self.university, self.program)
+        for document_type, content in (('Passport', b'%PDF passport'), ('Photo', b'\xff\xd8\xff photo')):
+            document = ApplicationDocument(application=self.application, document_type=document_type)
+            document.file.save(f'{document_type.lower()}.pdf', ContentFile(content))
+        history = AcademicHistory(
+            application=self.application, degree_level='Bachelor', country='IR',
+            university_name='Old University', field_of_study='Chemistry', gpa='17.50',
+        )
+        history.certificate_file.save('diploma.pdf', ContentFile(b'%PDF diploma'))
+
+    def download(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_application_bundle_streams_files_and_manifest(self):
+        self.client.force_authenticate(self.applicant)
+        url = f'/api/v1/applications/{self.application.tracking_code}/documents.zip/'
+        archive = self.download(url)
+        names = archive.namelist()
+        self.assertEqual(names[0], 'manifest.json')
+        self.assertEqual(len(names), 4)
+        self.assertIn(b'%PDF diploma', [archive.read(name) for name in names])
+
+        manifest = self.client.get(f'/api/v1/applications/{self.application.tracking_code}/documents/manifest/').data
+        self.assertEqual([entry['name'] for entry in manifest['entries']], names[1:])
+
+        resumed = self.download(url, start=2, version=manifest['version'])
+        self.assertEqual(resumed.namelist(), ['manifest.json', names[3]])
+        self.assertEqual(self.client.get(url, {'start': 2, 'version': 'stale'}).status_code, 412)
+
+    def test_university_bundle_requires_affiliation(self):
+        self.client.force_authenticate(self.expert)
+        archive = self.download('/api/v1/applications/documents-bundle.zip/', university=self.university.pk)
+        self.assertTrue(all(name.startswith(f'{self.application.tracking_code}/') for name in archive.namelist()[1:]))
+
+        self.client.force_authenticate(self.stranger)
+        response = self.client.get('/api/v1/applications/documents-bundle.zip/', {'university': self.university.pk})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(f'/api/v1/applications/{self.application.tracking_code}/documents.zip/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_university_bundle_rejects_a_malformed_university(self):
+        self.client.force_authenticate(self.expert)
+        for params in ({'university': 'abc'}, {}):
+            response = self.client.get('/api/v1/applications/documents-bundle/manifest/', params)
+            self.assertEqual(response.status_code, 400)
+
+
+# --- Logs and notes timelines ---
+class TimelineTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.university = University.objects.create(name='Timeline University')
+        cls.program = Program.objects.create(name='Biology', university=cls.university)
+        cls.applicant = User.objects.create_user(email='timeline-applicant@example.com', password='password123', full_name='Applicant')
+        cls.stranger = User.objects.create_user(email='timeline-stranger@example.com', password='password123', full_name='Stranger')
+        expert_role = Role.objects.create(name='UniversityExpert')
+        expert_role.permissions.add(Permission.objects.get(codename='view_internal_notes'))
+        cls.expert = User.objects.create_user(email='timeline-expert@example.com', password='password123', full_name='Expert')
+        cls.other_expert = User.objects.create_user(email='timeline-other@example.com', password='password123', full_name='Other')
+        for expert in (cls.expert, cls.other_expert):
+            expert.roles.add(expert_role)
+            expert.universities.add(cls.university)
+        cls.application = create_application(cls.applicant, cls.university, cls.program)
+        ApplicationLog.objects.bulk_create([
+            ApplicationLog(application=cls.application, actor=cls.applicant, action=f'Step {index}') for index in range(30)
+        ])
+        InternalNote.objects.bulk_create([
+            InternalNote(application=cls.application, author=cls.expert, message=f'Note {index}') for index in range(12)
+        ])
+
+    def test_detail_embeds_only_recent_entries_with_totals(self):
+        self.client.force_authenticate(self.expert)
+        data = self.client.get(f'/api/v1/applications/{self.application.tracking_code}/').data
+        self.assertEqual(data['logs_count'], 30)
+        self.assertEqual(len(data['logs']), 10)
+        self.assertEqual(data['logs'][0]['action'], 'Step 29')
+        self.assertEqual(data['internal_notes_count'], 12)
+        self.assertEqual(len(data['internal_notes']), 10)
+
+    def test_applicants_never_see_internal_notes(self):
+        self.client.force_authenticate(self.applicant)
+        data = self.client.get(f'/api/v1/applications/{self.application.tracking_code}/').data
+        self.assertNotIn('internal_notes', data)
+        self.assertNotIn('internal_notes_count', data)
+        url = f'/api/v1/applications/{self.application.tracking_code}/notes/'
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.post(url, {'message': 'Let me add one.'}).status_code, 403)
+
+    def test_update_response_hides_internal_notes_from_the_applicant(self):
+        Application.objects.filter(pk=self.application.pk).update(status=Application.StatusChoices.PENDING_CORRECTION)
+        self.client.force_authenticate(self.applicant)
+        url = f'/api/v1/applications/{self.application.tracking_code}/'
+        with mock.patch('apps.applications.outbox._schedule_dispatch'):
+            response = self.client.patch(url, {
+                'full_name': 'Renamed Applicant',
+                'academic_histories': [{
+                    'degree_level': 'Bachelor', 'country': 'Iraq', 'university_name': 'Baghdad University',
+                    'field_of_study': 'Physics', 'gpa': '3.50',
+                }],
+                'university_choices': [{
+                    'id': self.application.university_choices.get().pk,
+                    'university_id': self.university.pk, 'program_id': self.program.pk, 'priority': 1,
+                }],
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertNotIn('internal_notes', response.data)
+        self.assertNotIn('internal_notes_count', response.data)
+
+    def test_migration_grants_notes_to_expert_roles(self):
+        migration = importlib.import_module('apps.applications.migrations.0011_grant_view_internal_notes')
+        head = User.objects.create_user(email='timeline-head@example.com', password='password123', full_name='Head')
+        head.roles.add(Role.objects.create(name='HeadOfOrganization'))
+        self.assertFalse(has_role_permission(head, 'view_internal_notes'))
+        migration.grant_view_internal_notes(django_apps, None)
+        self.assertTrue(has_role_permission(head, 'view_internal_notes'))
+
+    def test_only_the_author_changes_a_note(self):
+        note = InternalNote.objects.order_by('id').first()
+        url = f'/api/v1/applications/{self.application.tracking_code}/notes/{note.pk}/'
+        self.client.force_authenticate(self.other_expert)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.patch(url, {'message': 'Rewritten.'}).status_code, 403)
+        self.assertEqual(self.client.delete(url).status_code, 403)
+
+        self.client.force_authenticate(self.expert)
+        self.assertEqual(self.client.patch(url, {'message': 'Rewritten.'}).status_code, 200)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+
+    def test_logs_endpoint_pages_back_through_history(self):
+        self.client.force_authenticate(self.applicant)
+        url = f'/api/v1/applications/{self.application.tracking_code}/logs/'
+        seen, next_url = [], url
+        while next_url:
+            page = self.client.get(next_url).data
+            seen.extend(row['action'] for row in page['results'])
+            next_url = page['next']
+        self.assertEqual(seen, [f'Step {index}' for index in reversed(range(30))])
+
+        self.client.force_authenticate(self.stranger)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(f'/api/v1/applications/{self.application.tracking_code}/notes/').status_code, 403)
+
+
+# --- Sparse fieldsets ---
+class SparseFieldsetTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.university = University.objects.create(name='Sparse University')
+        cls.program = Program.objects.create(name='History', university=cls.university)
+        cls.applicant = User.objects.create_user(email='sparse@example.com', password='password123', full_name='Applicant')
+        cls.applications = [create_application(cls.applicant, cls.university, cls.program) for _ in range(3)]
+
+    def setUp(self):
+        self.client.force_authenticate(self.applicant)
+
+    def test_fields_limit_payload_and_queries(self):
+        with self.assertNumQueries(2):  # count + page; no relation is loaded
+            response = self.client.get('/api/v1/applications/my/', {'fields': 'tracking_code,status'})
+        self.assertEqual(set(response.data['results'][0]), {'tracking_code', 'status'})
+
+    def test_expand_adds_relation_with_one_prefetch(self):
+        with self.assertNumQueries(4):  # count + page + tasks + their universities
+            response = self.client.get('/api/v1/applications/my/', {'fields': 'tracking_code', 'expand': 'tasks'})
+        self.assertEqual(response.data['results'][0]['tasks'][0]['university']['name'], 'Sparse University')
+
+    def test_omit_on_detail(self):
+        url = f'/api/v1/applications/{self.applications[0].tracking_code}/'
+        data = self.client.get(url, {'omit': 'logs,internal_notes,documents'}).data
+        self.assertNotIn('logs', data)
+        self.assertIn('tasks', data)
+        self.assertIn('logs_count', data)
+
+
+# --- Bulk import ---
+IMPORT_COLUMNS = [
+    'applicant_email', 'full_name', 'university', 'program', 'priority',
+    'degree_level', 'country', 'university_name', 'field_of_study', 'gpa', 'documents',
+]
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
+class ApplicationImportTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.university = University.objects.create(name='Import University')
+        cls.program = Program.objects.create(name='Physics', university=cls.university)
+        cls.other_program = Program.objects.create(name='Law', university=University.objects.create(name='Elsewhere'))
+        cls.institution = User.objects.create_user(email='agency@example.com', password='password123', full_name='Agency')
+        cls.institution.roles.add(Role.objects.create(name='Recruitment Institution'))
+        cls.existing = User.objects.create_user(email='Known.Student@example.com', password='password123', full_name='Known')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.client.force_authenticate(self.institution)
+
+    def row(self, email, name, **overrides):
+        row = {
+            'applicant_email': email, 'full_name': name, 'university': self.university.pk, 'program': self.program.pk,
+            'priority': 1, 'degree_level': 'Bachelor', 'country': 'IR', 'university_name': 'Old University',
+            'field_of_study': 'Physics', 'gpa': '17.50', 'documents': '',
+        }
+        row.update(overrides)
+        return [row[column] for column in IMPORT_COLUMNS]
+
+    def csv_file(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(IMPORT_COLUMNS)
+        writer.writerows(rows)
+        return SimpleUploadedFile('applicants.csv', buffer.getvalue().encode(), content_type='text/csv')
+
+    def xlsx_file(self, rows):
+        workbook = Workbook()
+        workbook.active.append(IMPORT_COLUMNS)
+        for row in rows:
+            workbook.active.append(row)
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        return SimpleUploadedFile('applicants.xlsx', buffer.getvalue())
+
+    def zip_file(self, members):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for name, content in members.items():
+                archive.writestr(name, content)
+        return SimpleUploadedFile('documents.zip', buffer.getvalue(), content_type='application/zip')
+
+    def submit(self, source, archive=None):
+        data = {'source_file': source}
+        if archive is not None:
+            data['documents_archive'] = archive
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/applications/imports/', data, format='multipart')
+        self.assertEqual(response.status_code, 202, response.data)
+        return self.client.get(f"/api/v1/applications/imports/{response.data['id']}/").data
+
+    def test_valid_import_creates_applications_in_bulk(self):
+        rows = [
+            self.row('known.student@EXAMPLE.com', 'Known', documents='Passport=known/passport.pdf'),
+            self.row('new.one@example.com', 'New One', documents='Passport=new/passport.pdf; Diploma=new/diploma.pdf'),
+            self.row('new.one@example.com', 'New One', priority=2),
+            self.row('new.two@example.com', 'New Two', degree_level='Master', field_of_study='Law', gpa=18),
+        ]
+        archive = self.zip_file({
+            'known/passport.pdf': b'%PDF known', 'new/passport.pdf': b'%PDF new', 'new/diploma.pdf': b'%PDF diploma',
+        })
+        result = self.submit(self.xlsx_file(rows), archive)
+
+        self.assertEqual(result['status'], ApplicationImport.StatusChoices.COMPLETED, result['errors'])
+        self.assertEqual((result['total_rows'], result['created_count']), (4, 4))
+        applications = Application.objects.filter(submitted_by_institution=self.institution)
+        self.assertEqual(applications.count(), 4)
+        self.assertEqual(applications.filter(applicant=self.existing).count(), 1)
+        new_one = User.objects.get(email='new.one@example.com')
+        self.assertEqual(new_one.full_name, 'New One')
+        self.assertTrue(new_one.roles.filter(name='Applicant').exists())
+        self.assertEqual(sorted(new_one.applications.values_list('university_choices__priority', flat=True)), [1, 2])
+        self.assertEqual(ApplicationDocument.objects.filter(application__applicant=new_one).count(), 2)
+        self.assertEqual(ApplicationTask.objects.filter(application__in=applications).count(), 4)
+        self.assertEqual(OutboxEvent.objects.filter(application__in=applications, topic='application.submitted').count(), 4)
+        self.assertTrue(all(application.change_seq > 0 for application in applications))
+
+    def test_invalid_rows_are_reported_and_nothing_is_created(self):
+        rows = [
+            self.row('fine@example.com', 'Fine'),
+            self.row('not-an-email', 'Broken'),
+            self.row('fine@example.com', 'Fine', program=self.other_program.pk),
+            self.row('missing@example.com', 'Missing', documents='Passport=nowhere.pdf'),
+        ]
+        result = self.submit(self.csv_file(rows))
+
+        self.assertEqual(result['status'], ApplicationImport.StatusChoices.FAILED)
+        reported = {(error['row'], error['field']) for error in result['errors']}
+        self.assertEqual(reported, {(3, 'applicant_email'), (4, 'program'), (4, 'priority'), (5, 'documents')})
+        self.assertFalse(Application.objects.exists())
+        self.assertFalse(User.objects.filter(email='fine@example.com').exists())
+
+    def test_only_institutions_can_import(self):
+        self.client.force_authenticate(self.existing)
+        response = self.client.post('/api/v1/applications/imports/', {'source_file': self.csv_file([])}, format='multipart')
+        self.assertEqual(response.status_code, 403)
+
+
+# --- Outbox retention ---
+class OutboxRetentionTests(APITestCase):
+
+    def test_only_old_delivered_events_are_purged(self):
+        old = timezone.now() - timedelta(days=31)
+        Done, Pending = OutboxEvent.StatusChoices.DONE, OutboxEvent.StatusChoices.PENDING
+        OutboxEvent.objects.bulk_create(
+            [OutboxEvent(topic='old.done', status=Done, processed_at=old) for _ in range(3)]
+            + [OutboxEvent(topic='new.done', status=Done, processed_at=timezone.now()),
+               OutboxEvent(topic='old.pending', status=Pending, available_at=old)]
+        )
+        self.assertEqual(purge_delivered_events(), 3)
+        self.assertEqual(sorted(OutboxEvent.objects.values_list('topic', flat=True)), ['new.done', 'old.pending'])
+
+
+# --- Export formats ---
+def export_tracking_codes(queryset):
+    return HttpResponse('\n'.join(queryset.values_list('tracking_code', flat=True)), content_type='text/plain')
+
+
+class ExportFormatTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        university = University.objects.create(name='Export University')
+        cls.applicant = User.objects.create_user(email='exporter@example.com', password='password123', full_name='Exporter')
+        cls.application = create_application(cls.applicant, university, Program.objects.create(name='Art', university=university))
+
+    def setUp(self):
+        self.client.force_authenticate(self.applicant)
+
+    def test_default_export_is_a_workbook(self):
+        response = self.client.get('/api/v1/applications/my/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+    @override_settings(APPLICATION_EXPORTERS={'xlsx': 'apps.applications.tests.export_tracking_codes'})
+    def test_exporters_are_looked_up_in_the_registry(self):
+        self.assertIsNone(exports.get_exporter('pdf'))
+        response = self.client.get('/api/v1/applications/my/export/')
+        self.assertEqual(response.content.decode(), self.application.tracking_code)
+
+
+# --- Admin ---
+class ApplicationAdminTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email='admin@example.com', password='password123', full_name='Admin')
+        cls.university = University.objects.create(name='Admin University')
+        cls.program = Program.objects.create(name='History', university=cls.university)
+        cls.applicant = User.objects.create_user(email='listed@example.com', password='password123', full_name='Listed')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_changelists_do_not_query_per_row(self):
+        create_application(self.applicant, self.university, self.program)
+        paths = ['/admin/applications/application/', '/admin/applications/applicationtask/']
+        for path in paths:
+            with CaptureQueriesContext(connection) as few:
+                self.assertEqual(self.client.get(path).status_code, 200)
+            for _ in range(5):
+                create_application(self.applicant, self.university, self.program)
+            with CaptureQueriesContext(connection) as many:
+                self.client.get(path)
+            self.assertEqual(len(many), len(few), path)
+
+    @override_settings(ADMIN_INLINE_PER_PAGE=20)
+    def test_logs_are_shown_a_page_at_a_time(self):
+        application = create_application(self.applicant, self.university, self.program)
+        start = timezone.now() - timedelta(days=1)
+        for index in range(25):
+            log = ApplicationLog.objects.create(application=application, actor=self.admin, action=f'entry-{index:02d}')
+            ApplicationLog.objects.filter(pk=log.pk).update(timestamp=start + timedelta(minutes=index))
+        path = f'/admin/applications/application/{application.pk}/change/'
+
+        response = self.client.get(path)
+        self.assertContains(response, 'entry-24')
+        self.assertNotContains(response, 'entry-04')
+        self.assertContains(response, 'Page 1 of 2')
+        response = self.client.get(path, {'logs-page': 2})
+        self.assertContains(response, 'entry-04')
+        self.assertNotContains(response, 'entry-05')
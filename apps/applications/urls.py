@@ -1,15 +1,18 @@
 # apps/applications/urls.py
 from django.urls import path, include
 from rest_framework_nested import routers
-from .views import ApplicationViewSet, TaskViewSet, InternalNoteViewSet
+from .views import ApplicationViewSet, TaskViewSet, InternalNoteViewSet, ApplicationLogViewSet, ApplicationImportViewSet
 
 router = routers.DefaultRouter()
+# Registered before `applications` so `applications/imports/` is not read as a tracking code.
+router.register(r'applications/imports', ApplicationImportViewSet, basename='application-import')
 router.register(r'applications', ApplicationViewSet, basename='application')
 router.register(r'tasks', TaskViewSet, basename='task')
 
 # --- ADD THIS NESTED ROUTER ---
 applications_router = routers.NestedDefaultRouter(router, r'applications', lookup='application')
 applications_router.register(r'notes', InternalNoteViewSet, basename='application-notes')
+applications_router.register(r'logs', ApplicationLogViewSet, basename='application-logs')
 
 urlpatterns = [
     path('', include(router.urls)),
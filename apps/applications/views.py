@@ -1,6 +1,7 @@
 # start of apps/applications/views.py
 # apps/applications/views.py
 from django.db import transaction, models
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, permissions, mixins, status
 from rest_framework.decorators import action
@@ -10,29 +11,49 @@ from rest_framework import filters as drf_filters
 from django_filters.rest_framework import DjangoFilterBackend
 import logging
 
-from .models import Application, ApplicationTask, ApplicationLog, InternalNote, ApplicationDocument
+from .models import Application, ApplicationTask, ApplicationLog, InternalNote, ApplicationDocument, ApplicationImport
 from .serializers import (
     ApplicationCreateSerializer, ApplicationListSerializer, ApplicationDetailSerializer,
     ApplicationUpdateSerializer, ApplicationActionSerializer, TaskReassignmentSerializer,
-    InternalNoteSerializer
+    InternalNoteSerializer, ApplicationChangeSerializer, ApplicationLogSerializer, ApplicationImportSerializer,
+    with_user_details
 )
-from .permissions import IsApplicantOwner, IsRelatedToApplication, IsAssignedExpert
+from .pagination import TimelineCursorPagination
+from .planner import ALL_FIELDS, plan_queryset
+from .permissions import IsApplicantOwner, IsRelatedToApplication, IsAssignedExpert, IsNoteAuthorOrStaff
 from .filters import ApplicationFilter
+from .outbox import record_event
+from .changes import (
+    changed_after, format_cursor, mark_changed, parse_cursor, related_applications, scoped_applications,
+    workbench_application_ids,
+)
+from apps.core.metrics import EXPORT_DURATION
 from apps.core.models import University
-from apps.users.permissions import HasPermission, IsHeadOfOrganization
-from .exporters import generate_excel_response, generate_pdf_response
+from apps.core.replicas import ReplicaReadMixin
+from apps.users.permissions import HasPermission, IsHeadOfOrganization, IsRecruitmentInstitution
+from . import exports
+from .bundles import build_manifest, bundle_entries, stream_zip
+from .tasks import run_application_import
 
 # Get a logger instance for this file
 logger = logging.getLogger(__name__)
 
-class ApplicationViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+
+class ApplicationViewSet(ReplicaReadMixin, mixins.CreateModelMixin, mixins.RetrieveModelMixin,
                          mixins.UpdateModelMixin, mixins.ListModelMixin,
                          viewsets.GenericViewSet):
     """ViewSet for handling student applications."""
-    queryset = Application.objects.select_related('applicant').prefetch_related(
-        'academic_histories', 'university_choices__university', 'university_choices__program',
-        'documents', 'logs__actor', 'tasks__university', 'tasks__assigned_expert', 'internal_notes__author'
-    ).all()
+    # Lists and exports tolerate replication lag; the workbench and change feed do not.
+    replica_actions = (
+        'list', 'my_applications', 'my_submitted_applications', 'university_applications',
+        'all_applications', 'staff_all_applications', 'export_my_applications', 'export_all_applications',
+    )
+    CHANGES_PAGE_SIZE = 100
+    CHANGES_MAX_PAGE_SIZE = 500
+    BUNDLE_MAX_APPLICATIONS = 50
+
+    # Relations are loaded per request by `get_queryset`, following the fields the client asked for.
+    queryset = Application.objects.all()
     lookup_field = 'tracking_code'
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     filter_backends = [DjangoFilterBackend, drf_filters.OrderingFilter, drf_filters.SearchFilter]
@@ -49,13 +70,26 @@ class ApplicationViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
             return ApplicationDetailSerializer
         if self.action == 'take_action':
             return ApplicationActionSerializer
+        if self.action == 'changes':
+            return ApplicationChangeSerializer
         return ApplicationListSerializer
 
 
+    EXPORT_ACTIONS = ('export_my_applications', 'export_all_applications')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.EXPORT_ACTIONS:
+            return plan_queryset(queryset, {'applicant'})
+        if self.request.method in permissions.SAFE_METHODS:
+            # Honours ?fields= / ?omit= / ?expand=, so only requested relations are loaded.
+            return plan_queryset(queryset, self.get_serializer().fields.keys())
+        return plan_queryset(queryset, ALL_FIELDS)
+
     def get_permissions(self):
         if self.action in ['update', 'partial_update', 'my_applications']:
             return [permissions.IsAuthenticated(), IsApplicantOwner()]
-        if self.action in ['retrieve', 'claim', 'take_action']:
+        if self.action in ['retrieve', 'claim', 'take_action', 'documents_zip', 'documents_manifest']:
             return [permissions.IsAuthenticated(), IsRelatedToApplication()]
         # --- FIX: Add new permission scope for the university_applications action ---
         if self.action in ['workbench', 'all_applications', 'university_applications']:
@@ -95,6 +129,7 @@ class ApplicationViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
                         file=doc_data['file']
                     )
             
+            previous_status = application.status
             application.status = Application.StatusChoices.PENDING_REVIEW
             application.save(update_fields=['status'])
             
@@ -108,10 +143,15 @@ class ApplicationViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
                 actor=request.user, 
                 action="Application resubmitted after correction."
             )
+            record_event(application, 'application.resubmitted', actor=request.user)
+            record_event(
+                application, 'application.status_changed', actor=request.user,
+                previous=previous_status, status=application.status
+            )
         
         # Refresh instance from DB to get the complete, updated list of documents
         instance.refresh_from_db()
-        return Response(ApplicationDetailSerializer(instance).data)
+        return Response(ApplicationDetailSerializer(instance, context=self.get_serializer_context()).data)
         # --- FIX END ---
 
     @action(detail=False, methods=['get'], url_path='my')
@@ -165,15 +205,8 @@ class ApplicationViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
 
         logger.info("[WORKBENCH] User is expert for: %s", list(expert_universities.values_list('name', flat=True)))
         
-        # 1. Get tasks unclaimed for the expert's universities
-        unclaimed_q = models.Q(university__in=expert_universities, status=ApplicationTask.StatusChoices.UNCLAIMED)
-        # 2. Get tasks already assigned to this expert
-        assigned_q = models.Q(assigned_expert=user, status=ApplicationTask.StatusChoices.ASSIGNED)
-        
-        # Find all application IDs that match these task criteria AND are in PENDING_REVIEW status
-        application_ids = ApplicationTask.objects.filter(unclaimed_q | assigned_q).filter(
-            application__status=Application.StatusChoices.PENDING_REVIEW
-        ).values_list('application_id', flat=True).distinct()
+        # Applications in PENDING_REVIEW with a task the expert may claim or already holds
+        application_ids = workbench_application_ids(user, expert_universities)
         
         logger.info("[WORKBENCH] Found %d relevant application(s) in PENDING_REVIEW state.", len(application_ids))
 
@@ -221,6 +254,47 @@ class ApplicationViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
         return Response(serializer.data)
     # --- FIX END: NEW ACTION FOR UNIVERSITY-SCOPED APPLICATIONS ---
 
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """
+        Incremental sync for list screens. Returns the applications in `scope` that changed
+        after the `since` cursor, in change order, plus `tombstones`: tracking codes of
+        related applications that changed but left the scope (e.g. a claimed task left
+        another expert's workbench). Clients store `cursor` and pass it back as `since`.
+        The feed is ordered by (change_seq, id), as one change can move many applications.
+        """
+        scope = request.query_params.get('scope', 'my')
+        since = request.query_params.get('since', '0')
+        try:
+            cursor = parse_cursor(since)
+            limit = min(max(int(request.query_params.get('limit', self.CHANGES_PAGE_SIZE)), 1), self.CHANGES_MAX_PAGE_SIZE)
+        except ValueError:
+            return Response(
+                {"detail": "'since' must be a cursor from this endpoint and 'limit' an integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        visible = scoped_applications(request.user, scope)
+        if visible is None:
+            return Response({"detail": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
+
+        changed = list(
+            changed_after(related_applications(request.user), cursor)
+            .values_list('id', 'tracking_code', 'change_seq').distinct()[:limit + 1]
+        )
+        has_more = len(changed) > limit
+        changed = changed[:limit]
+
+        changed_ids = [application_id for application_id, _, _ in changed]
+        visible_ids = set(visible.filter(id__in=changed_ids).values_list('id', flat=True))
+        applications = self.get_queryset().filter(id__in=visible_ids).order_by('change_seq', 'id')
+        return Response({
+            "cursor": format_cursor(changed[-1][2], changed[-1][0]) if changed else since,
+            "has_more": has_more,
+            "results": self.get_serializer(applications, many=True).data,
+            "tombstones": [tracking_code for application_id, tracking_code, _ in changed if application_id not in visible_ids],
+        })
+
     @action(detail=False, methods=['get'], url_path='all', permission_classes=[IsHeadOfOrganization])
     def all_applications(self, request):
         all_apps = self.filter_queryset(self.get_queryset())
@@ -245,11 +319,12 @@ class ApplicationViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
     
     def _get_export_response(self, request, queryset):
         file_format = request.query_params.get('format', 'xlsx').lower()
-        if file_format == 'xlsx':
-            return generate_excel_response(queryset)
-        elif file_format == 'pdf':
-            return generate_pdf_response(queryset)
-        return Response({"detail": "Unsupported format. Choose 'xlsx' or 'pdf'."}, status=status.HTTP_400_BAD_REQUEST)
+        exporter = exports.get_exporter(file_format)
+        if exporter is None:
+            choices = ' or '.join(f"'{choice}'" for choice in exports.formats())
+            return Response({"detail": f"Unsupported format. Choose {choices}."}, status=status.HTTP_400_BAD_REQUEST)
+        with EXPORT_DURATION.time(format=file_format):
+            return exporter(queryset)
 
     @action(detail=False, methods=['get'], url_path='my/export')
     def export_my_applications(self, request):
@@ -261,6 +336,85 @@ class ApplicationViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
         queryset = self.filter_queryset(self.get_queryset())
         return self._get_export_response(request, queryset)
 
+    # --- Document bundles ---
+    def _bundle_response(self, request, entries, filename):
+        """
+        Streams a ZIP of `entries`. A client whose download broke off can pass
+        `start=<index>` to skip entries it already has, with `version=<manifest version>`
+        to make sure the bundle has not changed in between.
+        """
+        manifest = build_manifest(entries)
+        try:
+            start = max(int(request.query_params.get('start', 0)), 0)
+        except ValueError:
+            return Response({"detail": "'start' must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        version = request.query_params.get('version')
+        if version and version != manifest['version']:
+            return Response(
+                {"detail": "The bundle has changed; fetch the manifest again.", "version": manifest['version']},
+                status=status.HTTP_412_PRECONDITION_FAILED,
+            )
+        response = StreamingHttpResponse(stream_zip(entries, manifest, start), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['ETag'] = f'"{manifest["version"]}"'
+        return response
+
+    @action(detail=True, methods=['get'], url_path='documents.zip')
+    def documents_zip(self, request, tracking_code=None):
+        application = self.get_object()
+        return self._bundle_response(request, bundle_entries([application]), f"{application.tracking_code}.zip")
+
+    @action(detail=True, methods=['get'], url_path='documents/manifest')
+    def documents_manifest(self, request, tracking_code=None):
+        return Response(build_manifest(bundle_entries([self.get_object()])))
+
+    def _bundle_applications(self, request):
+        """
+        Applications of one university for the batch bundle, or an error Response.
+        Filters: `university` (required), optional `tracking_codes` (comma-separated) and `status`.
+        """
+        try:
+            university_id = int(request.query_params.get('university', ''))
+        except ValueError:
+            return Response({"detail": "'university' must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        university = get_object_or_404(University, pk=university_id)
+        user = request.user
+        if not (
+            user.roles.filter(name='HeadOfOrganization').exists()
+            or (user.roles.filter(name__in=['UniversityExpert', 'Recruitment Institution']).exists()
+                and user.universities.filter(pk=university.pk).exists())
+        ):
+            return Response({"detail": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
+
+        queryset = Application.objects.filter(university_choices__university=university).distinct()
+        if request.query_params.get('tracking_codes'):
+            queryset = queryset.filter(tracking_code__in=request.query_params['tracking_codes'].split(','))
+        if request.query_params.get('status'):
+            queryset = queryset.filter(status=request.query_params['status'])
+        limit = self.BUNDLE_MAX_APPLICATIONS
+        applications = list(queryset.prefetch_related('documents', 'academic_histories').order_by('id')[:limit + 1])
+        if len(applications) > limit:
+            return Response(
+                {"detail": f"At most {limit} applications can be bundled at once; narrow the selection."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return applications
+
+    @action(detail=False, methods=['get'], url_path='documents-bundle.zip')
+    def documents_bundle(self, request):
+        applications = self._bundle_applications(request)
+        if isinstance(applications, Response):
+            return applications
+        entries = bundle_entries(applications, per_application_folder=True)
+        return self._bundle_response(request, entries, f"university-{request.query_params['university']}-documents.zip")
+
+    @action(detail=False, methods=['get'], url_path='documents-bundle/manifest')
+    def documents_bundle_manifest(self, request):
+        applications = self._bundle_applications(request)
+        if isinstance(applications, Response):
+            return applications
+        return Response(build_manifest(bundle_entries(applications, per_application_folder=True)))
+
     @action(detail=True, methods=['post'], url_path='claim/(?P<university_pk>[^/.]+)')
     def claim(self, request, tracking_code=None, university_pk=None):
         application, user = self.get_object(), request.user
@@ -271,11 +425,13 @@ class ApplicationViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
         
         task = get_object_or_404(ApplicationTask, application=application, university=university, status=ApplicationTask.StatusChoices.UNCLAIMED)
         
-        task.assigned_expert = user
-        task.status = ApplicationTask.StatusChoices.ASSIGNED
-        task.save()
-        
-        ApplicationLog.objects.create(application=application, actor=user, action=f"Task for {university.name} claimed.")
+        with transaction.atomic():
+            task.assigned_expert = user
+            task.status = ApplicationTask.StatusChoices.ASSIGNED
+            task.save()
+
+            ApplicationLog.objects.create(application=application, actor=user, action=f"Task for {university.name} claimed.")
+            record_event(application, 'task.claimed', actor=user, task_id=task.id, university_id=university.id)
         return Response({"status": "Task successfully claimed."}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'], url_path='action/(?P<university_pk>[^/.]+)', permission_classes=[permissions.IsAuthenticated, IsRelatedToApplication, IsAssignedExpert])
@@ -292,12 +448,17 @@ class ApplicationViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
         
         if action_type == 'CORRECT':
             with transaction.atomic():
+                previous_status = application.status
                 application.status = Application.StatusChoices.PENDING_CORRECTION
                 application.save(update_fields=['status'])
                 ApplicationLog.objects.create(
                     application=application, actor=user, 
                     action="Application requires correction.", comment=comment
                 )
+                record_event(
+                    application, 'application.status_changed', actor=user,
+                    previous=previous_status, status=application.status, comment=comment
+                )
             return Response({"status": "Application sent for correction."}, status=status.HTTP_200_OK)
 
         with transaction.atomic():
@@ -311,6 +472,10 @@ class ApplicationViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
             task.status = ApplicationTask.StatusChoices.COMPLETED
             task.save()
             ApplicationLog.objects.create(application=application, actor=user, action=log_action, comment=comment)
+            record_event(
+                application, 'task.completed', actor=user,
+                task_id=task.id, university_id=university.id, decision=task.decision
+            )
 
         return Response({"status": f"Decision '{action_type}' recorded successfully."}, status=status.HTTP_200_OK)
 
@@ -343,21 +508,76 @@ class TaskViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
                 application=task.application, actor=request.user,
                 action=f"Task for {task.university.name} reassigned from {old_expert_email} to {new_expert.email} by admin."
             )
+            record_event(
+                task.application, 'task.reassigned', actor=request.user,
+                task_id=task.id, university_id=task.university_id, expert_id=new_expert.id
+            )
         return Response({"status": "Task successfully reassigned."}, status=status.HTTP_200_OK)
 
-class InternalNoteViewSet(viewsets.ModelViewSet):
-    """ViewSet for managing internal notes on an application."""
+class ApplicationImportViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                               mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Bulk submission for recruitment institutions: a CSV/XLSX of applicants plus a ZIP
+    of their documents. The import runs in the background; poll it for the result.
+    """
+    serializer_class = ApplicationImportSerializer
+    permission_classes = [permissions.IsAuthenticated, IsRecruitmentInstitution]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def get_queryset(self):
+        return ApplicationImport.objects.filter(submitted_by=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            job = serializer.save(submitted_by=request.user)
+            transaction.on_commit(lambda: run_application_import.delay(job.pk))
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class ApplicationChildMixin:
+    """
+    For viewsets nested under `applications/{tracking_code}/`: resolves the parent
+    application once and applies the IsRelatedToApplication rule to it.
+    """
+    def get_application(self):
+        if not hasattr(self, '_application'):
+            application = get_object_or_404(Application, tracking_code=self.kwargs.get('application_tracking_code'))
+            rule = IsRelatedToApplication()
+            if not rule.has_object_permission(self.request, self, application):
+                self.permission_denied(self.request, message=rule.message)
+            self._application = application
+        return self._application
+
+
+class ApplicationLogViewSet(ApplicationChildMixin, viewsets.ReadOnlyModelViewSet):
+    """The full history of an application, newest first, in cursor pages."""
+    serializer_class = ApplicationLogSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimelineCursorPagination
+
+    def get_queryset(self):
+        return with_user_details(self.get_application().logs.all(), 'actor')
+
+
+class InternalNoteViewSet(ApplicationChildMixin, viewsets.ModelViewSet):
+    """
+    ViewSet for managing internal notes on an application, listed newest first in cursor pages.
+    Staff-only: the user needs the `view_internal_notes` permission, and only a note's
+    author (or is_staff) may change or delete it.
+    """
     queryset = InternalNote.objects.all()
     serializer_class = InternalNoteSerializer
-    permission_classes = [permissions.IsAuthenticated, IsRelatedToApplication]
+    permission_classes = [permissions.IsAuthenticated, HasPermission, IsNoteAuthorOrStaff]
+    pagination_class = TimelineCursorPagination
     required_permission = 'view_internal_notes'
 
     def get_queryset(self):
-        application_tracking_code = self.kwargs.get('application_tracking_code')
-        return InternalNote.objects.filter(application__tracking_code=application_tracking_code)
+        return with_user_details(self.get_application().internal_notes.all(), 'author')
     
     def perform_create(self, serializer):
-        application_tracking_code = self.kwargs.get('application_tracking_code')
-        application = get_object_or_404(Application, tracking_code=application_tracking_code)
-        serializer.save(author=self.request.user, application=application)
-# end of apps/applications/views.py
\ No newline at end of file
+        application = self.get_application()
+        with transaction.atomic():
+            serializer.save(author=self.request.user, application=application)
+            mark_changed(application)
@@ -1,6 +1,10 @@
 # apps/core/admin.py
+import json
+
 from django.contrib import admin
-from .models import University, Program
+from django.utils.html import format_html
+
+from .models import University, Program, SlowQuery, QueryPlan
 
 class ProgramInline(admin.TabularInline):
     """
@@ -29,4 +33,48 @@ class ProgramAdmin(admin.ModelAdmin):
     list_display = ('name', 'university')
     list_filter = ('university',)
     search_fields = ('name', 'university__name')
-    autocomplete_fields = ('university',) # Improves UI for selecting a university
\ No newline at end of file
+    autocomplete_fields = ('university',) # Improves UI for selecting a university
+
+class QueryPlanInline(admin.StackedInline):
+    model = QueryPlan
+    fields = ('captured_at', 'vendor', 'duration_ms', 'execution_ms', 'formatted_plan')
+    readonly_fields = fields
+    can_delete = False
+    extra = 0
+    max_num = 0
+
+    @admin.display(description='Plan')
+    def formatted_plan(self, obj):
+        return format_html('<pre style="white-space: pre-wrap">{}</pre>', json.dumps(obj.plan, indent=2))
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """
+    Slow statements grouped by fingerprint, most total time first: the statements
+    whose optimisation saves the most database time are at the top.
+    """
+    list_display = ('short_fingerprint', 'short_statement', 'calls', 'total_ms', 'mean', 'max_ms', 'last_route', 'last_seen')
+    list_filter = ('last_route',)
+    search_fields = ('statement', 'fingerprint', 'last_route')
+    ordering = ('-total_ms',)
+    fields = ('fingerprint', 'statement', 'calls', 'total_ms', 'max_ms', 'last_route', 'first_seen', 'last_seen')
+    readonly_fields = fields
+    inlines = [QueryPlanInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='Fingerprint')
+    def short_fingerprint(self, obj):
+        return obj.fingerprint[:12]
+
+    @admin.display(description='Statement')
+    def short_statement(self, obj):
+        return obj.statement if len(obj.statement) <= 120 else f'{obj.statement[:119]}…'
+
+    @admin.display(description='Mean (ms)')
+    def mean(self, obj):
+        return f'{obj.mean_ms:.1f}'
@@ -0,0 +1,101 @@
+# apps/core/admin_paging.py
+"""
+Paging for admin pages over large tables.
+
+EstimatedCountMixin gives a changelist the planner's row estimate (pg_class.reltuples)
+instead of an exact COUNT(*) when the list is unfiltered and the table holds more than
+ADMIN_ESTIMATED_COUNT_THRESHOLD rows. Filtered lists are still counted exactly. The
+estimate is refreshed by (auto)vacuum/analyze, so the last page links can be a little off.
+
+PaginatedInline shows a growing related list (logs, messages) read-only, ADMIN_INLINE_PER_PAGE
+rows at a time, instead of rendering every row into the change form.
+"""
+from django.conf import settings
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
+
+
+def estimated_count(queryset):
+    """The planner's estimate of the rows in `queryset`'s table on PostgreSQL, or None."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            [connection.ops.quote_name(queryset.model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # -1 (PostgreSQL 14+) or 0 until the table has been analyzed.
+    return int(row[0]) if row and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where and not query.is_sliced:
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate > settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class EstimatedCountMixin:
+    """For ModelAdmins of large tables."""
+    paginator = EstimatedCountPaginator
+    # Filtered pages would otherwise count the whole table again for "N total".
+    show_full_result_count = False
+
+
+# --- Inlines ---
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    per_page = 20
+    page_parameter = 'page'
+    page_number = 1
+
+    def get_queryset(self):
+        if not hasattr(self, 'page'):
+            self.page = Paginator(super().get_queryset(), self.per_page).get_page(self.page_number)
+        return self.page.object_list
+
+
+class PaginatedInline(admin.TabularInline):
+    """
+    A read-only tabular inline showing one page of related rows; `?<prefix>-page=N`
+    selects the page. `list_select_related` is applied to the rows' queryset.
+    """
+    formset = PaginatedInlineFormSet
+    template = 'admin/edit_inline/paginated_tabular.html'
+    list_select_related = ()
+    can_delete = False
+    extra = 0
+
+    @property
+    def per_page(self):
+        return settings.ADMIN_INLINE_PER_PAGE
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(*self.list_select_related)
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        page_parameter = f'{formset.get_default_prefix()}-page'
+        return type(formset.__name__, (formset,), {
+            'per_page': self.per_page,
+            'page_parameter': page_parameter,
+            'page_number': request.GET.get(page_parameter, 1),
+        })
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
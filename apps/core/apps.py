@@ -5,4 +5,8 @@ from django.utils.translation import gettext_lazy as _
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
-    verbose_name = _('Core Application Data')
\ No newline at end of file
+    verbose_name = _('Core Application Data')
+
+    def ready(self):
+        """Registers the signal handlers that feed the event stream and the task metrics."""
+        import apps.core.signals  # noqa: F401
@@ -0,0 +1,196 @@
+# apps/core/benchmarks.py
+"""
+Latency and query budgets for the hot API endpoints. The `benchmark_endpoints` command
+runs them against a generated dataset and compares the results with the committed
+baseline; the test suite checks the query counts on every run. The committed baseline
+only holds query counts: latencies are only worth keeping when recorded on the
+production database engine.
+"""
+import json
+import math
+import time
+from collections import namedtuple
+from datetime import date
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db.models import Count, Exists, OuterRef
+from rest_framework.test import APIClient
+
+from .instrumentation import QueryRecorder, record_queries
+
+BASELINE_PATH = Path(__file__).with_name('benchmark_baseline.json')
+BENCHMARK_SEED = 4242
+BENCHMARK_END_DATE = date(2025, 6, 30)
+
+# Below this many milliseconds, a slower p95 is treated as noise rather than a regression.
+LATENCY_FLOOR_MS = 5.0
+LATENCY_FIELDS = ('sql_ms', 'p50_ms', 'p95_ms')
+
+Endpoint = namedtuple('Endpoint', ['role', 'name', 'path'])
+
+ENDPOINTS = [
+    Endpoint('applicant', 'my', '/api/v1/applications/my/'),
+    Endpoint('applicant', 'detail', '/api/v1/applications/{tracking_code}/'),
+    Endpoint('applicant', 'dashboard-stats', '/api/v1/choices/dashboard-stats/'),
+    Endpoint('applicant', 'tickets', '/api/v1/support/tickets/'),
+    Endpoint('applicant', 'ticket-detail', '/api/v1/support/tickets/{ticket_id}/'),
+    Endpoint('expert', 'workbench', '/api/v1/applications/workbench/'),
+    Endpoint('expert', 'university-apps', '/api/v1/applications/university-apps/'),
+    Endpoint('expert', 'detail', '/api/v1/applications/{tracking_code}/'),
+    Endpoint('expert', 'dashboard-stats', '/api/v1/choices/dashboard-stats/'),
+    Endpoint('institution', 'my-submitted', '/api/v1/applications/my-submitted/'),
+    Endpoint('institution', 'dashboard-stats', '/api/v1/choices/dashboard-stats/'),
+    Endpoint('head', 'all', '/api/v1/applications/all/'),
+    Endpoint('head', 'staff-all', '/api/v1/applications/staff-all/'),
+    Endpoint('head', 'dashboard-stats', '/api/v1/choices/dashboard-stats/'),
+    Endpoint('head', 'reports-summary', '/api/v1/choices/reports/summary/?start_date=2024-07-01&end_date=2025-06-30'),
+    Endpoint('head', 'export-xlsx', '/api/v1/applications/all/export/'),
+    Endpoint('support', 'tickets', '/api/v1/support/tickets/'),
+]
+
+
+# --- Dataset ---
+def seed_dataset(applications=300, seed=BENCHMARK_SEED):
+    """
+    Generates the benchmark dataset and returns {role: (user, path parameters)}.
+    Each actor is the busiest user of their role, so list endpoints have full pages.
+    """
+    from apps.applications.models import Application
+    from apps.support.models import SupportTicket
+    from apps.users.models import Permission, Role, User
+
+    call_command(
+        'generate_load_data', applications=applications, experts=5, institutions=2, support_staff=2,
+        tickets=applications, seed=seed, end_date=BENCHMARK_END_DATE, stdout=StringIO(),
+    )
+    domain = f'load{seed}.loadtest.example'
+    head = User.objects.create_user(email=f'head@{domain}', password=None, full_name='Head', is_staff=True)
+    head_role, _ = Role.objects.get_or_create(name='HeadOfOrganization')
+    head_role.permissions.add(Permission.objects.get_or_create(
+        codename='view_reports', defaults={'name': 'Can view reports', 'group': 'reports'}
+    )[0])
+    head.roles.add(head_role)
+
+    def busiest(role, relation, *conditions):
+        return (User.objects.filter(*conditions, roles__name=role, email__endswith=f'@{domain}')
+                .annotate(load=Count(relation)).order_by('-load', 'pk').first())
+
+    # Detail pages are measured on a fully populated application, so every relation is loaded.
+    rich = Application.objects.filter(
+        application_type=Application.ApplicationType.NEW_ADMISSION,
+        internal_notes__isnull=False, tasks__assigned_expert__isnull=False,
+    ).exclude(status=Application.StatusChoices.PENDING_REVIEW)
+    applicant = busiest(
+        'Applicant', 'applications',
+        Exists(SupportTicket.objects.filter(user=OuterRef('pk'))), Exists(rich.filter(applicant=OuterRef('pk'))),
+    )
+    expert = busiest('UniversityExpert', 'tasks', Exists(rich.filter(tasks__assigned_expert=OuterRef('pk'))))
+    institution = busiest('Recruitment Institution', 'submitted_applications')
+    support = User.objects.filter(roles__name='SupportStaff', email__endswith=f'@{domain}').order_by('pk').first()
+    application = rich.filter(applicant=applicant).order_by('pk').first()
+    expert_application = rich.filter(tasks__assigned_expert=expert).order_by('pk').first()
+    ticket = SupportTicket.objects.filter(user=applicant).order_by('pk').first()
+
+    return {
+        'applicant': (applicant, {'tracking_code': application.tracking_code, 'ticket_id': ticket.ticket_id}),
+        'expert': (expert, {'tracking_code': expert_application.tracking_code}),
+        'institution': (institution, {}),
+        'head': (head, {}),
+        'support': (support, {}),
+    }
+
+
+# --- Measuring ---
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _request(client, path):
+    response = client.get(path)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    else:
+        response.content
+    return response
+
+
+def measure(actors, iterations=20, warmup=1, endpoints=ENDPOINTS):
+    """
+    Requests every endpoint as its role through the test client and returns
+    {"role:name": {status, queries, sql_ms, p50_ms, p95_ms}}. `queries` is the most
+    any iteration issued, so a query that only sometimes runs is still counted.
+    """
+    results = {}
+    for endpoint in endpoints:
+        user, parameters = actors[endpoint.role]
+        client = APIClient()
+        client.force_authenticate(user)
+        path = endpoint.path.format(**parameters)
+
+        for _ in range(warmup):
+            _request(client, path)
+        latencies, sql_times, query_counts, status = [], [], [], None
+        for _ in range(iterations):
+            with record_queries(QueryRecorder()) as recorder:
+                started = time.perf_counter()
+                response = _request(client, path)
+                latencies.append((time.perf_counter() - started) * 1000)
+            status = response.status_code
+            query_counts.append(recorder.count)
+            sql_times.append(recorder.duration * 1000)
+
+        results[f'{endpoint.role}:{endpoint.name}'] = {
+            'status': status,
+            'queries': max(query_counts),
+            'sql_ms': round(percentile(sql_times, 0.5), 2),
+            'p50_ms': round(percentile(latencies, 0.5), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+        }
+    return results
+
+
+# --- Baseline ---
+def load_baseline(path=BASELINE_PATH):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def save_baseline(results, path=BASELINE_PATH, with_latency=False, **meta):
+    """Writes the results as the baseline; latencies are left out unless `with_latency`."""
+    if not with_latency:
+        results = {
+            key: {field: value for field, value in result.items() if field not in LATENCY_FIELDS}
+            for key, result in results.items()
+        }
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump({'meta': meta, 'endpoints': results}, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+
+
+def compare(results, baseline, latency_tolerance=0.5, query_tolerance=0, check_latency=True):
+    """
+    Returns a message for every endpoint that got worse than the baseline: a failing
+    status, more queries than allowed, or a p95 more than `latency_tolerance` slower
+    (only against a baseline that recorded latencies).
+    """
+    regressions = []
+    expected = baseline.get('endpoints', {})
+    for key, result in sorted(results.items()):
+        if result['status'] >= 400:
+            regressions.append(f"{key}: responded with HTTP {result['status']}")
+        budget = expected.get(key)
+        if budget is None:
+            continue
+        if result['queries'] > budget['queries'] + query_tolerance:
+            regressions.append(f"{key}: {result['queries']} queries, budget is {budget['queries']}")
+        if not check_latency or 'p95_ms' not in budget:
+            continue
+        limit = budget['p95_ms'] * (1 + latency_tolerance)
+        if result['p95_ms'] > limit and result['p95_ms'] - budget['p95_ms'] > LATENCY_FLOOR_MS:
+            regressions.append(f"{key}: p95 {result['p95_ms']:.1f} ms, baseline {budget['p95_ms']:.1f} ms")
+    return regressions
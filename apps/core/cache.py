@@ -0,0 +1,36 @@
+# apps/core/cache.py
+from django.core.cache.backends.locmem import LocMemCache as BaseLocMemCache
+from django.core.cache.backends.redis import RedisCache as BaseRedisCache
+
+from .metrics import CACHE_REQUESTS
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    """Counts hits and misses of `get` and `get_many` (and so of `get_or_set`) for /metrics."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            CACHE_REQUESTS.inc(result='miss')
+            return default
+        CACHE_REQUESTS.inc(result='hit')
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        if found:
+            CACHE_REQUESTS.inc(len(found), result='hit')
+        if len(keys) > len(found):
+            CACHE_REQUESTS.inc(len(keys) - len(found), result='miss')
+        return found
+
+
+class LocMemCache(InstrumentedCacheMixin, BaseLocMemCache):
+    pass
+
+
+class RedisCache(InstrumentedCacheMixin, BaseRedisCache):
+    pass
@@ -0,0 +1,178 @@
+# apps/core/downloads.py
+import base64
+import mimetypes
+import os
+import posixpath
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .images import VARIANTS
+from .profiling import PROFILES_DIR
+
+SIGNING_SALT = 'apps.core.downloads'
+
+
+# --- Signed URLs ---
+def _signature(name, expires):
+    digest = salted_hmac(SIGNING_SALT, f"{name}:{expires}", algorithm='sha256').digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+def sign(name, now=None):
+    """
+    Returns (expires, signature) for a media file name. Expiry is rounded up to the
+    next TTL boundary, so a file's URL stays the same for a while and browsers can cache it.
+    """
+    ttl = settings.SIGNED_URL_TTL_SECONDS
+    now = int(now if now is not None else time.time())
+    expires = (now // ttl + 2) * ttl
+    return expires, _signature(name, expires)
+
+
+def verify(name, expires, signature, now=None):
+    """Checks a signed URL using only SECRET_KEY: no database access."""
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < (now if now is not None else time.time()):
+        return False
+    return constant_time_compare(_signature(name, expires), signature or '')
+
+
+# --- Access rules ---
+def _variant_lookup(name):
+    return Q(*[Q(**{f'image_variants__variants__{variant}': name}) for variant in VARIANTS], _connector=Q.OR)
+
+
+def _can_access_applications(user, applications):
+    from apps.applications.permissions import IsRelatedToApplication
+
+    rule = IsRelatedToApplication()
+    return any(rule.has_object_permission(_RequestStub(user), None, application) for application in applications)
+
+
+def _can_access_document(user, name):
+    from apps.applications.models import ApplicationDocument
+
+    documents = ApplicationDocument.objects.filter(Q(file=name) | _variant_lookup(name)).select_related('application')
+    return _can_access_applications(user, [document.application for document in documents])
+
+
+def _can_access_certificate(user, name):
+    from apps.applications.models import AcademicHistory
+
+    histories = AcademicHistory.objects.filter(certificate_file=name).select_related('application')
+    return _can_access_applications(user, [history.application for history in histories])
+
+
+def _can_access_attachment(user, name):
+    from apps.support.models import TicketMessage
+    from apps.support.views import visible_tickets
+
+    ticket_ids = TicketMessage.objects.filter(attachment=name).values('ticket_id')
+    return visible_tickets(user).filter(pk__in=ticket_ids).exists()
+
+
+def _can_access_avatar(user, name):
+    from apps.users.models import User
+
+    return User.objects.filter(Q(profile_picture=name) | _variant_lookup(name)).exists()
+
+
+def _can_access_registration(user, name):
+    from apps.users.models import InstitutionProfile
+
+    registrations = InstitutionProfile.objects.filter(registration_document=name)
+    if not (user.is_superuser or user.roles.filter(name='HeadOfOrganization').exists()):
+        registrations = registrations.filter(user=user)
+    return registrations.exists()
+
+
+def _can_access_upload(user, name):
+    """
+    Resumable uploads keep their stored name once attached: the owner can always fetch
+    the file, anyone else only through the record it was attached to.
+    """
+    from apps.uploads.models import ChunkedUpload
+
+    upload = ChunkedUpload.objects.filter(file=name).first()
+    if upload is None:
+        return False
+    if upload.owner_id == user.pk:
+        return True
+    return upload.status == ChunkedUpload.StatusChoices.ATTACHED and (
+        _can_access_document(user, name) or _can_access_certificate(user, name) or _can_access_attachment(user, name)
+    )
+
+
+# Media directory -> the rule of the one model that stores files there.
+ACCESS_RULES = {
+    PROFILES_DIR: lambda user, name: user.is_staff,
+    'application_docs/': _can_access_document,
+    'academic_certs/': _can_access_certificate,
+    'ticket_attachments/': _can_access_attachment,
+    'profile_pics/': _can_access_avatar,
+    'institution_registrations/': _can_access_registration,
+    'uploads/': _can_access_upload,
+}
+
+
+def can_access(user, name):
+    """
+    Applies the API's permission rules to a media file. The directory a file lives in
+    says which model references it: application files follow IsRelatedToApplication,
+    ticket attachments follow ticket visibility, avatars are visible to every signed-in
+    user and request profiles to staff. Names that are not normalised are refused.
+    """
+    if not (user and user.is_authenticated):
+        return False
+    if posixpath.normpath(name) != name or name.startswith(('/', '../')):
+        return False
+    for prefix, rule in ACCESS_RULES.items():
+        if name.startswith(prefix):
+            return rule(user, name)
+    return False
+
+
+class _RequestStub:
+    """The permission classes only read `request.user`."""
+
+    def __init__(self, user):
+        self.user = user
+
+
+# --- Responses ---
+def serve(name, as_attachment=False):
+    """
+    Hands the transfer of a media file to the front web server when one is configured
+    (PROTECTED_MEDIA_SERVER = 'nginx' or 'sendfile'), or streams it from Django otherwise.
+    """
+    filename = os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    disposition = f"{'attachment' if as_attachment else 'inline'}; filename*=UTF-8''{quote(filename)}"
+    server = settings.PROTECTED_MEDIA_SERVER
+
+    if server in ('nginx', 'sendfile'):
+        if not default_storage.exists(name):
+            return HttpResponse(status=404)
+        response = HttpResponse(content_type=content_type)
+        if server == 'nginx':
+            # nginx serves this `internal` location itself and drops the header.
+            response['X-Accel-Redirect'] = quote(f"{settings.PROTECTED_MEDIA_INTERNAL_URL}{name}")
+        else:
+            response['X-Sendfile'] = default_storage.path(name)
+    else:
+        try:
+            response = FileResponse(default_storage.open(name, 'rb'), content_type=content_type)
+        except FileNotFoundError:
+            return HttpResponse(status=404)
+    response['Content-Disposition'] = disposition
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
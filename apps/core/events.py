@@ -0,0 +1,223 @@
+# apps/core/events.py
+import asyncio
+import itertools
+import json
+import logging
+import threading
+from collections import OrderedDict, defaultdict, deque
+from functools import lru_cache
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+# --- Brokers ---
+class InMemoryBroker:
+    """
+    Delivers published events to the handlers registered in this process.
+    This is the default broker and the one used by the test-suite.
+    """
+
+    def __init__(self):
+        self._handlers = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def next_id(self):
+        with self._lock:
+            return next(self._ids)
+
+    def publish(self, message):
+        self._deliver(message)
+
+    def subscribe(self, handler):
+        self._handlers.append(handler)
+
+    def _deliver(self, message):
+        for handler in list(self._handlers):
+            try:
+                handler(message)
+            except Exception:
+                logger.exception("[EVENTS] Handler %r failed for event %s", handler, message.get('id'))
+
+
+class RedisBroker(InMemoryBroker):
+    """
+    Fans events out to every worker process through a Redis pub/sub channel.
+    Event ids come from a shared Redis counter so they stay monotonic across workers,
+    which keeps Last-Event-ID resume meaningful no matter which worker a client reconnects to.
+    """
+
+    def __init__(self, url, channel='event-stream'):
+        super().__init__()
+        import redis  # Only needed when the fan-out is enabled.
+        self._client = redis.Redis.from_url(url)
+        self._channel = channel
+        self._listener = None
+
+    def next_id(self):
+        return int(self._client.incr(f"{self._channel}:last-id"))
+
+    def publish(self, message):
+        self._client.publish(self._channel, json.dumps(message))
+
+    def subscribe(self, handler):
+        super().subscribe(handler)
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='event-stream-redis', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._channel)
+        for item in pubsub.listen():
+            try:
+                message = json.loads(item['data'])
+            except (TypeError, ValueError):
+                logger.warning("[EVENTS] Dropping malformed message on %s", self._channel)
+                continue
+            self._deliver(message)
+
+
+# --- Broadcaster ---
+class Subscription:
+    """A single connected client, fed from broker threads and drained on its event loop."""
+
+    def __init__(self, user_id, loop, max_queue_size):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue_size)
+        self.overflowed = False
+
+    def deliver(self, message):
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # The client is not keeping up; it will reconnect and resume from its Last-Event-ID.
+            self.overflowed = True
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class _UserHistory:
+    """The latest events of one user, and the id of the newest one dropped to make room."""
+
+    def __init__(self, size):
+        self.messages = deque(maxlen=size)
+        self.evicted = 0
+
+    def append(self, message):
+        if len(self.messages) == self.messages.maxlen:
+            self.evicted = self.messages[0]['id']
+        self.messages.append(message)
+
+
+class EventBroadcaster:
+    """
+    Routes events published for a user to that user's open streams.
+    A bounded per-user history allows reconnecting clients to resume from Last-Event-ID.
+    Histories are kept for the `history_users` users who received events most recently;
+    older ones are dropped, and clients resuming from before what is still known
+    (or from before this process started) are asked to resync instead.
+    """
+
+    def __init__(self, broker, history_size=100, max_queue_size=1000, history_users=10000):
+        self.broker = broker
+        self.history_size = history_size
+        self.history_users = history_users
+        self.max_queue_size = max_queue_size
+        self._subscriptions = defaultdict(set)
+        self._histories = OrderedDict()  # user id -> _UserHistory, least recently used first
+        # Every event with an id above `_floor` (up to `_last_id`) is still in the histories.
+        # Both stay None until this process has seen an event.
+        self._floor = None
+        self._last_id = None
+        self._lock = threading.Lock()
+        broker.subscribe(self._dispatch)
+
+    def publish(self, user_ids, event, data):
+        """Publishes an event to every user in `user_ids`. Safe to call from sync code."""
+        for user_id in set(user_ids):
+            if user_id is None:
+                continue
+            self.broker.publish({
+                'id': self.broker.next_id(),
+                'user': user_id,
+                'event': event,
+                'data': data,
+            })
+
+    def subscribe(self, user_id, last_event_id=None, loop=None):
+        """
+        Registers a stream for `user_id` and returns it together with the events
+        the client missed since `last_event_id`. `backlog` is None when the history
+        no longer reaches back that far, or never did because this process started
+        later, and the client has to resync from the REST API.
+        """
+        subscription = Subscription(user_id, loop or asyncio.get_running_loop(), self.max_queue_size)
+        with self._lock:
+            history = self._histories.get(user_id)
+            messages = list(history.messages) if history else []
+            known_since = max(self._floor, history.evicted if history else 0) if self._floor is not None else None
+            last_id = self._last_id
+            self._subscriptions[user_id].add(subscription)
+
+        backlog = []
+        if last_event_id is not None:
+            if known_since is None or not known_since <= last_event_id <= last_id:
+                backlog = None
+            else:
+                backlog = [message for message in messages if message['id'] > last_event_id]
+        return subscription, backlog
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def _dispatch(self, message):
+        user_id = message['user']
+        with self._lock:
+            if self._floor is None:
+                self._floor = message['id'] - 1
+            self._last_id = max(self._last_id or 0, message['id'])
+            history = self._histories.pop(user_id, None) or _UserHistory(self.history_size)
+            history.append(message)
+            self._histories[user_id] = history
+            while len(self._histories) > self.history_users:
+                _, dropped = self._histories.popitem(last=False)
+                self._floor = max(self._floor, dropped.messages[-1]['id'])
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(message)
+
+
+@lru_cache(maxsize=None)
+def get_broadcaster():
+    """Returns the process-wide broadcaster, built from the EVENT_STREAM_* settings."""
+    redis_url = getattr(settings, 'EVENT_STREAM_REDIS_URL', None)
+    broker = RedisBroker(redis_url) if redis_url else InMemoryBroker()
+    return EventBroadcaster(
+        broker,
+        history_size=getattr(settings, 'EVENT_STREAM_HISTORY_SIZE', 100),
+        history_users=getattr(settings, 'EVENT_STREAM_HISTORY_USERS', 10000),
+        max_queue_size=getattr(settings, 'EVENT_STREAM_MAX_QUEUE_SIZE', 1000),
+    )
+
+
+def publish_event(user_ids, event, data):
+    """Convenience wrapper used by signal handlers and services."""
+    try:
+        get_broadcaster().publish(user_ids, event, data)
+    except Exception:
+        # Streaming is best-effort; it must never break the request that produced the change.
+        logger.exception("[EVENTS] Failed to publish '%s' event", event)
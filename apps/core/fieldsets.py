@@ -0,0 +1,42 @@
+# apps/core/fieldsets.py
+from rest_framework import serializers
+
+
+def query_list(request, name):
+    """Comma-separated query parameter as a set, e.g. `?fields=a,b` -> {'a', 'b'}."""
+    value = request.query_params.get(name) if request is not None else None
+    return {item.strip() for item in value.split(',') if item.strip()} if value else set()
+
+
+class SparseFieldsetMixin:
+    """
+    Lets clients shape a read serializer's output with query parameters:
+
+        ?fields=a,b   only these fields, plus any expanded ones (naming an expandable field expands it)
+        ?omit=a,b     everything except these fields
+        ?expand=x,y   add optional relations declared in `expandable_fields`
+
+    `expandable_fields` maps a field name to (serializer class, kwargs). Only the
+    top-level serializer of a response reads the parameters; nested ones render in full.
+    """
+    expandable_fields = {}
+
+    def _is_root(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or not self._is_root():
+            return fields
+
+        only, omit, expand = query_list(request, 'fields'), query_list(request, 'omit'), query_list(request, 'expand')
+        for name, (serializer_class, kwargs) in self.expandable_fields.items():
+            if name in expand or name in only:
+                fields[name] = serializer_class(read_only=True, **kwargs)
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only or name in expand}
+        for name in omit:
+            fields.pop(name, None)
+        return fields
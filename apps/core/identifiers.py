@@ -0,0 +1,161 @@
+# apps/core/identifiers.py
+"""
+Sequence-backed public identifiers: application tracking codes (ISA-2026-0001ZK) and
+support ticket IDs (SPT-26-001ZK). Each kind has one counter per year, encoded in
+Crockford base32 with a check character, so codes never collide and a mistyped code
+is recognised without a database lookup.
+
+Codes issued before the allocator (five hex characters, or SPT-ABC-123) keep working:
+the new formats have different group lengths and can never equal one of them.
+"""
+import os
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Sequence
+from .sequences import next_value
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_VALUES = {character: index for index, character in enumerate(ALPHABET)}
+# Crockford's decoding rules: lowercase is accepted, and easily confused letters map to digits.
+_NORMALIZE = str.maketrans('ILOilo', '110110')
+_SYMBOLS = '[0-9A-HJKMNP-TV-Z]'
+
+# kind: (template, minimum data characters, parser of issued codes)
+FORMATS = {
+    'tracking_code': ('ISA-{year}-{code}', 5, re.compile(rf'^ISA-(\d{{4}})-({_SYMBOLS}{{6,}})$')),
+    'ticket_id': ('SPT-{short_year:02d}-{code}', 4, re.compile(rf'^SPT-(\d{{2}})-({_SYMBOLS}{{5,}})$')),
+}
+
+
+# --- Encoding ---
+def check_character(data):
+    """Luhn mod 32 over the base32 digits: catches any single wrong character and swapped neighbours."""
+    total, factor = 0, 2
+    for character in reversed(data):
+        addend = factor * _VALUES[character]
+        total += addend // 32 + addend % 32
+        factor = 3 - factor
+    return ALPHABET[-total % 32]
+
+
+def encode(value, width):
+    """`value` in base32, zero-padded to `width` characters, followed by its check character."""
+    digits = ''
+    while value:
+        value, remainder = divmod(value, 32)
+        digits = ALPHABET[remainder] + digits
+    data = digits.rjust(width, '0')
+    return data + check_character(data)
+
+
+def decode(code):
+    """The value of an encoded part, or None if it is malformed or fails its check character."""
+    code = code.translate(_NORMALIZE).upper()
+    if len(code) < 2 or any(character not in _VALUES for character in code):
+        return None
+    data, check = code[:-1], code[-1]
+    if check_character(data) != check:
+        return None
+    value = 0
+    for character in data:
+        value = value * 32 + _VALUES[character]
+    return value
+
+
+# --- Allocation ---
+def sequence_name(kind, year):
+    return f'identifier_{kind}_{year}'
+
+
+class IdentifierAllocator:
+    """
+    Hands out the values of per-year counters. On PostgreSQL each counter is a native
+    sequence: `nextval` takes no row lock and is not rolled back, so each process
+    reserves IDENTIFIER_BLOCK_SIZE values per round trip and the sequence never becomes
+    a hot spot. Elsewhere the counter is a Sequence row advanced one value at a time in
+    the caller's transaction, so a rollback cannot hand the same value out twice.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._blocks = defaultdict(list)
+        self._created = set()
+
+    def allocate(self, kind, year):
+        if connection.vendor != 'postgresql':
+            return next_value(sequence_name(kind, year))
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()  # A forked worker must not reuse its parent's block.
+            block = self._blocks[kind, year]
+            if not block:
+                block.extend(reversed(self._reserve(sequence_name(kind, year), settings.IDENTIFIER_BLOCK_SIZE)))
+            return block.pop()
+
+    def _create_sequence(self, name):
+        # On a connection of its own: created inside the caller's transaction, a rollback
+        # would drop the sequence and let it hand out the same values again.
+        if name in self._created:
+            return
+        other = connections.create_connection(connection.alias)
+        try:
+            with other.cursor() as cursor:
+                cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {other.ops.quote_name(name)}')
+        finally:
+            other.close()
+        self._created.add(name)
+
+    def _reserve(self, name, count):
+        self._create_sequence(name)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT nextval(%s) FROM generate_series(1, %s)', [name, count])
+            return sorted(row[0] for row in cursor.fetchall())
+
+    def advance(self, kind, year, value):
+        """Makes sure the counter of `kind` for `year` continues after `value`."""
+        name = sequence_name(kind, year)
+        if connection.vendor != 'postgresql':
+            with transaction.atomic():
+                if not Sequence.objects.filter(name=name).update(value=Greatest('value', value)):
+                    Sequence.objects.create(name=name, value=value)
+            return
+        with self._lock:
+            self._create_sequence(name)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT setval(%s, GREATEST(%s, (SELECT last_value FROM {connection.ops.quote_name(name)})))',
+                    [name, value],
+                )
+            self._blocks.pop((kind, year), None)
+
+
+allocator = IdentifierAllocator()
+
+
+def allocate(kind, now=None):
+    """The next identifier of `kind` ('tracking_code' or 'ticket_id') for the current year."""
+    template, width, _ = FORMATS[kind]
+    year = (now or timezone.now()).year
+    return template.format(year=year, short_year=year % 100, code=encode(allocator.allocate(kind, year), width))
+
+
+def parse(kind, identifier):
+    """(year, value) of an identifier issued by the allocator, or None for any other string."""
+    match = FORMATS[kind][2].match(identifier or '')
+    if match is None:
+        return None
+    year, value = int(match.group(1)), decode(match.group(2))
+    if value is None:
+        return None
+    return (year if year >= 100 else 2000 + year), value
@@ -0,0 +1,108 @@
+# apps/core/images.py
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp', 'gif', 'bmp'}
+
+# name -> (box, crop). Variants are never upscaled; `None` keeps the original size.
+VARIANTS = {
+    'thumbnail': ((128, 128), True),
+    'preview': ((1024, 1024), False),
+    'optimized': (None, False),
+}
+
+
+def is_image(name):
+    return os.path.splitext(name or '')[1].lstrip('.').lower() in IMAGE_EXTENSIONS
+
+
+def _output_format():
+    requested = getattr(settings, 'IMAGE_VARIANT_FORMAT', 'WEBP').upper()
+    if requested == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return requested
+
+
+def variant_name(source_name, variant, extension):
+    """`profile_pics/me.png` -> `profile_pics/me.thumbnail.webp`: derivatives live next to the original."""
+    stem = os.path.splitext(source_name)[0]
+    return f"{stem}.{variant}.{extension}"
+
+
+def _encode(image, box, crop, output_format):
+    if box is not None:
+        if crop:
+            image = ImageOps.fit(image, box, Image.LANCZOS)
+        else:
+            image = image.copy()
+            image.thumbnail(box, Image.LANCZOS)
+    buffer = io.BytesIO()
+    quality = getattr(settings, 'IMAGE_VARIANT_QUALITY', 80)
+    if output_format == 'JPEG':
+        image.convert('RGB').save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, output_format, quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def generate_variants(field_file):
+    """
+    Renders every variant of an image field and stores it beside the original.
+    Returns the value kept in the model's `image_variants` field.
+    """
+    storage = field_file.storage
+    output_format = _output_format()
+    extension = 'jpg' if output_format == 'JPEG' else output_format.lower()
+
+    with storage.open(field_file.name, 'rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)  # Phone photos are often stored sideways.
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') and output_format != 'JPEG' else 'RGB')
+
+    variants = {}
+    for variant, (box, crop) in VARIANTS.items():
+        name = variant_name(field_file.name, variant, extension)
+        if storage.exists(name):
+            storage.delete(name)
+        variants[variant] = storage.save(name, ContentFile(_encode(image, box, crop, output_format)))
+    return {'source': field_file.name, 'variants': variants}
+
+
+def delete_variants(storage, image_variants):
+    for name in (image_variants or {}).get('variants', {}).values():
+        storage.delete(name)
+
+
+def variant_urls(field_file, image_variants, request=None):
+    """Maps each ready variant to its URL; empty until the derivatives of the current file exist."""
+    if not field_file or (image_variants or {}).get('source') != field_file.name:
+        return {}
+    urls = {}
+    for variant, name in image_variants.get('variants', {}).items():
+        url = field_file.storage.url(name)
+        urls[variant] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+def schedule_variants(instance, field_name):
+    """
+    Queues derivative generation after the saving transaction commits, if the image
+    changed since its variants were last generated. Connect it from a post_save handler.
+    """
+    from .tasks import generate_image_variants
+
+    field_file = getattr(instance, field_name)
+    current = (instance.image_variants or {}).get('source')
+    if not field_file and not current:
+        return
+    if field_file and field_file.name == current:
+        return
+    if field_file and not is_image(field_file.name) and not current:
+        return
+    label = instance._meta.label
+    transaction.on_commit(lambda: generate_image_variants.delay(label, instance.pk, field_name))
@@ -0,0 +1,67 @@
+# apps/core/instrumentation.py
+import heapq
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+class QueryRecorder:
+    """
+    A `connection.execute_wrapper` that counts and times every statement of a request.
+    Statements are recorded as the ORM sends them, with placeholders instead of
+    values, so the same query repeated for every row of a list shows up as one signature.
+    Statements slower than `slow_threshold` seconds are also kept with their
+    parameters in `slow`, for the slow query log.
+    """
+
+    def __init__(self, keep_slowest=3, slow_threshold=None):
+        self.count = 0
+        self.duration = 0.0
+        self.keep_slowest = keep_slowest
+        self.slowest = []  # Min-heap of (seconds, sql)
+        self.statements = Counter()
+        self.slow_threshold = slow_threshold
+        self.slow = []  # [(sql, params, seconds)]
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            self.statements[sql] += 1
+            if len(self.slowest) < self.keep_slowest:
+                heapq.heappush(self.slowest, (duration, sql))
+            elif duration > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (duration, sql))
+            if self.slow_threshold is not None and duration >= self.slow_threshold:
+                self.slow.append((sql, params, duration))
+
+    def slowest_statements(self):
+        """[(milliseconds, sql)], slowest first."""
+        return [(duration * 1000, sql) for duration, sql in sorted(self.slowest, reverse=True)]
+
+    def duplicates(self, threshold):
+        """[(count, sql)] for statements run at least `threshold` times: usually an N+1."""
+        return [(count, sql) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+@contextmanager
+def record_queries(recorder):
+    """Installs `recorder` on every database connection for the duration of the block."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+def shorten_sql(sql, length=120):
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    return sql if len(sql) <= length else f'{sql[:length - 1]}…'
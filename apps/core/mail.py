@@ -0,0 +1,162 @@
+# apps/core/mail.py
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def _schedule_drain():
+    """Kicks the outbox worker; the periodic beat entry picks up anything missed."""
+    from .tasks import drain_email_outbox
+    try:
+        drain_email_outbox.delay()
+    except Exception:
+        logger.warning("[OUTBOX] Could not schedule drain_email_outbox; the periodic run will deliver the mail.")
+
+
+def enqueue_email(to_email, subject, body_text='', body_html='', from_email=None, dedupe_key=None):
+    """
+    Adds a message to the outbox. Call it inside the transaction that caused the mail,
+    so the message is only delivered if that transaction commits.
+    Returns False when a message with the same `dedupe_key` was already enqueued.
+    """
+    return enqueue_emails([dict(
+        to_email=to_email, subject=subject, body_text=body_text, body_html=body_html,
+        from_email=from_email, dedupe_key=dedupe_key,
+    )]) == 1
+
+
+def enqueue_emails(messages):
+    """Bulk version of `enqueue_email`; each item is a dict of its keyword arguments."""
+    rows = [
+        OutgoingEmail(
+            to_email=message['to_email'],
+            subject=message['subject'],
+            body_text=message.get('body_text') or '',
+            body_html=message.get('body_html') or '',
+            from_email=message.get('from_email') or settings.DEFAULT_FROM_EMAIL,
+            dedupe_key=message.get('dedupe_key'),
+        )
+        for message in messages
+    ]
+    keys = [row.dedupe_key for row in rows if row.dedupe_key]
+    if keys:
+        existing = set(OutgoingEmail.objects.filter(dedupe_key__in=keys).values_list('dedupe_key', flat=True))
+        rows = [row for row in rows if not row.dedupe_key or row.dedupe_key not in existing]
+    if not rows:
+        return 0
+    keyed = [row for row in rows if row.dedupe_key]
+    OutgoingEmail.objects.bulk_create([row for row in rows if not row.dedupe_key])
+    created = len(rows) - len(keyed) + _insert_deduplicated(keyed)
+    if created:
+        transaction.on_commit(_schedule_drain)
+    return created
+
+
+def _insert_deduplicated(rows):
+    """
+    Inserts rows carrying a dedupe key and returns how many went in. A concurrent enqueue
+    can win the race for a key after the check above; then the rows are inserted one by
+    one, so only the duplicates are dropped and the count stays exact.
+    """
+    if not rows:
+        return 0
+    try:
+        with transaction.atomic():
+            OutgoingEmail.objects.bulk_create(rows)
+        return len(rows)
+    except IntegrityError:
+        pass
+    created = 0
+    for row in rows:
+        row.pk = None
+        try:
+            with transaction.atomic():
+                row.save(force_insert=True)
+        except IntegrityError:
+            continue
+        created += 1
+    return created
+
+
+def _build_message(row, connection):
+    message = EmailMultiAlternatives(row.subject, row.body_text, row.from_email, [row.to_email], connection=connection)
+    if row.body_html:
+        message.attach_alternative(row.body_html, 'text/html')
+    return message
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base ... capped at one day."""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 24 * 60 * 60))
+
+
+def _record_failure(row, exc, max_attempts):
+    row.last_error = str(exc)[:2000]
+    if row.attempts >= max_attempts:
+        row.status = OutgoingEmail.StatusChoices.FAILED
+        logger.error("[OUTBOX] Giving up on email %s to %s: %s", row.pk, row.to_email, exc)
+    else:
+        row.next_attempt_at = timezone.now() + retry_delay(row.attempts)
+
+
+def drain_outbox(batch_size=None, max_batches=None):
+    """
+    Delivers due outbox messages in batches, each batch over a single SMTP connection.
+    Rows are locked with SKIP LOCKED so several workers can drain concurrently
+    without sending a message twice. Returns the number of messages sent.
+    """
+    batch_size = batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100)
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    sent_total, batches = 0, 0
+
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            rows = list(
+                OutgoingEmail.objects.select_for_update(skip_locked=True)
+                .filter(status=OutgoingEmail.StatusChoices.PENDING, next_attempt_at__lte=timezone.now())
+                .order_by('id')[:batch_size]
+            )
+            if not rows:
+                break
+
+            connection = get_connection()
+            try:
+                connection.open()
+            except Exception as exc:
+                # The server is unreachable: every claimed message counts an attempt and backs
+                # off, and the drain stops instead of claiming the next batch.
+                logger.warning("[OUTBOX] Could not connect to the mail server: %s", exc)
+                for row in rows:
+                    row.attempts += 1
+                    _record_failure(row, exc, max_attempts)
+                OutgoingEmail.objects.bulk_update(rows, ['status', 'attempts', 'next_attempt_at', 'last_error'])
+                break
+            try:
+                for row in rows:
+                    row.attempts += 1
+                    try:
+                        connection.send_messages([_build_message(row, connection)])
+                    except Exception as exc:
+                        _record_failure(row, exc, max_attempts)
+                        continue
+                    row.status = OutgoingEmail.StatusChoices.SENT
+                    row.sent_at = timezone.now()
+                    row.last_error = ''
+                    sent_total += 1
+            finally:
+                connection.close()
+
+            OutgoingEmail.objects.bulk_update(rows, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+        batches += 1
+        if len(rows) < batch_size:
+            break
+    return sent_total
@@ -0,0 +1,80 @@
+# apps/core/management/commands/benchmark_endpoints.py
+import platform
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from apps.core import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures p50/p95 latency, SQL query count and SQL time of the hot API endpoints for each role, '
+        'on a generated dataset in a throwaway test database, and fails on regressions against the baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--applications', type=int, default=300, help='Size of the generated dataset.')
+        parser.add_argument('--iterations', type=int, default=20, help='Measured requests per endpoint.')
+        parser.add_argument('--only', help='Only run endpoints whose "role:name" contains this text.')
+        parser.add_argument('--baseline', type=Path, default=benchmarks.BASELINE_PATH, help='Baseline JSON file.')
+        parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline.')
+        parser.add_argument('--record-latency', action='store_true',
+                            help='Keep latencies in the written baseline; only meaningful on the production database engine.')
+        parser.add_argument('--latency-tolerance', type=float, default=0.5,
+                            help='Allowed p95 slowdown as a fraction of the baseline (default: 0.5 = 50%%).')
+        parser.add_argument('--query-tolerance', type=int, default=0, help='Allowed extra queries per request.')
+        parser.add_argument('--queries-only', action='store_true', help='Ignore latency; only enforce query budgets.')
+
+    def handle(self, *args, **options):
+        endpoints = [
+            endpoint for endpoint in benchmarks.ENDPOINTS
+            if not options['only'] or options['only'] in f'{endpoint.role}:{endpoint.name}'
+        ]
+        if not endpoints:
+            raise CommandError(f"No endpoint matches '{options['only']}'.")
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.stdout.write(f"Seeding {options['applications']:,} applications...")
+            actors = benchmarks.seed_dataset(options['applications'])
+            results = benchmarks.measure(actors, iterations=options['iterations'], endpoints=endpoints)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        baseline = benchmarks.load_baseline(options['baseline']) if options['baseline'].exists() else {}
+        self._print(results, baseline.get('endpoints', {}))
+
+        if options['update_baseline']:
+            benchmarks.save_baseline(
+                results, options['baseline'], with_latency=options['record_latency'],
+                applications=options['applications'], iterations=options['iterations'],
+                database=connection.vendor, python=platform.python_version(), django=django.get_version(),
+            )
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}."))
+            return
+
+        regressions = benchmarks.compare(
+            results, baseline, latency_tolerance=options['latency_tolerance'],
+            query_tolerance=options['query_tolerance'], check_latency=not options['queries_only'],
+        )
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(f'  - {regression}')
+            raise CommandError(f'{len(regressions)} endpoint regression(s) against {options["baseline"]}.')
+        self.stdout.write(self.style.SUCCESS('All endpoints are within their budgets.'))
+
+    def _print(self, results, budgets):
+        self.stdout.write(f"{'endpoint':<32}{'status':>7}{'queries':>9}{'budget':>8}{'sql ms':>9}{'p50 ms':>9}{'p95 ms':>9}")
+        for key, result in results.items():
+            budget = budgets.get(key, {}).get('queries', '-')
+            self.stdout.write(
+                f"{key:<32}{result['status']:>7}{result['queries']:>9}{budget:>8}"
+                f"{result['sql_ms']:>9.1f}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+            )
@@ -0,0 +1,56 @@
+# apps/core/management/commands/benchmark_sections.py
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from apps.core import benchmarks, sections
+from apps.core.reports import ReportGenerator
+from apps.core.views import DashboardStatsView
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares running the sections of the dashboard and reports endpoints one after another (WSGI) '
+        'with running them concurrently on the section pool (ASGI), on a generated dataset in a throwaway '
+        'test database. SQLite serializes the queries, so only PostgreSQL shows the real difference.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--applications', type=int, default=300, help='Size of the generated dataset.')
+        parser.add_argument('--iterations', type=int, default=20, help='Measured runs per endpoint and strategy.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.stdout.write(f"Seeding {options['applications']:,} applications...")
+            head, _ = benchmarks.seed_dataset(options['applications'])['head']
+            endpoints = {
+                'dashboard-stats': lambda: DashboardStatsView().get_sections(head, 'HeadOfOrganization'),
+                'reports-summary': lambda: ReportGenerator('2024-07-01', '2025-06-30').get_sections(group_by='month'),
+            }
+            self.stdout.write(f"{'endpoint':<20}{'sections':>9}{'seq p50':>10}{'seq p95':>10}{'conc p50':>10}{'conc p95':>10}{'speedup':>9}")
+            for name, build in endpoints.items():
+                sequential = self._measure(lambda: {key: section() for key, section in build().items()}, options['iterations'])
+                concurrent = self._measure(lambda: async_to_sync(sections.gather)(build()), options['iterations'])
+                self.stdout.write(
+                    f"{name:<20}{len(build()):>9}{sequential[0]:>10.1f}{sequential[1]:>10.1f}"
+                    f"{concurrent[0]:>10.1f}{concurrent[1]:>10.1f}{sequential[0] / concurrent[0]:>8.1f}x"
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def _measure(self, run, iterations):
+        """(p50, p95) in milliseconds, after one warm-up run."""
+        run()
+        latencies = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            run()
+            latencies.append((time.perf_counter() - started) * 1000)
+        return benchmarks.percentile(latencies, 0.5), benchmarks.percentile(latencies, 0.95)
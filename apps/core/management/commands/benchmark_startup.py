@@ -0,0 +1,94 @@
+# apps/core/management/commands/benchmark_startup.py
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter per target, so every target pays its full import cost.
+# RSS is read from /proc: ru_maxrss would report the parent's peak, inherited across exec.
+CHILD = '''
+import importlib, json, resource, sys, time
+def rss_kb():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() // 1024
+import django
+django.setup()
+setup_rss = rss_kb()
+sys.stderr.write("--- targets ---\\n")
+started = time.perf_counter()
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+seconds = time.perf_counter() - started
+print(json.dumps({"seconds": seconds, "setup_rss_kb": setup_rss, "rss_kb": rss_kb(), "modules": sorted(sys.modules)}))
+'''
+
+# Packages that must not be imported while a web worker boots.
+HEAVY_PACKAGES = ('openpyxl', 'reportlab')
+
+
+def parse_importtime(output):
+    """{top-level package: self microseconds} of the imports after the child's marker line."""
+    totals = Counter()
+    _, _, after = output.partition('--- targets ---\n')
+    for line in after.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        totals[name.strip().split('.')[0]] += int(self_us)
+    return totals
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures the import time and RSS growth of the URLconf and each app\'s views in a fresh interpreter '
+        '(python -X importtime), on top of django.setup(), and fails when a boot-time import pulls in a heavy package.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='*', help='Modules to import (default: the URLconf and every app\'s views).')
+        parser.add_argument('--top', type=int, default=10, help='Slowest packages listed for each target.')
+        parser.add_argument('--forbid', nargs='*', default=HEAVY_PACKAGES,
+                            help='Packages the targets must not import (default: %(default)s).')
+
+    def handle(self, *args, **options):
+        targets = options['targets'] or self._default_targets()
+        failures = []
+        self.stdout.write(f"{'target':<36}{'import ms':>10}{'setup MB':>10}{'RSS MB':>9}{'+MB':>7}")
+        for target in targets:
+            result, packages = self._measure(target)
+            self.stdout.write(
+                f"{target:<36}{result['seconds'] * 1000:>10.1f}{result['setup_rss_kb'] / 1024:>10.1f}"
+                f"{result['rss_kb'] / 1024:>9.1f}{(result['rss_kb'] - result['setup_rss_kb']) / 1024:>7.1f}"
+            )
+            for name, self_us in packages.most_common(options['top']):
+                self.stdout.write(f"    {name:<32}{self_us / 1000:>10.1f}")
+            loaded = sorted({module.split('.')[0] for module in result['modules']} & set(options['forbid']))
+            if loaded:
+                failures.append(f"{target} imports {', '.join(loaded)}")
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(f'  - {failure}')
+            raise CommandError(f'{len(failures)} target(s) import packages that should load lazily.')
+        self.stdout.write(self.style.SUCCESS('No target imports a forbidden package.'))
+
+    def _default_targets(self):
+        targets = [settings.ROOT_URLCONF]
+        for config in apps.get_app_configs():
+            if config.name.startswith('apps.') and os.path.exists(os.path.join(config.path, 'views.py')):
+                targets.append(f'{config.name}.views')
+        return targets
+
+    def _measure(self, target):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD, target],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f'Importing {target} failed:\n{completed.stderr[-2000:]}')
+        return json.loads(completed.stdout.splitlines()[-1]), parse_importtime(completed.stderr)
@@ -1,8 +1,11 @@
 # apps/core/management/commands/clean_db.py
+from contextlib import nullcontext
+
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.contrib.auth import get_user_model
 from apps.core.models import University, Program
+from apps.core.purge import DEFAULT_BATCH_SIZE, Purger
 from apps.users.models import Role
 from apps.applications.models import Application # <-- Import the Application model
 
@@ -11,29 +14,40 @@ User = get_user_model()
 class Command(BaseCommand):
     help = 'Cleans the database of all test data created by populate_db.'
 
-    @transaction.atomic
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows removed per DELETE statement.')
+        parser.add_argument('--no-truncate', action='store_true', help='Use batched deletes even where TRUNCATE would do.')
+        parser.add_argument('--quiet-progress', action='store_true', help='Only print the totals of every step.')
+        parser.add_argument('--atomic', action='store_true',
+                            help='Run everything in one transaction instead of committing every batch.')
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.WARNING('Starting database cleaning...'))
+        self.show_progress = not options['quiet_progress']
+        # Rows are deleted with batched SQL, children first, without loading them (see apps/core/purge.py).
+        # Each batch commits on its own, so locks and WAL stay small; an interrupted run can simply be repeated.
+        purger = Purger(batch_size=options['batch_size'], progress=self._progress, truncate=not options['no_truncate'])
+        with transaction.atomic() if options['atomic'] else nullcontext():
+            self._clean(purger)
+        self.stdout.write(self.style.SUCCESS('Database cleaning complete! You can now run populate_db again.'))
+
+    def _clean(self, purger):
 
         # Delete in an order that respects foreign keys
 
         # 1. NEW: Delete all Application objects first.
         # This will cascade and delete related UniversityChoice, AcademicHistory, etc.
         # which will "unprotect" the Program and University models.
-        apps_deleted, _ = Application.objects.all().delete()
-        self.stdout.write(f'Deleted {apps_deleted} Application objects (and their related data).')
-        
+        self._report('Application', purger.purge(Application.objects.all()), '(and their related data)')
+
         # 2. Delete Programs (now unprotected)
-        programs_deleted, _ = Program.objects.all().delete()
-        self.stdout.write(f'Deleted {programs_deleted} Program objects.')
+        self._report('Program', purger.purge(Program.objects.all()))
 
         # 3. Delete Universities (now unprotected)
-        universities_deleted, _ = University.objects.all().delete()
-        self.stdout.write(f'Deleted {universities_deleted} University objects.')
+        self._report('University', purger.purge(University.objects.all()))
 
         # 4. Delete all non-superuser users
-        users_deleted, _ = User.objects.filter(is_superuser=False).delete()
-        self.stdout.write(f'Deleted {users_deleted} non-superuser User objects.')
+        self._report('non-superuser User', purger.purge(User.objects.filter(is_superuser=False)))
 
         # 5. Delete Roles
         role_names_to_delete = [
@@ -42,8 +56,14 @@ class Command(BaseCommand):
             'Recruitment Institution',
             'HeadOfOrganization',
         ]
-        roles_deleted, _ = Role.objects.filter(name__in=role_names_to_delete).delete()
-        self.stdout.write(f'Deleted {roles_deleted} Role objects.')
+        self._report('Role', purger.purge(Role.objects.filter(name__in=role_names_to_delete)))
 
+    def _progress(self, label, rows, action):
+        if self.show_progress:
+            self.stdout.write(f'  {label}: {action}' if rows is None else f'  {label}: {rows:,} {action}')
 
-        self.stdout.write(self.style.SUCCESS('Database cleaning complete! You can now run populate_db again.'))
\ No newline at end of file
+    def _report(self, name, deleted, detail=''):
+        if deleted is None:
+            self.stdout.write(f'Truncated {name} {detail}'.rstrip() + '.')
+        else:
+            self.stdout.write(f'Deleted {deleted} {name} objects {detail}'.rstrip() + '.')
@@ -0,0 +1,384 @@
+# apps/core/management/commands/generate_load_data.py
+import csv
+import io
+import json
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.applications.changes import CHANGE_SEQUENCE
+from apps.applications.models import (
+    AcademicHistory, Application, ApplicationLog, ApplicationTask, InternalNote, UniversityChoice
+)
+from apps.core.models import Notification, Program, University
+from apps.core.sequences import next_value
+from apps.support.models import SupportTicket, TicketMessage
+from apps.users.models import Role, User
+from .populate_db import UNIVERSITY_DATA
+
+EMAIL_DOMAIN = 'loadtest.example'
+PASSWORD = 'password123'
+# A fixed default keeps runs reproducible; reports over 2024-07-01..2025-06-30 see the whole spread.
+DEFAULT_END_DATE = date(2025, 6, 30)
+# Seeds are part of the generated identifiers, which must fit their 20 characters.
+MAX_SEED = 0xFFFF
+
+# Weights roughly follow a production intake.
+APPLICATION_TYPES = {
+    Application.ApplicationType.NEW_ADMISSION: 70,
+    Application.ApplicationType.VISA_EXTENSION: 12,
+    Application.ApplicationType.TRANSFER_REQUEST: 7,
+    Application.ApplicationType.INTERNAL_EXIT_PERMIT: 6,
+    Application.ApplicationType.FINAL_EXIT_PERMIT: 5,
+}
+STATUSES = {
+    Application.StatusChoices.PENDING_REVIEW: 45,
+    Application.StatusChoices.APPROVED: 25,
+    Application.StatusChoices.REJECTED: 15,
+    Application.StatusChoices.PENDING_CORRECTION: 15,
+}
+DECISION_LOGS = {
+    Application.StatusChoices.APPROVED: "Decision 'APPROVE' recorded.",
+    Application.StatusChoices.REJECTED: "Decision 'REJECT' recorded.",
+    Application.StatusChoices.PENDING_CORRECTION: "Application requires correction.",
+}
+FIRST_NAMES = ['Ali', 'Sara', 'Omar', 'Fatima', 'Hassan', 'Zahra', 'Yusuf', 'Maryam', 'Karim', 'Leila', 'Ahmad', 'Noor']
+LAST_NAMES = ['Hosseini', 'Rahimi', 'Karimi', 'Haidari', 'Sadeghi', 'Nazari', 'Ahmadi', 'Jafari', 'Mousavi', 'Rezaei']
+COUNTRIES = {'Afghanistan': 40, 'Iraq': 25, 'Syria': 10, 'Lebanon': 8, 'Pakistan': 7, 'Tajikistan': 5, 'Yemen': 5}
+DEGREES = ['Diploma', 'Bachelor', 'Master']
+TICKET_CATEGORIES = ['Technical', 'Application', 'Visa', 'Payment', 'Other']
+
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _copy_value(value):
+    if value is None:
+        return r'\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Lets generated rows keep their backdated `auto_now`/`auto_now_add` values while inserting."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates production-sized synthetic data (applicants, applications with their choices, '
+        'tasks, logs and notes, notifications and support tickets) for load testing and benchmarks. '
+        'The same options always produce the same data, and data of different seeds can coexist.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--applications', type=int, default=10000, help='Number of applications to create.')
+        parser.add_argument('--applicants', type=int, help='Number of applicant accounts (default: applications / 1.5).')
+        parser.add_argument('--experts', type=int, default=25, help='Number of university experts.')
+        parser.add_argument('--institutions', type=int, default=10, help='Number of recruitment institutions.')
+        parser.add_argument('--support-staff', type=int, default=5, help='Number of support staff answering tickets.')
+        parser.add_argument('--tickets', type=int, default=1000, help='Number of support tickets.')
+        parser.add_argument('--notifications', type=float, default=3.0, help='Average notifications per applicant.')
+        parser.add_argument('--days', type=int, default=365, help='Spread creation dates over this many days.')
+        parser.add_argument('--end-date', type=date.fromisoformat, default=DEFAULT_END_DATE,
+                            help='Newest creation date, YYYY-MM-DD (default: %(default)s).')
+        parser.add_argument('--seed', type=int, default=1, help=f'Random seed, 0-{MAX_SEED}.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT/COPY batch.')
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create even on PostgreSQL.')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['seed'] <= MAX_SEED:
+            raise CommandError(f'--seed must be between 0 and {MAX_SEED}.')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+        self.prefix = f"load{options['seed']}"
+        self.code_prefix = f"L{options['seed']:04X}"  # Keeps tracking codes and ticket IDs apart between seeds.
+        self.stats = {}
+        self.end = timezone.make_aware(datetime.combine(options['end_date'], dt_time(18, 0)))
+        self.span = timedelta(days=options['days']).total_seconds()
+        # Hashed once and shared, as hashing per user would dominate; salted with the prefix so it is reproducible.
+        self.password = make_password(PASSWORD, salt=self.prefix)
+
+        if User.objects.filter(email__endswith=f'@{self.prefix}.{EMAIL_DOMAIN}').exists():
+            raise CommandError(f"Data for seed {options['seed']} already exists. Run `clean_db` first or pick another --seed.")
+
+        applications = options['applications']
+        applicants = options['applicants'] or max(1, math.ceil(applications / 1.5))
+        started = time.perf_counter()
+        self.stdout.write(f"Generating {applications:,} applications for {applicants:,} applicants "
+                          f"({'COPY' if self.use_copy else 'bulk_create'}, seed {options['seed']})...")
+
+        with explicit_timestamps(User, Application, ApplicationLog, InternalNote, Notification, SupportTicket, TicketMessage):
+            self.roles = self._roles()
+            self.programs = self._programs()
+            self.experts = self._staff('expert', options['experts'], 'UniversityExpert', is_staff=True)
+            self.institutions = self._staff('institution', options['institutions'], 'Recruitment Institution')
+            self.support_staff = self._staff('support', options['support_staff'], 'SupportStaff', is_staff=True, with_universities=False)
+            self.applicant_ids = self._applicants(applicants)
+            self._notifications(options['notifications'])
+            self._applications(applications)
+            self._tickets(options['tickets'])
+
+        self._report(time.perf_counter() - started)
+
+    # --- Helpers ---
+    def _timestamp(self):
+        return self.end - timedelta(seconds=self.rng.random() * self.span)
+
+    def _name(self):
+        return f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}'
+
+    def _insert(self, model, objects, need_ids=False):
+        """
+        Writes one batch: COPY on PostgreSQL for rows whose ids are not needed afterwards,
+        batched INSERTs otherwise. Returns the objects, with ids when `need_ids`.
+        """
+        started = time.perf_counter()
+        if self.use_copy and not need_ids:
+            self._copy(model, objects)
+        else:
+            model.objects.bulk_create(objects, batch_size=self.batch_size)
+        rows, seconds = self.stats.get(model._meta.label, (0, 0.0))
+        self.stats[model._meta.label] = (rows + len(objects), seconds + time.perf_counter() - started)
+        return objects
+
+    def _copy(self, model, objects):
+        fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objects:
+            writer.writerow([_copy_value(field.get_prep_value(getattr(obj, field.attname))) for field in fields])
+        buffer.seek(0)
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(
+                f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+
+    def _batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(start + self.batch_size, total)
+
+    def _link_roles(self, users, role):
+        through = User.roles.through
+        self._insert(through, [through(user_id=user.pk, role_id=role.pk) for user in users])
+
+    # --- Reference data ---
+    def _roles(self):
+        return {
+            name: Role.objects.get_or_create(name=name)[0]
+            for name in ('Applicant', 'UniversityExpert', 'Recruitment Institution', 'SupportStaff')
+        }
+
+    def _programs(self):
+        if not Program.objects.exists():
+            for university_name, program_names in UNIVERSITY_DATA.items():
+                university = University.objects.get_or_create(name=university_name)[0]
+                Program.objects.bulk_create([Program(university=university, name=name) for name in program_names])
+        return list(Program.objects.order_by('pk').values_list('pk', 'university_id'))
+
+    def _universities(self):
+        return sorted({university_id for _, university_id in self.programs})
+
+    def _staff(self, kind, count, role_name, is_staff=False, with_universities=True):
+        users = self._insert(User, [
+            User(email=f'{kind}{index}@{self.prefix}.{EMAIL_DOMAIN}', full_name=self._name(), password=self.password,
+                 is_staff=is_staff, date_joined=self._timestamp())
+            for index in range(count)
+        ], need_ids=True)
+        self._link_roles(users, self.roles[role_name])
+        if not with_universities:
+            return users
+        universities = self._universities()
+        through = User.universities.through
+        self._insert(through, [
+            through(user_id=user.pk, university_id=universities[index % len(universities)])
+            for index, user in enumerate(users)
+        ])
+        return users
+
+    # --- Applicants ---
+    def _applicants(self, count):
+        ids = []
+        for start, stop in self._batches(count):
+            with transaction.atomic():
+                users = self._insert(User, [
+                    User(email=f'applicant{index}@{self.prefix}.{EMAIL_DOMAIN}', full_name=self._name(),
+                         password=self.password, date_joined=self._timestamp())
+                    for index in range(start, stop)
+                ], need_ids=True)
+                self._link_roles(users, self.roles['Applicant'])
+            ids.extend(user.pk for user in users)
+        return ids
+
+    def _notifications(self, average):
+        total = int(len(self.applicant_ids) * average)
+        for start, stop in self._batches(total):
+            with transaction.atomic():
+                self._insert(Notification, [
+                    Notification(
+                        user_id=self.rng.choice(self.applicant_ids), title='Application update',
+                        message='The status of your application has changed.',
+                        is_read=self.rng.random() < 0.7, timestamp=self._timestamp(),
+                    )
+                    for _ in range(start, stop)
+                ])
+
+    # --- Applications ---
+    def _form_data(self, application_type):
+        if application_type == Application.ApplicationType.VISA_EXTENSION:
+            return {
+                'current_visa_number': f'V{self.rng.randrange(10 ** 7, 10 ** 8)}',
+                'current_visa_expiry': (self.end.date() + timedelta(days=self.rng.randrange(10, 120))).isoformat(),
+                'requested_duration': self.rng.choice(['6 months', '1 year']),
+            }
+        if application_type == Application.ApplicationType.INTERNAL_EXIT_PERMIT:
+            return {'destination_university': self.rng.choice(list(UNIVERSITY_DATA)), 'reason_for_request': 'Research visit'}
+        return {}
+
+    def _applications(self, count):
+        universities = self._universities()
+        experts_by_university = {}
+        for index, expert in enumerate(self.experts):
+            experts_by_university.setdefault(universities[index % len(universities)], []).append(expert.pk)
+
+        for start, stop in self._batches(count):
+            with transaction.atomic():
+                seq = next_value(CHANGE_SEQUENCE)
+                applications, programs = [], []
+                for index in range(start, stop):
+                    application_type = _weighted(self.rng, APPLICATION_TYPES)
+                    created = self._timestamp()
+                    institution = self.rng.choice(self.institutions) if self.institutions and self.rng.random() < 0.3 else None
+                    applications.append(Application(
+                        applicant_id=self.rng.choice(self.applicant_ids), tracking_code=f'ISA-{self.code_prefix}-{index:07X}',
+                        status=_weighted(self.rng, STATUSES), application_type=application_type,
+                        form_data=self._form_data(application_type), submitted_by_institution=institution,
+                        full_name=self._name(), country_of_residence=_weighted(self.rng, COUNTRIES),
+                        date_of_birth=date(self.rng.randrange(1990, 2006), self.rng.randrange(1, 13), self.rng.randrange(1, 29)),
+                        father_name=self.rng.choice(FIRST_NAMES), created_at=created,
+                        updated_at=created + timedelta(hours=self.rng.randrange(0, 24 * 30)), change_seq=seq,
+                    ))
+                    programs.append(self.rng.choice(self.programs))
+                self._insert(Application, applications, need_ids=True)
+                self._application_children(applications, programs, experts_by_university)
+
+    def _application_children(self, applications, programs, experts_by_university):
+        choices, histories, tasks, logs, notes = [], [], [], [], []
+        rng = self.rng
+        for application, (program_id, university_id) in zip(applications, programs):
+            choices.append(UniversityChoice(application=application, university_id=university_id, program_id=program_id, priority=1))
+            if application.application_type == Application.ApplicationType.NEW_ADMISSION:
+                histories.append(AcademicHistory(
+                    application=application, degree_level=rng.choice(DEGREES), country=application.country_of_residence,
+                    university_name=f'{application.country_of_residence} University', field_of_study='Engineering',
+                    gpa=Decimal(rng.randrange(1200, 2000)) / 100,
+                ))
+
+            experts = experts_by_university.get(university_id, [])
+            status = application.status
+            if status == Application.StatusChoices.PENDING_REVIEW:
+                expert_id = rng.choice(experts) if experts and rng.random() < 0.4 else None
+                task_status = ApplicationTask.StatusChoices.ASSIGNED if expert_id else ApplicationTask.StatusChoices.UNCLAIMED
+                decision = ApplicationTask.DecisionChoices.PENDING
+            elif status == Application.StatusChoices.PENDING_CORRECTION:
+                # The CORRECT action leaves the task with the expert who asked, undecided.
+                expert_id = rng.choice(experts) if experts else None
+                task_status = ApplicationTask.StatusChoices.ASSIGNED if expert_id else ApplicationTask.StatusChoices.UNCLAIMED
+                decision = ApplicationTask.DecisionChoices.PENDING
+            else:
+                expert_id = rng.choice(experts) if experts else None
+                task_status = ApplicationTask.StatusChoices.COMPLETED
+                decision = {
+                    Application.StatusChoices.APPROVED: ApplicationTask.DecisionChoices.APPROVED,
+                    Application.StatusChoices.REJECTED: ApplicationTask.DecisionChoices.REJECTED,
+                }[status]
+            tasks.append(ApplicationTask(application=application, university_id=university_id,
+                                         assigned_expert_id=expert_id, status=task_status, decision=decision))
+
+            actor_id = application.submitted_by_institution_id or application.applicant_id
+            logs.append(ApplicationLog(application=application, actor_id=actor_id,
+                                       action="Application submitted.", timestamp=application.created_at))
+            if status in DECISION_LOGS:
+                logs.append(ApplicationLog(application=application, actor_id=expert_id, action=DECISION_LOGS[status],
+                                           comment='Reviewed.', timestamp=application.updated_at))
+            for _ in range(rng.choices([0, 1, 2, 3], weights=[60, 25, 10, 5])[0] if experts else 0):
+                notes.append(InternalNote(application=application, author_id=rng.choice(experts), message='Checked documents.',
+                                          timestamp=application.created_at + timedelta(hours=rng.randrange(1, 240))))
+
+        self._insert(UniversityChoice, choices)
+        self._insert(AcademicHistory, histories)
+        self._insert(ApplicationTask, tasks)
+        self._insert(ApplicationLog, logs)
+        self._insert(InternalNote, notes)
+
+    # --- Support ---
+    def _tickets(self, count):
+        staff_ids = [user.pk for user in self.support_staff] or [expert.pk for expert in self.experts] or self.applicant_ids[:1]
+        for start, stop in self._batches(count):
+            with transaction.atomic():
+                tickets, threads = [], []
+                for index in range(start, stop):
+                    owner_id = self.rng.choice(self.applicant_ids)
+                    opened = self._timestamp()
+                    thread = []
+                    for position in range(self.rng.choices([1, 2, 3, 4, 6, 8], weights=[20, 30, 20, 15, 10, 5])[0]):
+                        by_staff = position % 2 == 1
+                        thread.append(TicketMessage(
+                            sender_id=self.rng.choice(staff_ids) if by_staff else owner_id,
+                            message='Thank you, we are looking into it.' if by_staff else 'I have a question about my application.',
+                            timestamp=opened + timedelta(hours=position * self.rng.randrange(1, 48)),
+                        ))
+                    last = thread[-1]
+                    last_is_staff = len(thread) % 2 == 0
+                    tickets.append(SupportTicket(
+                        ticket_id=f'SPT-{self.code_prefix}-{index:07X}', user_id=owner_id, subject='Question about my application',
+                        category=self.rng.choice(TICKET_CATEGORIES), created_at=opened, updated_at=last.timestamp,
+                        status=self.rng.choice(list(SupportTicket.StatusChoices.values)),
+                        last_message_at=last.timestamp, message_count=len(thread), last_sender_is_staff=last_is_staff,
+                    ))
+                    threads.append(thread)
+                self._insert(SupportTicket, tickets, need_ids=True)
+                for ticket, thread in zip(tickets, threads):
+                    for message in thread:
+                        message.ticket = ticket
+                self._insert(TicketMessage, [message for thread in threads for message in thread])
+
+    # --- Report ---
+    def _report(self, elapsed):
+        total = sum(rows for rows, _ in self.stats.values())
+        self.stdout.write(f"{'table':<40}{'rows':>12}{'seconds':>10}{'rows/s':>12}")
+        for label, (rows, seconds) in sorted(self.stats.items()):
+            rate = rows / seconds if seconds else 0
+            self.stdout.write(f'{label:<40}{rows:>12,}{seconds:>10.2f}{rate:>12,.0f}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Inserted {total:,} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s).'
+        ))
@@ -0,0 +1,42 @@
+# apps/core/management/commands/sync_identifier_sequences.py
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from apps.applications.models import Application
+from apps.core import identifiers
+from apps.support.models import SupportTicket
+
+SOURCES = {
+    'tracking_code': (Application, 'tracking_code'),
+    'ticket_id': (SupportTicket, 'ticket_id'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves the tracking code and ticket ID counters past every identifier already issued. '
+        'Run it after restoring or merging data from another database; codes in the pre-sequence '
+        'formats are left as they are, since new codes can never take their shape.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would change.')
+
+    def handle(self, *args, **options):
+        for kind, (model, field) in SOURCES.items():
+            highest, legacy = defaultdict(int), 0
+            for identifier in model._base_manager.values_list(field, flat=True).iterator(chunk_size=5000):
+                parsed = identifiers.parse(kind, identifier)
+                if parsed is None:
+                    legacy += 1
+                    continue
+                year, value = parsed
+                highest[year] = max(highest[year], value)
+
+            for year, value in sorted(highest.items()):
+                if not options['dry_run']:
+                    identifiers.allocator.advance(kind, year, value)
+                self.stdout.write(f'{kind} {year}: counter at or past {value:,}')
+            self.stdout.write(f'{kind}: {legacy:,} identifier(s) in an older format kept as they are.')
+        self.stdout.write(self.style.SUCCESS('Identifier counters are in sync.'))
@@ -0,0 +1,323 @@
+# apps/core/metrics.py
+"""
+In-process metrics served in the Prometheus text format at /metrics.
+
+Every process adds to its own values. With METRICS_DIR set, they live in a memory-mapped
+file per process in that directory, and a scrape of any worker adds up all the files,
+so the totals cover every gunicorn worker and Celery process. The directory must be
+emptied when the service is (re)deployed. Without METRICS_DIR, values stay in memory.
+"""
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+INF = float('inf')
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, INF)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_HEADER = struct.Struct('<i4x')  # Bytes in use, then padding to 8
+_LENGTH = struct.Struct('<i')
+_VALUE = struct.Struct('<d')
+
+
+# --- Storage ---
+class MemoryStore:
+    """Values of a single process, for development and tests."""
+
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def add(self, key, amount):
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def items(self):
+        with self.lock:
+            return list(self.values.items())
+
+
+class MmapStore:
+    """
+    The values of one process in a memory-mapped file. Entries are appended as
+    [key length][key, padded to 8 bytes][float64] and updated in place, so adding to a
+    value is a memory write; other processes only ever read the file.
+    """
+    INITIAL_SIZE = 1 << 16
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.positions = {}
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(self.INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self.used = _HEADER.unpack_from(self._map, 0)[0]
+        if self.used == 0:
+            self.used = _HEADER.size
+            _HEADER.pack_into(self._map, 0, self.used)
+        for key, _, position in read_entries(self._map, self.used):
+            self.positions[key] = position
+
+    def add(self, key, amount):
+        with self.lock:
+            position = self.positions.get(key)
+            if position is None:
+                position = self._append(key)
+            _VALUE.pack_into(self._map, position, _VALUE.unpack_from(self._map, position)[0] + amount)
+
+    def _append(self, key):
+        encoded = key.encode()
+        padding = -(_LENGTH.size + len(encoded)) % 8
+        entry = _LENGTH.pack(len(encoded)) + encoded + b' ' * padding + _VALUE.pack(0.0)
+        while self.used + len(entry) > len(self._map):
+            self._grow()
+        self._map[self.used:self.used + len(entry)] = entry
+        self.used += len(entry)
+        # Readers trust the header, so it only covers the entry once it is complete.
+        _HEADER.pack_into(self._map, 0, self.used)
+        self.positions[key] = self.used - _VALUE.size
+        return self.positions[key]
+
+    def _grow(self):
+        size = len(self._map) * 2
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def items(self):
+        with self.lock:
+            return [(key, value) for key, value, _ in read_entries(self._map, self.used)]
+
+
+def read_entries(data, used=None):
+    """Yields (key, value, value position) from the contents of a store file."""
+    if used is None:
+        used = _HEADER.unpack_from(data, 0)[0]
+    position = _HEADER.size
+    while position < used:
+        length = _LENGTH.unpack_from(data, position)[0]
+        position += _LENGTH.size
+        key = bytes(data[position:position + length]).decode()
+        position += length + (-(_LENGTH.size + length) % 8)
+        yield key, _VALUE.unpack_from(data, position)[0], position
+        position += _VALUE.size
+
+
+# --- Registry ---
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self._collected = None  # (monotonic time, samples) of the last collector run
+        self._store = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered.")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def collector(self, function):
+        """
+        Registers a function called at scrape time that returns gauges as
+        [(name, help, labelnames, [(label values, value)])], e.g. queue depths.
+        """
+        self.collectors.append(function)
+        return function
+
+    def store(self):
+        # A forked worker must not write into its parent's file.
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    directory = settings.METRICS_DIR
+                    self._store = MmapStore(os.path.join(directory, f'{pid}.db')) if directory else MemoryStore()
+                    self._pid = pid
+        return self._store
+
+    def values(self):
+        """{metric name: {(label values, part): value}} summed over every process."""
+        directory = settings.METRICS_DIR
+        if directory:
+            self.store()  # This process has a file, even before its first observation.
+            items = []
+            for path in glob.glob(os.path.join(directory, '*.db')):
+                with open(path, 'rb') as handle:
+                    items.extend((key, value) for key, value, _ in read_entries(handle.read()))
+        else:
+            items = self.store().items()
+        totals = defaultdict(lambda: defaultdict(float))
+        for key, value in items:
+            name, label_values, part = json.loads(key)
+            totals[name][(tuple(label_values), part)] += value
+        return totals
+
+    def collect(self):
+        """
+        The gauges of every collector. They run queries, so their output is reused for
+        METRICS_COLLECTOR_TTL_SECONDS instead of being recomputed on every scrape.
+        """
+        now = time.monotonic()
+        collected = self._collected
+        if collected is None or now - collected[0] >= settings.METRICS_COLLECTOR_TTL_SECONDS:
+            collected = self._collected = (now, [gauge for collect in self.collectors for gauge in collect()])
+        return collected[1]
+
+    def render(self):
+        values = self.values()
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.extend(metric.render(values.get(name, {})))
+        for name, documentation, labelnames, samples in self.collect():
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} gauge')
+            lines.extend(f'{name}{_labels(labelnames, label_values)} {_number(value)}' for label_values, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _number(value):
+    if value == INF:
+        return '+Inf'
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY = Registry()
+
+
+# --- Metric types ---
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        registry.register(self)
+
+    def _key(self, labels, part=''):
+        return json.dumps([self.name, [str(labels[name]) for name in self.labelnames], part])
+
+    def _header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.registry.store().add(self._key(labels), amount)
+
+    def render(self, values):
+        lines = self._header()
+        for (label_values, _), value in sorted(values.items()):
+            lines.append(f'{self.name}{_labels(self.labelnames, label_values)} {_number(value)}')
+        return lines
+
+
+class Histogram(_Metric):
+    """Bucket counts are stored per bucket and made cumulative when rendered."""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets)) if INF in buckets else tuple(sorted(buckets)) + (INF,)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        store = self.registry.store()
+        store.add(self._key(labels, _number(self.buckets[bisect_left(self.buckets, value)])), 1)
+        store.add(self._key(labels, 'sum'), value)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self, values):
+        series = defaultdict(dict)
+        for (label_values, part), value in values.items():
+            series[label_values][part] = value
+        lines = self._header()
+        names = self.labelnames + ('le',)
+        for label_values, parts in sorted(series.items()):
+            count = 0
+            for bound in self.buckets:
+                bound = _number(bound)
+                count += parts.get(bound, 0)
+                lines.append(f'{self.name}_bucket{_labels(names, label_values + (bound,))} {_number(count)}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, label_values)} {_number(parts.get("sum", 0))}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, label_values)} {_number(count)}')
+        return lines
+
+
+# --- Metrics ---
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time spent producing a response.', ['view', 'action', 'method'],
+)
+RESPONSES = Counter('http_responses_total', 'Responses by status code.', ['view', 'action', 'method', 'status'])
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL statements run per request.', ['view', 'action'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+DB_QUERY_DURATION = Counter('db_query_duration_seconds_total', 'Time spent in SQL while handling requests.', ['view', 'action'])
+CACHE_REQUESTS = Counter('cache_requests_total', 'Cache lookups by result (hit or miss).', ['result'])
+EXPORT_DURATION = Histogram(
+    'export_duration_seconds', 'Time spent rendering an application export.', ['format'],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+TASK_DURATION = Histogram(
+    'celery_task_duration_seconds', 'Run time of Celery tasks.', ['task'],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+TASK_FAILURES = Counter('celery_task_failures_total', 'Celery tasks that raised.', ['task'])
+
+
+@REGISTRY.collector
+def queue_depths():
+    from django.db.models import Count
+    from apps.applications.models import ApplicationTask
+    from apps.support.models import SupportTicket
+
+    tasks = ApplicationTask.objects.values_list('status').annotate(depth=Count('pk')).order_by()
+    tickets = SupportTicket.objects.values_list('status').annotate(depth=Count('pk')).order_by()
+    return [
+        ('workbench_tasks', 'Review tasks by status.', ('status',), [((status,), depth) for status, depth in tasks]),
+        ('support_tickets', 'Support tickets by status.', ('status',), [((status,), depth) for status, depth in tickets]),
+    ]
+
+
+def view_labels(request):
+    """(view, action) of a resolved request: the view class and, for viewsets, the action."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched', ''
+    view = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+    actions = getattr(match.func, 'actions', None) or {}
+    return (view.__name__ if view else match.func.__name__), actions.get(request.method.lower(), '')
@@ -0,0 +1,184 @@
+# apps/core/middleware.py
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.storage import default_storage
+from rest_framework.permissions import SAFE_METHODS
+
+from . import metrics, profiling, replicas, slow_queries
+from .instrumentation import QueryRecorder, record_queries, shorten_sql
+
+logger = logging.getLogger(__name__)
+
+
+def _timing_description(text):
+    """Server-Timing descriptions are quoted strings of visible ASCII."""
+    text = text.encode('ascii', 'replace').decode().replace('\\', '\\\\').replace('"', "'")
+    return f'"{text}"'
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Measures every request: wall time, number and total time of SQL statements, the
+    slowest statements and statements repeated often enough to look like an N+1.
+
+    Staff receive the figures in a `Server-Timing` header, which browser dev tools
+    show next to the request. Slow requests, and a sample of the others, are logged
+    as one JSON line, and statements over SLOW_QUERY_THRESHOLD_MS go to the slow
+    query log, and the figures feed the /metrics histograms. When
+    REQUEST_INSTRUMENTATION_ENABLED is off the middleware removes itself at startup
+    and costs nothing.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_INSTRUMENTATION_LOG_SAMPLE_RATE
+        self.slow_request_ms = settings.REQUEST_INSTRUMENTATION_SLOW_REQUEST_MS
+        self.slow_query_ms = settings.REQUEST_INSTRUMENTATION_SLOW_QUERY_MS
+        self.duplicate_threshold = settings.REQUEST_INSTRUMENTATION_DUPLICATE_THRESHOLD
+        self.keep_slowest = settings.REQUEST_INSTRUMENTATION_TOP_QUERIES
+        self.metrics_enabled = settings.METRICS_ENABLED
+        self.slow_query_threshold = (
+            settings.SLOW_QUERY_THRESHOLD_MS / 1000 if settings.SLOW_QUERY_CAPTURE_ENABLED else None
+        )
+
+    def __call__(self, request):
+        recorder = QueryRecorder(keep_slowest=self.keep_slowest, slow_threshold=self.slow_query_threshold)
+        started = time.perf_counter()
+        with record_queries(recorder):
+            response = self.get_response(request)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        # DRF copies the user it authenticated (JWT) back onto the Django request.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated and user.is_staff:
+            response['Server-Timing'] = self._server_timing(recorder, elapsed_ms)
+        if elapsed_ms >= self.slow_request_ms or random.random() < self.sample_rate:
+            self._log(request, response, user, recorder, elapsed_ms)
+        if recorder.slow:
+            self._record_slow_queries(request, recorder)
+        if self.metrics_enabled:
+            self._observe(request, response, recorder, elapsed_ms)
+        return response
+
+    def _observe(self, request, response, recorder, elapsed_ms):
+        view, action = metrics.view_labels(request)
+        metrics.REQUEST_DURATION.observe(elapsed_ms / 1000, view=view, action=action, method=request.method)
+        metrics.RESPONSES.inc(view=view, action=action, method=request.method, status=response.status_code)
+        metrics.REQUEST_QUERIES.observe(recorder.count, view=view, action=action)
+        metrics.DB_QUERY_DURATION.inc(recorder.duration, view=view, action=action)
+
+    def _record_slow_queries(self, request, recorder):
+        match = getattr(request, 'resolver_match', None)
+        try:
+            slow_queries.schedule_record(recorder.slow, route=match.route if match else request.path)
+        except Exception:
+            logger.warning("[SLOW QUERY] Could not queue the slow queries of %s", request.path, exc_info=True)
+
+    def _server_timing(self, recorder, elapsed_ms):
+        metrics = [
+            f'app;dur={elapsed_ms:.1f}',
+            f'db;dur={recorder.duration * 1000:.1f};desc={_timing_description(f"{recorder.count} queries")}',
+        ]
+        for index, (duration_ms, sql) in enumerate(recorder.slowest_statements(), start=1):
+            metrics.append(f'sql-{index};dur={duration_ms:.1f};desc={_timing_description(shorten_sql(sql, 100))}')
+        for index, (count, sql) in enumerate(recorder.duplicates(self.duplicate_threshold)[:self.keep_slowest], start=1):
+            metrics.append(f'dup-{index};desc={_timing_description(f"{count}x {shorten_sql(sql, 100)}")}')
+        return ', '.join(metrics)
+
+    def _log(self, request, response, user, recorder, elapsed_ms):
+        match = getattr(request, 'resolver_match', None)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'route': match.route if match else None,
+            'status': response.status_code,
+            'user_id': user.pk if user is not None and user.is_authenticated else None,
+            'duration_ms': round(elapsed_ms, 1),
+            'queries': recorder.count,
+            'sql_ms': round(recorder.duration * 1000, 1),
+            'slow_queries': [
+                {'ms': round(duration_ms, 1), 'sql': shorten_sql(sql, 500)}
+                for duration_ms, sql in recorder.slowest_statements() if duration_ms >= self.slow_query_ms
+            ],
+            'duplicates': [
+                {'count': count, 'sql': shorten_sql(sql, 500)}
+                for count, sql in recorder.duplicates(self.duplicate_threshold)
+            ],
+        }
+        level = logging.WARNING if elapsed_ms >= self.slow_request_ms else logging.INFO
+        logger.log(level, "[REQUEST] %s", json.dumps(record, ensure_ascii=False))
+
+
+class RequestProfilerMiddleware:
+    """
+    Profiles a single request on demand. The request must carry a profiling token
+    (see apps/core/profiling.py) in the X-Profile header or the `_profile` query
+    parameter; the profile is only kept if the authenticated user is the staff member
+    the token was issued to, and the response links to it in `X-Profile-URL`.
+    Requests without a token pass straight through.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = request.META.get(profiling.HEADER)
+        if token is None and f'{profiling.QUERY_PARAMETER}=' in request.META.get('QUERY_STRING', ''):
+            token = request.GET.get(profiling.QUERY_PARAMETER)
+        payload = profiling.read_token(token) if token else None
+        if payload is None:
+            return self.get_response(request)
+
+        profiler = profiling.profiler_for(payload['mode'])
+        try:
+            profiler.start()
+        except ValueError:  # Another profiler is already active in this thread
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+
+        # The token only proves who asked for it; the request must be theirs as well.
+        user = getattr(request, 'user', None)
+        if not (user is not None and user.is_authenticated and user.is_staff and user.pk == payload['user']):
+            logger.warning("[PROFILE] Discarded the profile of %s: not requested by the token's owner", request.path)
+            return response
+        try:
+            name = profiling.save(profiler, request)
+        except Exception:
+            logger.warning("[PROFILE] Could not store the profile of %s", request.path, exc_info=True)
+            return response
+        response['X-Profile-URL'] = default_storage.url(name)
+        logger.info("[PROFILE] %s %s profiled by user %s: %s", request.method, request.path, user.pk, name)
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Pins a user to the primary database for a few seconds after a successful write,
+    so the replica-backed views show them their own changes. Only installed when a
+    replica is configured.
+    """
+
+    def __init__(self, get_response):
+        if replicas.replica_alias() is None:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                replicas.pin_to_primary(user)
+        return response
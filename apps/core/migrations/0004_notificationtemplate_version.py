@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-19 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_populate_system_lists'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationtemplate',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Bumped on every save so compiled copies can be invalidated.', verbose_name='Version'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.13 on 2026-10-19 02:46
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_notificationtemplate_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('to_email', models.EmailField(max_length=254, verbose_name='Recipient')),
+                ('from_email', models.CharField(blank=True, max_length=255, verbose_name='Sender')),
+                ('subject', models.CharField(max_length=255, verbose_name='Subject')),
+                ('body_text', models.TextField(blank=True, verbose_name='Plain-Text Body')),
+                ('body_html', models.TextField(blank=True, verbose_name='HTML Body')),
+                ('dedupe_key', models.CharField(blank=True, help_text='Messages enqueued again with the same key are dropped.', max_length=255, null=True, unique=True, verbose_name='Deduplication Key')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=10, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Next Attempt At')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Sent At')),
+            ],
+            options={
+                'verbose_name': 'Outgoing Email',
+                'verbose_name_plural': 'Outgoing Emails',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='core_outbox_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.13 on 2026-10-19 03:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, unique=True, verbose_name='Fingerprint')),
+                ('statement', models.TextField(verbose_name='Normalized Statement')),
+                ('calls', models.PositiveIntegerField(default=0, verbose_name='Slow Calls')),
+                ('total_ms', models.FloatField(default=0, verbose_name='Total Time (ms)')),
+                ('max_ms', models.FloatField(default=0, verbose_name='Slowest (ms)')),
+                ('last_route', models.CharField(blank=True, max_length=255, verbose_name='Last Route')),
+                ('first_seen', models.DateTimeField(auto_now_add=True, verbose_name='First Seen')),
+                ('last_seen', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Last Seen')),
+            ],
+            options={
+                'verbose_name': 'Slow Query',
+                'verbose_name_plural': 'Slow Queries',
+                'ordering': ['-total_ms'],
+            },
+        ),
+        migrations.CreateModel(
+            name='QueryPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plan', models.JSONField(verbose_name='Plan')),
+                ('duration_ms', models.FloatField(verbose_name='Duration When Captured (ms)')),
+                ('execution_ms', models.FloatField(blank=True, null=True, verbose_name='Execution Time in Plan (ms)')),
+                ('vendor', models.CharField(max_length=20, verbose_name='Database')),
+                ('captured_at', models.DateTimeField(auto_now_add=True)),
+                ('slow_query', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plans', to='core.slowquery')),
+            ],
+            options={
+                'verbose_name': 'Query Plan',
+                'verbose_name_plural': 'Query Plans',
+                'ordering': ['-captured_at'],
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
 # apps/core/models.py
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from mptt.models import MPTTModel, TreeForeignKey
 
@@ -50,11 +51,21 @@ class NotificationTemplate(models.Model):
     type = models.CharField(_("Type"), max_length=10, choices=TemplateType.choices)
     subject = models.CharField(_("Subject"), max_length=255, blank=True, help_text=_("For emails only."))
     body = models.TextField(_("Body"), help_text=_("Use placeholders like {{ full_name }} or {{ tracking_code }}."))
+    version = models.PositiveIntegerField(_("Version"), default=1, editable=False, help_text=_("Bumped on every save so compiled copies can be invalidated."))
     class Meta:
         verbose_name = _("Notification Template")
         verbose_name_plural = _("Notification Templates")
     def __str__(self):
         return self.name
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        # Bumped in the UPDATE itself, so concurrent saves never hand out the same version.
+        self.version = models.F('version') + 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
 
 class SystemList(models.Model):
     name = models.CharField(_("List Name"), max_length=100, unique=True, help_text=_("e.g., 'nationalities'"))
@@ -117,4 +128,86 @@ class Notification(models.Model):
         verbose_name_plural = _("Notifications")
         ordering = ['-timestamp']
     def __str__(self):
-        return f"Notification for {self.user.email}: {self.title}"
\ No newline at end of file
+        return f"Notification for {self.user.email}: {self.title}"
+class OutgoingEmail(models.Model):
+    """
+    An email waiting in the outbox. Rows are written inside the request transaction
+    and delivered in batches by the `drain_email_outbox` Celery task.
+    """
+    class StatusChoices(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        SENT = 'SENT', _('Sent')
+        FAILED = 'FAILED', _('Failed')
+    to_email = models.EmailField(_("Recipient"))
+    from_email = models.CharField(_("Sender"), max_length=255, blank=True)
+    subject = models.CharField(_("Subject"), max_length=255)
+    body_text = models.TextField(_("Plain-Text Body"), blank=True)
+    body_html = models.TextField(_("HTML Body"), blank=True)
+    dedupe_key = models.CharField(
+        _("Deduplication Key"), max_length=255, unique=True, null=True, blank=True,
+        help_text=_("Messages enqueued again with the same key are dropped.")
+    )
+    status = models.CharField(_("Status"), max_length=10, choices=StatusChoices.choices, default=StatusChoices.PENDING)
+    attempts = models.PositiveSmallIntegerField(_("Attempts"), default=0)
+    next_attempt_at = models.DateTimeField(_("Next Attempt At"), default=timezone.now)
+    last_error = models.TextField(_("Last Error"), blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(_("Sent At"), null=True, blank=True)
+    class Meta:
+        verbose_name = _("Outgoing Email")
+        verbose_name_plural = _("Outgoing Emails")
+        ordering = ['id']
+        indexes = [models.Index(fields=['status', 'next_attempt_at'], name='core_outbox_due_idx')]
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
+
+class Sequence(models.Model):
+    """
+    A named database counter. Incrementing it locks the row until the surrounding
+    transaction ends, so values are handed out in commit order.
+    """
+    name = models.CharField(_("Name"), max_length=100, unique=True)
+    value = models.BigIntegerField(_("Value"), default=0)
+    class Meta:
+        verbose_name = _("Sequence")
+        verbose_name_plural = _("Sequences")
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+class SlowQuery(models.Model):
+    """
+    Totals for one normalized SQL statement (literals and IN-lists collapsed) that
+    ran slower than SLOW_QUERY_THRESHOLD_MS. Filled in by the request instrumentation.
+    """
+    fingerprint = models.CharField(_("Fingerprint"), max_length=40, unique=True)
+    statement = models.TextField(_("Normalized Statement"))
+    calls = models.PositiveIntegerField(_("Slow Calls"), default=0)
+    total_ms = models.FloatField(_("Total Time (ms)"), default=0)
+    max_ms = models.FloatField(_("Slowest (ms)"), default=0)
+    last_route = models.CharField(_("Last Route"), max_length=255, blank=True)
+    first_seen = models.DateTimeField(_("First Seen"), auto_now_add=True)
+    last_seen = models.DateTimeField(_("Last Seen"), default=timezone.now)
+    class Meta:
+        verbose_name = _("Slow Query")
+        verbose_name_plural = _("Slow Queries")
+        ordering = ['-total_ms']
+    def __str__(self):
+        return f"{self.fingerprint[:12]} ({self.calls} calls, {self.total_ms:.0f} ms)"
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.calls if self.calls else 0
+
+class QueryPlan(models.Model):
+    """An execution plan of a slow statement, captured out-of-band with EXPLAIN."""
+    slow_query = models.ForeignKey(SlowQuery, on_delete=models.CASCADE, related_name="plans")
+    plan = models.JSONField(_("Plan"))
+    duration_ms = models.FloatField(_("Duration When Captured (ms)"))
+    execution_ms = models.FloatField(_("Execution Time in Plan (ms)"), null=True, blank=True)
+    vendor = models.CharField(_("Database"), max_length=20)
+    captured_at = models.DateTimeField(auto_now_add=True)
+    class Meta:
+        verbose_name = _("Query Plan")
+        verbose_name_plural = _("Query Plans")
+        ordering = ['-captured_at']
+    def __str__(self):
+        return f"Plan of {self.slow_query.fingerprint[:12]} at {self.captured_at:%Y-%m-%d %H:%M}"
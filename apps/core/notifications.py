@@ -0,0 +1,125 @@
+# apps/core/notifications.py
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.db import transaction
+from django.template import Context, engines
+
+from .mail import enqueue_emails
+from .models import Notification, NotificationTemplate
+
+RenderedMessage = namedtuple('RenderedMessage', ['subject', 'body'])
+
+
+class TemplateRenderer:
+    """
+    Compiles NotificationTemplate rows once and renders them for many recipients.
+    Compiled templates are cached per (id, version), so editing a template in the
+    settings UI invalidates its cached copy without any explicit cache clearing.
+    """
+
+    def __init__(self, max_templates=128):
+        self.max_templates = max_templates
+        self._compiled = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, template):
+        key = (template.pk, template.version)
+        with self._lock:
+            compiled = self._compiled.get(key)
+            if compiled is not None:
+                self._compiled.move_to_end(key)
+                self.hits += 1
+                return compiled
+
+        engine = engines['django'].engine
+        compiled = (engine.from_string(template.subject or ''), engine.from_string(template.body))
+        with self._lock:
+            self.misses += 1
+            self._compiled[key] = compiled
+            if len(self._compiled) > self.max_templates:
+                self._compiled.popitem(last=False)
+        return compiled
+
+    def render_many(self, template, contexts):
+        """Renders (subject, body) for each context dict in `contexts`."""
+        subject_template, body_template = self.compile(template)
+        # Subjects are plain text (an email header or a notification title), never escaped.
+        # HTML escaping only makes sense for email bodies; SMS text is sent verbatim.
+        subject_context = Context(autoescape=False)
+        body_context = Context(autoescape=template.type == NotificationTemplate.TemplateType.EMAIL)
+        rendered = []
+        for values in contexts:
+            with subject_context.push(values), body_context.push(values):
+                rendered.append(RenderedMessage(
+                    subject_template.render(subject_context).strip(),
+                    body_template.render(body_context),
+                ))
+        return rendered
+
+
+renderer = TemplateRenderer()
+
+
+def recipient_context(user, extra=None):
+    """Base placeholders available to every template, overridable per recipient."""
+    context = {'full_name': user.full_name or user.email, 'email': user.email}
+    if extra:
+        context.update(extra)
+    return context
+
+
+def _batches(items, batch_size):
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+
+def notify_users(template_name, recipients, link='', batch_size=500):
+    """
+    Creates in-app notifications for many users from a single template.
+    `recipients` is a list of (user, extra_context) pairs. Rows are written with
+    bulk_create in batches and pushed to the event stream on commit, since
+    bulk_create does not fire post_save.
+    """
+    from .signals import publish_notification
+
+    template = NotificationTemplate.objects.get(name=template_name)
+    recipients = list(recipients)
+    rendered = renderer.render_many(template, [recipient_context(user, extra) for user, extra in recipients])
+
+    created = []
+    for batch in _batches(list(zip(recipients, rendered)), batch_size):
+        notifications = Notification.objects.bulk_create([
+            Notification(user=user, title=message.subject or template.name, message=message.body, link=link)
+            for (user, _), message in batch
+        ])
+        created.extend(notifications)
+
+    def publish_created():
+        for notification in created:
+            if notification.pk is not None:
+                publish_notification(notification)
+    transaction.on_commit(publish_created)
+    return created
+
+
+def queue_template_emails(template_name, recipients, dedupe_prefix=None):
+    """
+    Renders an EMAIL template for each (user, extra_context) pair and adds the
+    messages to the email outbox, which delivers them in batches over one connection.
+    With `dedupe_prefix`, re-queuing the same template for the same user is a no-op.
+    """
+    template = NotificationTemplate.objects.get(name=template_name, type=NotificationTemplate.TemplateType.EMAIL)
+    recipients = list(recipients)
+    rendered = renderer.render_many(template, [recipient_context(user, extra) for user, extra in recipients])
+    return enqueue_emails([
+        {
+            'to_email': user.email,
+            'subject': message.subject,
+            'body_html': message.body,
+            'dedupe_key': f"{dedupe_prefix}:{user.pk}" if dedupe_prefix else None,
+        }
+        for (user, _), message in zip(recipients, rendered)
+    ])
@@ -0,0 +1,135 @@
+# apps/core/profiling.py
+"""
+On-demand profiles of single requests. A staff member asks for a short-lived token
+(POST /api/v1/choices/profiling/token/) and repeats a slow request with it in the
+X-Profile header or the `_profile` query parameter; the response links to the profile.
+"""
+import cProfile
+import marshal
+import os
+import sys
+import threading
+import uuid
+from collections import Counter
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.text import slugify
+
+SIGNING_SALT = 'apps.core.profiling'
+PROFILES_DIR = 'profiles/'
+HEADER = 'HTTP_X_PROFILE'
+QUERY_PARAMETER = '_profile'
+MODES = ('cprofile', 'sample')
+
+
+# --- Tokens ---
+def issue_token(user, mode='cprofile'):
+    """A token that lets `user` profile their own requests for PROFILING_TOKEN_TTL_SECONDS."""
+    return signing.dumps({'user': user.pk, 'mode': mode}, salt=SIGNING_SALT)
+
+
+def read_token(token):
+    """Returns {'user', 'mode'} for a valid token, or None. Uses only SECRET_KEY."""
+    try:
+        payload = signing.loads(token, salt=SIGNING_SALT, max_age=settings.PROFILING_TOKEN_TTL_SECONDS)
+    except signing.BadSignature:  # Includes SignatureExpired
+        return None
+    if not isinstance(payload, dict) or payload.get('mode') not in MODES:
+        return None
+    return payload
+
+
+# --- Profilers ---
+class DeterministicProfiler:
+    """cProfile: every call is counted. The result opens in snakeviz, pstats or gprof2dot."""
+    extension = 'prof'
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def output(self):
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)
+
+
+@lru_cache(maxsize=4096)
+def _source(filename):
+    for root in sorted(sys.path, key=len, reverse=True):
+        if root and filename.startswith(root + os.sep):
+            return filename[len(root) + 1:]
+    return filename
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of the request's thread from a second thread. It barely slows the
+    request down and produces collapsed stacks for flamegraph.pl, speedscope or inferno.
+    """
+    extension = 'collapsed'
+
+    def __init__(self, interval=None):
+        self.interval = (interval if interval is not None else settings.PROFILING_SAMPLE_INTERVAL_MS) / 1000
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._sampler.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._sampler.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({_source(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def output(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common()).encode()
+
+
+def profiler_for(mode):
+    return SamplingProfiler() if mode == 'sample' else DeterministicProfiler()
+
+
+# --- Storage ---
+def save(profiler, request):
+    """Stores a finished profile under `profiles/` and returns its name in storage."""
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+    slug = slugify(request.path.replace('/', '-'))[:60] or 'root'
+    name = f'{PROFILES_DIR}{stamp}-{request.method.lower()}-{slug}-{uuid.uuid4().hex[:8]}.{profiler.extension}'
+    return default_storage.save(name, ContentFile(profiler.output()))
+
+
+def purge_expired():
+    """Deletes stored profiles older than PROFILING_RETENTION_HOURS. Returns how many."""
+    if not default_storage.exists(PROFILES_DIR):
+        return 0
+    cutoff = timezone.now() - timedelta(hours=settings.PROFILING_RETENTION_HOURS)
+    removed = 0
+    for filename in default_storage.listdir(PROFILES_DIR)[1]:
+        name = f'{PROFILES_DIR}{filename}'
+        if default_storage.get_modified_time(name) < cutoff:
+            default_storage.delete(name)
+            removed += 1
+    return removed
@@ -0,0 +1,164 @@
+# apps/core/purge.py
+"""
+Bulk deletes that never load the rows they remove. `Purger.purge(queryset)` follows
+the same relations as Django's deletion collector, but every step is a batched
+`DELETE ... WHERE id IN (SELECT id ... LIMIT n)` or `UPDATE ... SET fk = NULL`, run
+children first, so memory stays flat however many rows go. Wiping whole tables on
+PostgreSQL uses a single TRUNCATE when that is equivalent.
+
+Model signals (pre_delete/post_delete) are not sent and stored files are left alone.
+"""
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import CASCADE, DO_NOTHING, PROTECT, RESTRICT, SET_NULL, ProtectedError
+from django.db.models.deletion import get_candidate_relations_to_delete
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def _relations(model):
+    """(referencing model, foreign key, on_delete) of every relation pointing at `model`."""
+    for relation in get_candidate_relations_to_delete(model._meta):
+        yield relation.related_model, relation.field, relation.field.remote_field.on_delete
+
+
+def _label(model):
+    return model._meta.label
+
+
+class Purger:
+    """
+    Deletes querysets and everything that cascades from them. `progress(label, rows,
+    action)` is called after every batch with the running total for that model;
+    `deleted` holds the totals, as {model label: rows}.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, progress=None, using=DEFAULT_DB_ALIAS, truncate=True):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.using = using
+        self.truncate = truncate
+        self.deleted = Counter()
+        self.updated = Counter()
+
+    def purge(self, queryset):
+        """Deletes the rows of `queryset` and their dependents. Returns rows deleted, or None after a TRUNCATE."""
+        queryset = queryset.using(self.using)
+        before = sum(self.deleted.values())
+        tables = self._truncatable(queryset)
+        if tables:
+            self._truncate(tables)
+            return None
+        for step in self._plan(queryset, path=()):
+            step()
+        return sum(self.deleted.values()) - before
+
+    # --- Planning ---
+    def _plan(self, queryset, path):
+        """
+        Returns the statements that remove `queryset`, dependents first, as callables.
+        PROTECT and RESTRICT relations are checked here, before anything is deleted.
+        """
+        model = queryset.model
+        if model in path:
+            raise ValueError(f"Cannot purge {_label(model)}: its relations form a cycle through {', '.join(map(_label, path))}.")
+        steps = []
+        relations = list(_relations(model))
+        for related_model, field, on_delete in relations:
+            if related_model is model and on_delete is CASCADE:
+                queryset = self._with_descendants(queryset, field)
+                if field.null:
+                    # Every row in scope goes, so unlinking them first lets batches run in any order.
+                    steps.append(self._updater(queryset.filter(**{f'{field.name}__isnull': False}), field))
+        for related_model, field, on_delete in relations:
+            if related_model is model and on_delete is CASCADE:
+                continue
+            related = related_model._base_manager.using(self.using).filter(**{f'{field.name}__in': queryset})
+            if on_delete is CASCADE:
+                steps.extend(self._plan(related, path + (model,)))
+            elif on_delete is SET_NULL:
+                steps.append(self._updater(related, field))
+            elif on_delete in (PROTECT, RESTRICT):
+                if related.exists():
+                    raise ProtectedError(
+                        f"Cannot purge {_label(model)}: referenced by {_label(related_model)}.{field.name}.", set(),
+                    )
+            elif on_delete is not DO_NOTHING:
+                raise ValueError(f"{_label(related_model)}.{field.name}: on_delete={on_delete.__name__} is not supported.")
+        steps.append(lambda: self._delete(queryset))
+        return steps
+
+    def _with_descendants(self, queryset, field):
+        """
+        A self-referencing CASCADE takes the rows below the selected ones along. Only
+        here are ids held in memory, level by level, as Django's collector would.
+        """
+        model = queryset.model
+        manager = model._base_manager.using(self.using)
+        selected = set(queryset.values_list('pk', flat=True))
+        frontier = selected
+        while frontier:
+            frontier = set(manager.filter(**{f'{field.name}__in': frontier}).values_list('pk', flat=True)) - selected
+            selected |= frontier
+        return manager.filter(pk__in=selected)
+
+    # --- Statements ---
+    def _batches(self, queryset, statement):
+        model = queryset.model
+        manager = model._base_manager.using(self.using)
+        while True:
+            with transaction.atomic(using=self.using):
+                rows = statement(manager.filter(pk__in=queryset.values('pk')[:self.batch_size]))
+            if not rows:
+                return
+            yield rows
+
+    def _delete(self, queryset):
+        label = _label(queryset.model)
+        for rows in self._batches(queryset, lambda batch: batch._raw_delete(self.using)):
+            self.deleted[label] += rows
+            self._report(label, self.deleted[label], 'deleted')
+
+    def _updater(self, queryset, field):
+        def update():
+            label = f'{_label(queryset.model)}.{field.name}'
+            # Rows leave the queryset once their key is NULL, so the batches run out.
+            for rows in self._batches(queryset, lambda batch: batch.update(**{field.name: None})):
+                self.updated[label] += rows
+                self._report(label, self.updated[label], 'set to NULL')
+        return update
+
+    def _report(self, label, rows, action):
+        if self.progress is not None:
+            self.progress(label, rows, action)
+
+    # --- TRUNCATE ---
+    def _truncatable(self, queryset):
+        """
+        The models to TRUNCATE when `queryset` is a whole table on PostgreSQL and every
+        table referencing it (recursively) would be emptied by the cascade anyway;
+        otherwise None.
+        """
+        if not self.truncate or connections[self.using].vendor != 'postgresql' or queryset.query.where:
+            return None
+        tables, pending = [], [queryset.model]
+        while pending:
+            model = pending.pop()
+            if model in tables:
+                continue
+            tables.append(model)
+            for related_model, field, on_delete in _relations(model):
+                # A nullable key can hold rows that reference nothing, which a delete would keep.
+                if on_delete is not CASCADE or (field.null and related_model is not model):
+                    return None
+                pending.append(related_model)
+        return tables
+
+    def _truncate(self, models):
+        connection = connections[self.using]
+        names = ', '.join(connection.ops.quote_name(model._meta.db_table) for model in models)
+        with transaction.atomic(using=self.using), connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {names}')
+        for model in models:
+            self._report(_label(model), None, 'truncated')
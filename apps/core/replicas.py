@@ -0,0 +1,109 @@
+# apps/core/replicas.py
+"""
+Read-replica routing. Reads go to the primary unless a view opts in with
+ReplicaReadMixin, so only read-only traffic that tolerates a little replication lag
+(lists, exports, reports, dashboard counts, reference data) moves to the replica.
+A user who has just written is pinned to the primary for REPLICA_PIN_SECONDS, so
+they always see their own changes.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_alias():
+    """The configured replica's alias, or None when there is none."""
+    alias = settings.REPLICA_DATABASE
+    if not alias or alias not in connections.settings:
+        return None
+    if alias != DEFAULT_DB_ALIAS and _same_database(alias, DEFAULT_DB_ALIAS):
+        # A TEST MIRROR under the test runner: a second connection to the primary's database,
+        # which cannot see the rows of the test's transaction. Only used when a test asks for it.
+        return alias if settings.REPLICA_ROUTE_TEST_MIRROR else None
+    return alias
+
+
+def _same_database(alias, other):
+    keys = ('ENGINE', 'NAME', 'HOST', 'PORT')
+    return all(connections[alias].settings_dict.get(key) == connections[other].settings_dict.get(key) for key in keys)
+
+
+class ReplicaRouter:
+    """Sends reads to the replica inside `replica_reads()`; everything else uses the primary."""
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both databases hold the same rows, so objects read from either may be related.
+        databases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema through replication.
+        return db != replica_alias()
+
+
+@contextmanager
+def replica_reads():
+    """Routes the reads of the block to the replica, when one is configured."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+# --- Read-your-writes ---
+def _pin_key(user):
+    return f'replicas:pinned:{user.pk}'
+
+
+def pin_to_primary(user):
+    """Keeps `user` on the primary for REPLICA_PIN_SECONDS, until the replica has caught up."""
+    cache.set(_pin_key(user), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user):
+    return bool(user and user.is_authenticated and cache.get(_pin_key(user)))
+
+
+# --- Views ---
+class ReplicaReadMixin:
+    """
+    Serves GET and HEAD requests of a view from the replica. On viewsets, only the
+    actions listed in `replica_actions` are; other actions keep reading the primary.
+    Authentication and permission checks always read the primary.
+    """
+    replica_actions = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self._reads_from_replica(request):
+            self._replica_token = _replica_reads.set(True)
+
+    def _reads_from_replica(self, request):
+        if request.method not in SAFE_METHODS or replica_alias() is None or is_pinned(request.user):
+            return False
+        return self.replica_actions is None or getattr(self, 'action', None) in self.replica_actions
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            token = self.__dict__.pop('_replica_token', None)
+            if token is not None:
+                _replica_reads.reset(token)
@@ -98,4 +98,16 @@ class ReportGenerator:
                 .values('country_of_residence')
                 .annotate(count=Count('id'))
                 .order_by('-count')[:limit] # Limit to top N for cleaner charts
-        }
\ No newline at end of file
+        }
+
+    def get_sections(self, group_by='day'):
+        """
+        The report datasets as {key: callable}, evaluated when called, so that
+        `apps.core.sections.run_sections` can run the queries concurrently.
+        """
+        return {
+            'applications_by_type': self.get_applications_by_type,
+            'applications_over_time': lambda: list(self.get_applications_over_time(group_by=group_by)),
+            'status_distribution': self.get_status_distribution,
+            'top_countries': self.get_top_countries,
+        }
@@ -0,0 +1,77 @@
+# apps/core/sections.py
+"""
+Concurrent sections for read endpoints that assemble independent queries (dashboard
+counts, report datasets). Under ASGI the sections of a request are awaited together
+on the worker's event loop, each running on a thread of a small pool with a database
+connection of its own, so the endpoint takes as long as its slowest query instead of
+the sum of them. SECTION_POOL_SIZE bounds the extra connections a worker opens.
+
+Under WSGI, inside a transaction (other connections could not see its rows) or with
+SECTION_POOL_SIZE = 0, the sections run one after another on the request's connection.
+Queries run on the pool are not counted by the request instrumentation.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, connection
+
+_pool = None
+_pool_pid = None
+_lock = threading.Lock()
+
+
+def pool():
+    """The worker's section threads; a forked worker starts a pool of its own."""
+    global _pool, _pool_pid
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadPoolExecutor(max_workers=settings.SECTION_POOL_SIZE, thread_name_prefix='sections')
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _run(section):
+    # Pool threads keep their connection between requests for CONN_MAX_AGE, as request threads do.
+    close_old_connections()
+    try:
+        return section()
+    finally:
+        close_old_connections()
+
+
+async def gather(sections):
+    """Runs the callables of `sections` ({key: callable}) concurrently on the pool; returns {key: result}."""
+    executor = pool()
+    results = await asyncio.gather(*(
+        sync_to_async(_run, thread_sensitive=False, executor=executor)(section) for section in sections.values()
+    ))
+    return dict(zip(sections, results))
+
+
+def is_concurrent(request):
+    request = getattr(request, '_request', request)
+    return bool(settings.SECTION_POOL_SIZE) and isinstance(request, ASGIRequest) and not connection.in_atomic_block
+
+
+def run_sections(request, sections):
+    """{key: result} of every section, concurrently when `request` is served by ASGI."""
+    if is_concurrent(request):
+        return async_to_sync(gather)(sections)
+    return {key: section() for key, section in sections.items()}
+
+
+def nest(results):
+    """Turns {('a', 'b'): value} into {'a': {'b': value}}; one-part keys stay at the top."""
+    nested = {}
+    for key, value in results.items():
+        *groups, name = key
+        target = nested
+        for group in groups:
+            target = target.setdefault(group, {})
+        target[name] = value
+    return nested
@@ -0,0 +1,25 @@
+# apps/core/sequences.py
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Sequence
+
+
+def next_value(name, step=1):
+    """
+    Advances the named sequence by `step` and returns the new value.
+
+    The row stays locked until the caller's transaction commits or rolls back,
+    so concurrent callers receive values in the order their transactions commit.
+    Call it as late as possible in a transaction to keep that lock short.
+    """
+    with transaction.atomic():
+        if not Sequence.objects.filter(name=name).update(value=F('value') + step):
+            try:
+                with transaction.atomic():
+                    Sequence.objects.create(name=name, value=step)
+                    return step
+            except IntegrityError:
+                # Another transaction created the row first; fall back to incrementing it.
+                Sequence.objects.filter(name=name).update(value=F('value') + step)
+        return Sequence.objects.filter(name=name).values_list('value', flat=True).get()
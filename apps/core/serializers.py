@@ -26,7 +26,8 @@ class OrganizationUnitSerializer(serializers.ModelSerializer):
 class NotificationTemplateSerializer(serializers.ModelSerializer):
     class Meta:
         model = NotificationTemplate
-        fields = ['id', 'name', 'type', 'subject', 'body']
+        fields = ['id', 'name', 'type', 'subject', 'body', 'version']
+        read_only_fields = ['version']
 
 class SystemListSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,45 @@
+# apps/core/signals.py
+import time
+
+from celery.signals import task_failure, task_postrun, task_prerun
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .events import publish_event
+from .metrics import TASK_DURATION, TASK_FAILURES
+from .models import Notification
+
+
+def publish_notification(notification):
+    """Pushes a notification to the recipient's open event streams."""
+    from .serializers import NotificationSerializer
+    publish_event([notification.user_id], 'notification', NotificationSerializer(notification).data)
+
+
+@receiver(post_save, sender=Notification)
+def on_notification_save(sender, instance, created, **kwargs):
+    """Streams newly created notifications once the creating transaction commits."""
+    if created:
+        transaction.on_commit(lambda: publish_notification(instance))
+
+
+# --- Celery task metrics ---
+_task_started = {}
+
+
+@task_prerun.connect
+def on_task_start(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def on_task_finish(task_id=None, task=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_DURATION.observe(time.perf_counter() - started, task=task.name)
+
+
+@task_failure.connect
+def on_task_failure(sender=None, **kwargs):
+    TASK_FAILURES.inc(task=sender.name)
@@ -0,0 +1,160 @@
+# apps/core/slow_queries.py
+import hashlib
+import json
+import logging
+import random
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import QueryPlan, SlowQuery
+from .replicas import replica_alias
+
+logger = logging.getLogger(__name__)
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LISTS = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+_EXPLAINABLE = re.compile(r'^\s*(?:SELECT|WITH)\b', re.IGNORECASE)
+# Row locks taken by EXPLAIN ANALYZE would block the writers that hold them in production.
+_LOCKING = re.compile(r'\bFOR\s+(?:NO\s+KEY\s+|KEY\s+)?(?:UPDATE|SHARE)\b', re.IGNORECASE)
+
+
+def is_explainable(sql):
+    """Plain reads only: EXPLAIN ANALYZE runs the statement, so writes and locking reads are skipped."""
+    return bool(_EXPLAINABLE.match(sql)) and not _LOCKING.search(sql)
+
+
+# --- Fingerprints ---
+def normalize(sql):
+    """
+    Reduces a statement to its shape: literals become `?` and IN-lists of any length
+    become `(...)`, so `pk IN (1, 2)` and `pk IN (3, 4, 5)` share a fingerprint.
+    """
+    sql = _STRINGS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _PLACEHOLDER_LISTS.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint(statement):
+    return hashlib.sha1(statement.encode()).hexdigest()
+
+
+# --- Recording ---
+def _json_params(params):
+    # Dates, UUIDs and decimals travel as strings; the database casts them back.
+    return json.loads(json.dumps(params, cls=DjangoJSONEncoder)) if params is not None else None
+
+
+def schedule_record(captured, route=''):
+    """
+    Hands the slow statements of one request to a Celery task, so recording them
+    adds no queries or row locks to the request itself.
+    """
+    from .tasks import record_slow_queries
+
+    captured = [(sql, _json_params(params), seconds) for sql, params, seconds in captured]
+    try:
+        record_slow_queries.delay(captured, route[:255])
+    except Exception:
+        logger.warning("[SLOW QUERY] Could not schedule recording of %s slow statements", len(captured))
+
+
+def record(captured, route=''):
+    """
+    Adds the slow statements of one request, [(sql, params, seconds)], to their
+    fingerprints' totals and queues an EXPLAIN for a sample of them. Runs in the
+    record_slow_queries task.
+    """
+    now = timezone.now()
+    for sql, params, seconds in captured:
+        statement = normalize(sql)
+        key = fingerprint(statement)
+        duration_ms = seconds * 1000
+        changes = dict(
+            calls=F('calls') + 1, total_ms=F('total_ms') + duration_ms, max_ms=Greatest('max_ms', duration_ms),
+            last_route=route[:255], last_seen=now,
+        )
+        with transaction.atomic():
+            if not SlowQuery.objects.filter(fingerprint=key).update(**changes):
+                try:
+                    with transaction.atomic():
+                        SlowQuery.objects.create(
+                            fingerprint=key, statement=statement, calls=1, total_ms=duration_ms,
+                            max_ms=duration_ms, last_route=route[:255], last_seen=now,
+                        )
+                except IntegrityError:
+                    SlowQuery.objects.filter(fingerprint=key).update(**changes)
+        if _should_explain(sql, key, now):
+            _schedule_explain(key, sql, params, duration_ms)
+
+
+def _should_explain(sql, key, now):
+    if not is_explainable(sql) or random.random() >= settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+        return False
+    recent = now - timedelta(minutes=settings.SLOW_QUERY_EXPLAIN_INTERVAL_MINUTES)
+    return not QueryPlan.objects.filter(slow_query__fingerprint=key, captured_at__gte=recent).exists()
+
+
+def _schedule_explain(key, sql, params, duration_ms):
+    from .tasks import explain_slow_query
+
+    try:
+        explain_slow_query.delay(key, sql, _json_params(params), duration_ms)
+    except Exception:
+        logger.warning("[SLOW QUERY] Could not schedule EXPLAIN for %s", key[:12])
+
+
+# --- Plans ---
+def _run_explain(connection, sql, params):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL statement_timeout = %s', [settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS])
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            return plan, plan[0].get('Execution Time')
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [list(row) for row in cursor.fetchall()], None
+        cursor.execute(f'EXPLAIN {sql}', params)
+        return [list(row) for row in cursor.fetchall()], None
+
+
+def explain(key, sql, params, duration_ms, using=None):
+    """
+    Captures the plan of a slow statement on a connection of its own, inside a
+    transaction that is always rolled back: EXPLAIN ANALYZE really runs the statement.
+    Only SELECTs without FOR UPDATE/SHARE are explained, on the replica when one is
+    configured. Returns the stored QueryPlan, or None.
+    """
+    slow_query = SlowQuery.objects.filter(fingerprint=key).first()
+    if slow_query is None or not is_explainable(sql):
+        return None
+    connection = connections.create_connection(using or replica_alias() or DEFAULT_DB_ALIAS)
+    try:
+        connection.set_autocommit(False)
+        try:
+            plan, execution_ms = _run_explain(connection, sql, params)
+        finally:
+            connection.rollback()
+    except Exception:
+        logger.warning("[SLOW QUERY] EXPLAIN failed for %s", key[:12], exc_info=True)
+        return None
+    finally:
+        connection.close()
+
+    stored = QueryPlan.objects.create(
+        slow_query=slow_query, plan=plan, duration_ms=duration_ms, execution_ms=execution_ms, vendor=connection.vendor,
+    )
+    stale = slow_query.plans.values_list('pk', flat=True)[settings.SLOW_QUERY_MAX_PLANS:]
+    QueryPlan.objects.filter(pk__in=list(stale)).delete()
+    return stored
@@ -0,0 +1,23 @@
+# apps/core/storage.py
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.urls import reverse
+
+from .downloads import sign
+
+
+class ProtectedMediaStorage(FileSystemStorage):
+    """
+    Media storage whose URLs are short-lived signed links to the protected download
+    endpoint instead of public MEDIA_URL paths. Anyone who can see a record through
+    the API gets a working link; the link itself is checked without a database query.
+    """
+
+    def url(self, name):
+        if not settings.PROTECTED_MEDIA_SIGNED_URLS:
+            return super().url(name)
+        expires, signature = sign(name)
+        query = urlencode({'expires': expires, 'signature': signature})
+        return f"{reverse('signed-file', kwargs={'name': name})}?{query}"
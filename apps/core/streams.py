@@ -0,0 +1,154 @@
+# apps/core/streams.py
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .events import get_broadcaster
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = '/api/v1/stream/'
+
+
+@sync_to_async
+def authenticate_scope(scope):
+    """
+    Resolves the user id for a stream request from a JWT access token.
+    Browsers' EventSource cannot set headers, so `?token=` is accepted as well as
+    the usual `Authorization: Bearer` header.
+    """
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+
+    headers = dict(scope.get('headers') or [])
+    raw_token = None
+    auth_header = headers.get(b'authorization', b'').decode()
+    if auth_header.lower().startswith('bearer '):
+        raw_token = auth_header.split(' ', 1)[1].strip()
+    if not raw_token:
+        raw_token = _query_params(scope).get('token')
+    if not raw_token:
+        return None
+
+    authentication = JWTAuthentication()
+    try:
+        user = authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return user.pk if user.is_active else None
+
+
+def _query_params(scope):
+    query = parse_qs(scope.get('query_string', b'').decode())
+    return {key: values[-1] for key, values in query.items()}
+
+
+def _last_event_id(scope):
+    headers = dict(scope.get('headers') or [])
+    value = headers.get(b'last-event-id', b'').decode() or _query_params(scope).get('last_event_id')
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def format_event(message):
+    """Serializes a broadcaster message into the text/event-stream wire format."""
+    payload = json.dumps(message['data'], separators=(',', ':'), default=str)
+    return f"id: {message['id']}\nevent: {message['event']}\ndata: {payload}\n\n".encode()
+
+
+class EventStreamApp:
+    """
+    ASGI application streaming a user's notifications and workbench changes as
+    Server-Sent Events. It is mounted in front of Django in `asgi.py` so that
+    long-lived connections never occupy a Django request handler.
+    """
+
+    def __init__(self, broadcaster=None, authenticate=authenticate_scope, keepalive=None):
+        self._broadcaster = broadcaster
+        self.authenticate = authenticate
+        self.keepalive = keepalive or getattr(settings, 'EVENT_STREAM_KEEPALIVE_SECONDS', 15)
+
+    @property
+    def broadcaster(self):
+        return self._broadcaster or get_broadcaster()
+
+    async def __call__(self, scope, receive, send):
+        if scope['method'] not in ('GET', 'HEAD'):
+            return await self._respond(send, 405, b'Method not allowed.')
+
+        user_id = await self.authenticate(scope)
+        if user_id is None:
+            return await self._respond(send, 401, b'Authentication credentials were not provided or are invalid.')
+
+        broadcaster = self.broadcaster
+        subscription, backlog = broadcaster.subscribe(user_id, _last_event_id(scope))
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),  # Stop nginx from buffering the stream.
+                ],
+            })
+            await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+            if backlog is None:
+                # Too far behind to replay; tell the client to refetch through the REST API.
+                await send({'type': 'http.response.body', 'body': b'event: resync\ndata: {}\n\n', 'more_body': True})
+            for message in backlog or ():
+                await send({'type': 'http.response.body', 'body': format_event(message), 'more_body': True})
+            await self._pump(subscription, receive, send)
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    async def _pump(self, subscription, receive, send):
+        disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        try:
+            while not disconnected.done() and not subscription.overflowed:
+                next_message = asyncio.ensure_future(subscription.queue.get())
+                done, _ = await asyncio.wait({next_message, disconnected}, timeout=self.keepalive, return_when=asyncio.FIRST_COMPLETED)
+                if next_message in done:
+                    body = format_event(next_message.result())
+                else:
+                    next_message.cancel()
+                    if disconnected in done:
+                        break
+                    body = b': keepalive\n\n'
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            disconnected.cancel()
+
+    @staticmethod
+    async def _wait_for_disconnect(receive):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+
+    @staticmethod
+    async def _respond(send, status, body):
+        await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+class EventStreamRouter:
+    """Sends requests for the stream path to `EventStreamApp` and everything else to Django."""
+
+    def __init__(self, django_application, stream_application=None, path=STREAM_PATH):
+        self.django_application = django_application
+        self.stream_application = stream_application or EventStreamApp()
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == self.path:
+            return await self.stream_application(scope, receive, send)
+        return await self.django_application(scope, receive, send)
@@ -0,0 +1,72 @@
+# apps/core/tasks.py
+import logging
+
+from celery import shared_task
+from django.apps import apps as django_apps
+
+from .images import delete_variants, generate_variants, is_image
+from .mail import drain_outbox
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="drain_email_outbox", ignore_result=True)
+def drain_email_outbox():
+    """
+    Delivers pending outbox emails in batches over a reused SMTP connection.
+    Triggered after each enqueuing transaction commits and periodically by celery beat.
+    """
+    return drain_outbox()
+
+
+@shared_task(name="generate_image_variants", ignore_result=True)
+def generate_image_variants(model_label, pk, field_name):
+    """
+    Renders the thumbnail, preview and optimized copies of an image field and records
+    them in the instance's `image_variants`. Queued by `images.schedule_variants`.
+    """
+    model = django_apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    field_file = getattr(instance, field_name)
+    previous = instance.image_variants or {}
+
+    result = {}
+    if field_file and is_image(field_file.name):
+        try:
+            result = generate_variants(field_file)
+        except OSError:  # Includes PIL.UnidentifiedImageError
+            logger.warning("[IMAGES] Could not render variants of %s %s (%s)", model_label, pk, field_file.name, exc_info=True)
+
+    kept = set(result.get('variants', {}).values())
+    delete_variants(field_file.storage, {'variants': {
+        variant: name for variant, name in previous.get('variants', {}).items() if name not in kept
+    }})
+
+    # Only record the result if the image was not replaced again in the meantime.
+    queryset = model.objects.filter(pk=pk)
+    if field_file:
+        queryset = queryset.filter(**{field_name: field_file.name})
+    queryset.update(image_variants=result)
+
+
+@shared_task(name="record_slow_queries", ignore_result=True)
+def record_slow_queries(captured, route):
+    """Adds the slow statements of a request to their fingerprints' totals, off the request path."""
+    from .slow_queries import record
+    record(captured, route)
+
+
+@shared_task(name="explain_slow_query", ignore_result=True)
+def explain_slow_query(fingerprint, sql, params, duration_ms):
+    """Captures the execution plan of a sampled slow statement, off the request path."""
+    from .slow_queries import explain
+    explain(fingerprint, sql, params, duration_ms)
+
+
+@shared_task(name="purge_request_profiles", ignore_result=True)
+def purge_request_profiles():
+    """Removes request profiles older than PROFILING_RETENTION_HOURS."""
+    from .profiling import purge_expired
+    return purge_expired()
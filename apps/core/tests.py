@@ -1,5 +1,48 @@
 # apps/core/tests.py
-from django.test import TestCase
+import asyncio
+import json
+import marshal
+import os
+import shutil
+import tempfile
+from datetime import date, datetime
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections, transaction
+from django.db.models import ProtectedError
+from django.test import (
+    AsyncClient, AsyncRequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.applications.models import Application, ApplicationDocument, ApplicationTask
+from apps.core import (
+    admin_paging, benchmarks, downloads, identifiers, metrics, profiling, replicas, sections, slow_queries,
+)
+from apps.core.events import EventBroadcaster, InMemoryBroker
+from apps.core.instrumentation import QueryRecorder, record_queries
+from apps.core.mail import _insert_deduplicated, drain_outbox, enqueue_email
+from apps.core.models import (
+    Notification, NotificationTemplate, OrganizationUnit, OutgoingEmail, Program, QueryPlan, SlowQuery, University,
+)
+from apps.core.notifications import TemplateRenderer, notify_users
+from apps.core.purge import Purger
+from apps.core.streams import EventStreamApp
+from apps.support.models import SupportTicket
+from apps.users.models import User
 
 # Create your tests here.
 # Example test structure for this app:
@@ -28,4 +71,830 @@ from django.test import TestCase
 #         response = self.client.get(url)
 #         self.assertEqual(response.status_code, status.HTTP_200_OK)
 #         self.assertEqual(len(response.data), 1)
-#         self.assertEqual(response.data[0]['name'], 'Test University 1')
\ No newline at end of file
+#         self.assertEqual(response.data[0]['name'], 'Test University 1')
+
+
+# --- Event stream ---
+class EventBroadcasterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.broadcaster = EventBroadcaster(InMemoryBroker(), history_size=3)
+
+    async def test_published_events_reach_only_the_target_user(self):
+        mine, _ = self.broadcaster.subscribe(1)
+        theirs, _ = self.broadcaster.subscribe(2)
+        self.broadcaster.publish([1], 'notification', {'title': 'Hello'})
+        message = await mine.get(timeout=1)
+        self.assertEqual(message['event'], 'notification')
+        self.assertEqual(message['data'], {'title': 'Hello'})
+        self.assertTrue(theirs.queue.empty())
+
+    async def test_resume_replays_missed_events(self):
+        for index in range(3):
+            self.broadcaster.publish([1], 'notification', {'index': index})
+        _, backlog = self.broadcaster.subscribe(1, last_event_id=1)
+        self.assertEqual([message['data']['index'] for message in backlog], [1, 2])
+
+    async def test_resume_past_history_requests_resync(self):
+        for index in range(5):
+            self.broadcaster.publish([1], 'notification', {'index': index})
+        _, backlog = self.broadcaster.subscribe(1, last_event_id=1)
+        self.assertIsNone(backlog)
+
+    async def test_idle_histories_are_dropped_and_their_users_resync(self):
+        broadcaster = EventBroadcaster(InMemoryBroker(), history_size=3, history_users=2)
+        for user_id in (1, 2, 3):
+            broadcaster.publish([user_id], 'notification', {'user': user_id})
+        self.assertEqual(list(broadcaster._histories), [2, 3])
+        self.assertIsNone(broadcaster.subscribe(1, last_event_id=0)[1])
+        self.assertEqual([message['data'] for message in broadcaster.subscribe(3, last_event_id=1)[1]], [{'user': 3}])
+
+    async def test_resume_after_a_restart_requests_resync(self):
+        self.assertIsNone(self.broadcaster.subscribe(1, last_event_id=41)[1])
+        self.broadcaster.publish([2], 'notification', {})
+        self.assertIsNone(self.broadcaster.subscribe(1, last_event_id=41)[1])
+        self.assertEqual(self.broadcaster.subscribe(1, last_event_id=1)[1], [])
+
+
+class EventStreamAppTests(SimpleTestCase):
+
+    def setUp(self):
+        self.broadcaster = EventBroadcaster(InMemoryBroker())
+
+        async def authenticate(scope):
+            return 7
+
+        self.app = EventStreamApp(broadcaster=self.broadcaster, authenticate=authenticate, keepalive=0.05)
+
+    async def _run(self, headers=()):
+        sent, disconnect = [], asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/v1/stream/', 'headers': list(headers), 'query_string': b''}
+        task = asyncio.ensure_future(self.app(scope, receive, send))
+        await asyncio.sleep(0.01)
+        return task, sent, disconnect
+
+    async def test_streams_events_as_sse(self):
+        task, sent, disconnect = await self._run()
+        self.broadcaster.publish([7], 'workbench', {'task_id': 3})
+        await asyncio.sleep(0.01)
+        disconnect.set()
+        await task
+        self.assertEqual(sent[0]['status'], 200)
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        self.assertIn(b'event: workbench\ndata: {"task_id":3}\n\n', body)
+
+    async def test_last_event_id_header_replays_backlog(self):
+        self.broadcaster.publish([7], 'notification', {'n': 1})
+        self.broadcaster.publish([7], 'notification', {'n': 2})
+        task, sent, disconnect = await self._run(headers=[(b'last-event-id', b'1')])
+        disconnect.set()
+        await task
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        self.assertNotIn(b'{"n":1}', body)
+        self.assertIn(b'id: 2\nevent: notification\ndata: {"n":2}', body)
+
+    async def test_rejects_anonymous_requests(self):
+        async def authenticate(scope):
+            return None
+
+        self.app.authenticate = authenticate
+        task, sent, disconnect = await self._run()
+        await task
+        self.assertEqual(sent[0]['status'], 401)
+
+
+class NotificationStreamSignalTests(TestCase):
+
+    def test_new_notification_is_published_on_commit(self):
+        user = User.objects.create_user(email='stream@example.com', password='password123', full_name='Stream User')
+        with mock.patch('apps.core.signals.publish_event') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                Notification.objects.create(user=user, title='Decision', message='Approved')
+        publish.assert_called_once()
+        user_ids, event, data = publish.call_args.args
+        self.assertEqual(list(user_ids), [user.id])
+        self.assertEqual(event, 'notification')
+        self.assertEqual(data['title'], 'Decision')
+
+
+# --- Notification templates ---
+class TemplateRendererTests(TestCase):
+
+    def setUp(self):
+        self.template = NotificationTemplate.objects.create(
+            name='decision_email', type=NotificationTemplate.TemplateType.EMAIL,
+            subject='Update on {{ tracking_code }}', body='Dear {{ full_name }}, see {{ tracking_code }}.',
+        )
+
+    def test_renders_each_recipient(self):
+        rendered = TemplateRenderer().render_many(self.template, [
+            {'full_name': 'Ali', 'tracking_code': 'ISA-1'},
+            {'full_name': '<b>Sara</b>', 'tracking_code': 'ISA-2'},
+        ])
+        self.assertEqual(rendered[0].subject, 'Update on ISA-1')
+        self.assertEqual(rendered[0].body, 'Dear Ali, see ISA-1.')
+        self.assertEqual(rendered[1].body, 'Dear &lt;b&gt;Sara&lt;/b&gt;, see ISA-2.')
+
+    def test_subjects_are_not_html_escaped(self):
+        self.template.subject = '{{ full_name }} from R&D: {{ tracking_code }}'
+        rendered = TemplateRenderer().render_many(self.template, [{'full_name': "O'Brien", 'tracking_code': 'A&B'}])
+        self.assertEqual(rendered[0].subject, "O'Brien from R&D: A&B")
+        self.assertEqual(rendered[0].body, 'Dear O&#x27;Brien, see A&amp;B.')
+
+    def test_notify_users_publishes_only_after_commit(self):
+        user = User.objects.create_user(email='later@example.com', password='password123', full_name='Later')
+        with mock.patch('apps.core.signals.publish_event') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                notify_users('decision_email', [(user, {'tracking_code': 'ISA-9'})])
+                publish.assert_not_called()
+        publish.assert_called_once()
+
+    def test_compiles_once_per_version(self):
+        renderer = TemplateRenderer()
+        renderer.render_many(self.template, [{}])
+        renderer.render_many(self.template, [{}])
+        self.assertEqual((renderer.hits, renderer.misses), (1, 1))
+
+        self.template.body = 'Changed for {{ full_name }}'
+        self.template.save()
+        self.assertEqual(renderer.render_many(self.template, [{'full_name': 'Ali'}])[0].body, 'Changed for Ali')
+        self.assertEqual(renderer.misses, 2)
+
+    def test_stale_copies_never_reuse_a_version(self):
+        stale = NotificationTemplate.objects.get(pk=self.template.pk)
+        self.template.save()
+        stale.body = 'Saved from a stale copy'
+        stale.save(update_fields=['body'])
+        self.assertEqual((self.template.version, stale.version), (2, 3))
+        self.assertEqual(NotificationTemplate.objects.get(pk=stale.pk).version, 3)
+
+    def test_notify_users_bulk_creates_notifications(self):
+        users = [
+            User.objects.create_user(email=f'user{index}@example.com', password='password123', full_name=f'User {index}')
+            for index in range(3)
+        ]
+        with mock.patch('apps.core.signals.publish_event'):
+            created = notify_users('decision_email', [(user, {'tracking_code': f'ISA-{user.pk}'}) for user in users], batch_size=2)
+        self.assertEqual(len(created), 3)
+        notification = Notification.objects.get(user=users[1])
+        self.assertEqual(notification.title, f'Update on ISA-{users[1].pk}')
+        self.assertEqual(notification.message, f'Dear User 1, see ISA-{users[1].pk}.')
+
+
+# --- Email outbox ---
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+class EmailOutboxTests(TestCase):
+
+    def test_duplicate_keys_are_enqueued_once(self):
+        self.assertTrue(enqueue_email('a@example.com', 'Hi', 'Body', dedupe_key='welcome:1'))
+        self.assertFalse(enqueue_email('a@example.com', 'Hi', 'Body', dedupe_key='welcome:1'))
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+
+    def test_drains_in_batches_over_one_connection_per_batch(self):
+        for index in range(5):
+            enqueue_email(f'user{index}@example.com', f'Subject {index}', 'Body')
+        with mock.patch('apps.core.mail.get_connection', wraps=mail.get_connection) as get_connection:
+            self.assertEqual(drain_outbox(batch_size=2), 5)
+        self.assertEqual(get_connection.call_count, 3)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(OutgoingEmail.objects.filter(status=OutgoingEmail.StatusChoices.PENDING).exists())
+
+    def test_failed_message_is_retried_with_backoff_then_abandoned(self):
+        enqueue_email('bad@example.com', 'Broken', 'Body')
+        enqueue_email('good@example.com', 'Fine', 'Body')
+        original_send = mail.backends.locmem.EmailBackend.send_messages
+
+        def send_messages(backend, messages):
+            if messages[0].to == ['bad@example.com']:
+                raise ConnectionError('mailbox unavailable')
+            return original_send(backend, messages)
+
+        with mock.patch.object(mail.backends.locmem.EmailBackend, 'send_messages', send_messages):
+            self.assertEqual(drain_outbox(), 1)
+            bad = OutgoingEmail.objects.get(to_email='bad@example.com')
+            self.assertEqual((bad.status, bad.attempts), (OutgoingEmail.StatusChoices.PENDING, 1))
+            self.assertGreater(bad.next_attempt_at, bad.created_at)
+
+            OutgoingEmail.objects.filter(pk=bad.pk).update(next_attempt_at=bad.created_at)
+            self.assertEqual(drain_outbox(), 0)
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), (OutgoingEmail.StatusChoices.FAILED, 2))
+        self.assertEqual([message.to for message in mail.outbox], [['good@example.com']])
+
+
+    def test_unreachable_server_backs_off_the_claimed_batch(self):
+        for index in range(3):
+            enqueue_email(f'user{index}@example.com', 'Subject', 'Body')
+        with mock.patch.object(mail.backends.locmem.EmailBackend, 'open', side_effect=ConnectionRefusedError('down')):
+            self.assertEqual(drain_outbox(batch_size=2), 0)
+        claimed, waiting = OutgoingEmail.objects.order_by('pk')[:2], OutgoingEmail.objects.order_by('pk')[2]
+        for row in claimed:
+            self.assertEqual((row.status, row.attempts, row.last_error), (OutgoingEmail.StatusChoices.PENDING, 1, 'down'))
+            self.assertGreater(row.next_attempt_at, timezone.now())
+        self.assertEqual(waiting.attempts, 0)
+
+    def test_rows_lost_to_a_concurrent_enqueue_are_not_counted(self):
+        enqueue_email('a@example.com', 'Hi', 'Body', dedupe_key='race:1')
+        rows = [OutgoingEmail(to_email='a@example.com', subject='Hi', dedupe_key=key) for key in ('race:1', 'race:2')]
+        self.assertEqual(_insert_deduplicated(rows), 1)
+        self.assertEqual(OutgoingEmail.objects.count(), 2)
+
+
+# --- Protected media downloads ---
+class ProtectedDownloadTests(APITestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root, PROTECTED_MEDIA_SERVER=''))
+        self.applicant = User.objects.create_user(email='owner@example.com', password='password123', full_name='Owner')
+        self.stranger = User.objects.create_user(email='stranger@example.com', password='password123', full_name='Stranger')
+        application = Application.objects.create(applicant=self.applicant, full_name='Owner')
+        self.document = ApplicationDocument(application=application, document_type='Passport')
+        self.document.file.save('passport.pdf', ContentFile(b'%PDF-1.4 passport'))
+
+    def test_permission_checked_endpoint(self):
+        url = f'/api/v1/files/{self.document.file.name}'
+        self.client.force_authenticate(self.applicant)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 passport')
+
+        self.client.force_authenticate(self.stranger)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_traversal_out_of_a_directory_is_refused(self):
+        staff = User.objects.create_user(email='staff@example.com', password='password123', full_name='Staff', is_staff=True)
+        name = f'{profiling.PROFILES_DIR}../{self.document.file.name}'
+        self.assertFalse(downloads.can_access(staff, name))
+        self.assertTrue(downloads.can_access(self.applicant, self.document.file.name))
+
+    def test_only_the_model_owning_the_directory_is_queried(self):
+        with self.assertNumQueries(2):  # The support role, then the ticket.
+            self.assertFalse(downloads.can_access(self.stranger, 'ticket_attachments/log.txt'))
+        with self.assertNumQueries(0):
+            self.assertFalse(downloads.can_access(self.stranger, 'elsewhere/log.txt'))
+
+    def test_offloads_to_front_server(self):
+        self.client.force_authenticate(self.applicant)
+        with override_settings(PROTECTED_MEDIA_SERVER='nginx'):
+            response = self.client.get(f'/api/v1/files/{self.document.file.name}')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.document.file.name}')
+        self.assertEqual(response.content, b'')
+
+    def test_signed_url_needs_no_login_and_rejects_tampering(self):
+        url = self.document.file.url
+        self.assertTrue(url.startswith('/api/v1/files/signed/'))
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        path = urlsplit(url).path
+        other = path.replace('passport', 'visa')
+        self.assertEqual(self.client.get(url.replace(path, other)).status_code, 403)
+
+        expires, signature = downloads.sign(self.document.file.name, now=0)
+        self.assertFalse(downloads.verify(self.document.file.name, expires, signature))
+
+
+# --- Load data generator ---
+class GenerateLoadDataTests(TestCase):
+
+    def generate(self, seed):
+        call_command(
+            'generate_load_data', applications=60, experts=4, institutions=2, tickets=10,
+            seed=seed, end_date=date(2025, 6, 30), batch_size=25, stdout=StringIO(),
+        )
+        return self.generate_rows()
+
+    def generate_rows(self):
+        return list(
+            Application.objects.order_by('tracking_code')
+            .values_list('tracking_code', 'application_type', 'status', 'applicant__email', 'created_at')
+        )
+
+    def test_generates_consistent_data_deterministically(self):
+        first = self.generate(seed=7)
+        self.assertEqual(len(first), 60)
+        self.assertEqual(ApplicationTask.objects.count(), 60)
+        self.assertEqual(
+            ApplicationTask.objects.filter(status=ApplicationTask.StatusChoices.UNCLAIMED, assigned_expert__isnull=False).count(), 0
+        )
+        self.assertFalse(ApplicationTask.objects.filter(
+            status=ApplicationTask.StatusChoices.COMPLETED, decision=ApplicationTask.DecisionChoices.PENDING,
+        ).exists())
+        self.assertFalse(ApplicationTask.objects.filter(
+            application__status=Application.StatusChoices.PENDING_CORRECTION, status=ApplicationTask.StatusChoices.COMPLETED,
+        ).exists())
+        for ticket in SupportTicket.objects.all():
+            self.assertEqual(ticket.message_count, ticket.messages.count())
+
+        Application.objects.all().delete()
+        SupportTicket.objects.all().delete()
+        User.objects.filter(email__endswith='@load7.loadtest.example').delete()
+        self.assertEqual(self.generate(seed=7), first)
+
+    def test_seeds_coexist_and_share_nothing_random(self):
+        first = self.generate(seed=7)
+        passwords = set(User.objects.values_list('password', flat=True))
+        self.assertEqual(len(self.generate(seed=8)), 120)
+        self.assertEqual(SupportTicket.objects.count(), 20)
+        self.assertEqual(len(set(User.objects.values_list('password', flat=True))), 2)
+
+        Application.objects.all().delete()
+        SupportTicket.objects.all().delete()
+        User.objects.all().delete()
+        call_command(
+            'generate_load_data', applications=60, experts=4, institutions=2, tickets=10, seed=7, batch_size=25, stdout=StringIO(),
+        )
+        self.assertEqual(set(User.objects.values_list('password', flat=True)), passwords)
+        self.assertEqual(self.generate_rows(), first)
+
+
+# --- Endpoint budgets ---
+class EndpointBudgetTests(TestCase):
+    """Fails when a hot endpoint issues more SQL queries than `benchmark_baseline.json` allows."""
+
+    def test_hot_endpoints_stay_within_their_query_budgets(self):
+        actors = benchmarks.seed_dataset(applications=60)
+        results = benchmarks.measure(actors, iterations=1, warmup=0)
+        regressions = benchmarks.compare(results, benchmarks.load_baseline(), check_latency=False)
+        self.assertEqual(regressions, [], 'Run `manage.py benchmark_endpoints` for details.')
+        self.assertEqual(set(results), {f'{endpoint.role}:{endpoint.name}' for endpoint in benchmarks.ENDPOINTS})
+
+    def test_baseline_keeps_latency_only_when_asked(self):
+        results = {'applicant:my': {'status': 200, 'queries': 4, 'sql_ms': 1.0, 'p50_ms': 5.0, 'p95_ms': 8.0}}
+        path = Path(self.enterContext(tempfile.TemporaryDirectory())) / 'baseline.json'
+        benchmarks.save_baseline(results, path)
+        self.assertEqual(benchmarks.load_baseline(path)['endpoints'], {'applicant:my': {'status': 200, 'queries': 4}})
+        slower = {'applicant:my': {**results['applicant:my'], 'p95_ms': 80.0}}
+        self.assertEqual(benchmarks.compare(slower, benchmarks.load_baseline(path)), [])
+
+        benchmarks.save_baseline(results, path, with_latency=True)
+        self.assertEqual(len(benchmarks.compare(slower, benchmarks.load_baseline(path))), 1)
+
+
+# --- Request instrumentation ---
+class RequestInstrumentationTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(email='timing-staff@example.com', password='password123', full_name='Staff', is_staff=True)
+        cls.user = User.objects.create_user(email='timing-user@example.com', password='password123', full_name='User')
+
+    def test_recorder_flags_repeated_statements(self):
+        with record_queries(QueryRecorder()) as recorder:
+            for user in (self.staff, self.user) * 3:
+                User.objects.filter(pk=user.pk).exists()
+        self.assertEqual(recorder.count, 6)
+        self.assertEqual([count for count, _ in recorder.duplicates(threshold=5)], [6])
+        self.assertEqual(len(recorder.slowest_statements()), 3)
+
+    def test_server_timing_is_only_sent_to_staff(self):
+        self.client.force_authenticate(self.staff)
+        header = self.client.get('/api/v1/choices/dashboard-stats/')['Server-Timing']
+        self.assertRegex(header, r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"')
+
+        self.client.force_authenticate(self.user)
+        self.assertNotIn('Server-Timing', self.client.get('/api/v1/choices/dashboard-stats/'))
+
+    @override_settings(REQUEST_INSTRUMENTATION_SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged_as_json(self):
+        self.client.force_authenticate(self.user)
+        with self.assertLogs('apps.core.middleware', level='WARNING') as logs:
+            self.client.get('/api/v1/choices/dashboard-stats/')
+        record = json.loads(logs.records[0].getMessage().removeprefix('[REQUEST] '))
+        self.assertEqual((record['status'], record['user_id']), (200, self.user.pk))
+        self.assertEqual(record['route'], 'api/v1/choices/dashboard-stats/')
+
+
+# --- Slow query log ---
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
+class SlowQueryTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='slow@example.com', password='password123', full_name='Slow')
+
+    def test_fingerprints_ignore_literals_and_list_lengths(self):
+        first = slow_queries.normalize('SELECT "a"."id" FROM "t1" "a" WHERE "a"."id" IN (%s, %s) AND "a"."name" = \'x\' LIMIT 21')
+        second = slow_queries.normalize('SELECT "a"."id"  FROM "t1" "a"\n WHERE "a"."id" IN (%s, %s, %s) AND "a"."name" = \'y\' LIMIT 5')
+        self.assertEqual(first, second)
+        self.assertIn('"t1"', first)
+        self.assertIn('IN (...)', first)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1.0)
+    def test_slow_statements_are_aggregated_and_explained(self):
+        self.client.force_authenticate(self.user)
+        for _ in range(2):
+            self.client.get('/api/v1/choices/dashboard-stats/')
+
+        ranked = list(SlowQuery.objects.all())
+        self.assertTrue(ranked)
+        self.assertTrue(all(query.last_route == 'api/v1/choices/dashboard-stats/' for query in ranked))
+        self.assertTrue(any(query.calls == 2 for query in ranked))
+        self.assertEqual(ranked, sorted(ranked, key=lambda query: -query.total_ms))
+        # One plan per fingerprint within the interval, and only for SELECTs.
+        self.assertTrue(QueryPlan.objects.exists())
+        self.assertEqual(QueryPlan.objects.count(), QueryPlan.objects.values('slow_query').distinct().count())
+        self.assertTrue(all(plan.slow_query.statement.startswith('SELECT') for plan in QueryPlan.objects.all()))
+
+    def test_locking_reads_are_never_explained(self):
+        self.assertTrue(slow_queries.is_explainable('SELECT "a"."id" FROM "t1" "a"'))
+        for sql in ('SELECT "a"."id" FROM "t1" "a" FOR UPDATE', 'select * from t1 for no key update skip locked',
+                    'SELECT * FROM t1 FOR SHARE', 'UPDATE "t1" SET "name" = %s'):
+            self.assertFalse(slow_queries.is_explainable(sql))
+
+    def test_plans_are_captured_on_the_replica_when_configured(self):
+        sql = 'SELECT "users_user"."id" FROM "users_user"'
+        slow_queries.record([(sql, [], 0.5)])
+        key = slow_queries.fingerprint(slow_queries.normalize(sql))
+        primary = connections.create_connection
+        with mock.patch('apps.core.slow_queries.replica_alias', return_value='replica'), \
+                mock.patch.object(connections, 'create_connection', side_effect=lambda alias: primary('default')) as create:
+            self.assertIsNotNone(slow_queries.explain(key, sql, [], 500))
+        create.assert_called_once_with('replica')
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, CELERY_TASK_ALWAYS_EAGER=False)
+    def test_recording_is_left_to_a_task(self):
+        self.client.force_authenticate(self.user)
+        with mock.patch('apps.core.tasks.record_slow_queries.delay') as delay:
+            self.client.get('/api/v1/choices/dashboard-stats/')
+        captured, route = delay.call_args.args
+        self.assertEqual(route, 'api/v1/choices/dashboard-stats/')
+        self.assertTrue(captured)
+        self.assertFalse(SlowQuery.objects.exists())
+
+
+# --- Request profiler ---
+class RequestProfilerTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(email='profile-staff@example.com', password='password123', full_name='Staff', is_staff=True)
+        cls.other_staff = User.objects.create_user(email='profile-other@example.com', password='password123', full_name='Other', is_staff=True)
+        cls.user = User.objects.create_user(email='profile-user@example.com', password='password123', full_name='User')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root, PROTECTED_MEDIA_SERVER=''))
+
+    def _token(self, user, mode='cprofile'):
+        self.client.force_authenticate(user)
+        response = self.client.post('/api/v1/choices/profiling/token/', {'mode': mode})
+        self.assertEqual(response.status_code, 200)
+        return response.data['token']
+
+    def test_only_staff_get_tokens(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.post('/api/v1/choices/profiling/token/').status_code, 403)
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.post('/api/v1/choices/profiling/token/', {'mode': 'strace'}).status_code, 400)
+
+    def test_profiles_are_linked_and_downloadable(self):
+        token = self._token(self.staff)
+        response = self.client.get('/api/v1/choices/dashboard-stats/', HTTP_X_PROFILE=token)
+        self.assertEqual(response.status_code, 200)
+        url = response['X-Profile-URL']
+        self.assertTrue(url.startswith('/api/v1/files/signed/profiles/'))
+        self.assertTrue(urlsplit(url).path.endswith('.prof'))
+
+        stats = marshal.loads(b''.join(self.client.get(url).streaming_content))
+        self.assertTrue(any(function == 'get' for _, _, function in stats))
+
+        name = urlsplit(url).path.removeprefix('/api/v1/files/signed/')
+        self.assertTrue(downloads.can_access(self.other_staff, name))
+        self.assertFalse(downloads.can_access(self.user, name))
+
+    def test_sampling_mode_through_query_parameter(self):
+        token = self._token(self.staff, mode='sample')
+        response = self.client.get(f'/api/v1/choices/dashboard-stats/?_profile={token}')
+        self.assertTrue(urlsplit(response['X-Profile-URL']).path.endswith('.collapsed'))
+
+    def test_tokens_are_bound_to_their_owner(self):
+        token = self._token(self.staff)
+        self.client.force_authenticate(self.other_staff)
+        with self.assertLogs('apps.core.middleware', level='WARNING'):
+            response = self.client.get('/api/v1/choices/dashboard-stats/', HTTP_X_PROFILE=token)
+        self.assertNotIn('X-Profile-URL', response)
+
+        self.client.force_authenticate(self.staff)
+        response = self.client.get('/api/v1/choices/dashboard-stats/', HTTP_X_PROFILE=token[:-2] + 'xx')
+        self.assertNotIn('X-Profile-URL', response)
+        self.assertEqual(profiling.read_token('not-a-token'), None)
+
+
+# --- Metrics ---
+def _sample(text, line_start):
+    return next((float(line.rsplit(' ', 1)[1]) for line in text.splitlines() if line.startswith(line_start)), 0.0)
+
+
+@override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+class MetricsTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='metrics@example.com', password='password123', full_name='Metrics')
+
+    def _scrape(self, **headers):
+        response = self.client.get('/metrics', **headers)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_requests_cache_and_queues_are_exposed(self):
+        series = 'http_responses_total{view="DashboardStatsView",action="",method="GET",status="200"}'
+        before = _sample(self._scrape(), series)
+        misses = _sample(self._scrape(), 'cache_requests_total{result="miss"}')
+        self.client.force_authenticate(self.user)
+        self.client.get('/api/v1/choices/dashboard-stats/')
+        cache.get('metrics-test-missing')
+
+        text = self._scrape()
+        self.assertEqual(_sample(text, series), before + 1)
+        self.assertEqual(_sample(text, 'cache_requests_total{result="miss"}'), misses + 1)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', text)
+        self.assertIn('http_request_duration_seconds_bucket{view="DashboardStatsView",action="",method="GET",le="+Inf"}', text)
+        self.assertIn('http_request_db_queries_count{view="DashboardStatsView",action=""}', text)
+        self.assertIn('# TYPE workbench_tasks gauge', text)
+
+    @override_settings(METRICS_TOKEN='scraper-secret', METRICS_ALLOWED_IPS=[])
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self._scrape(HTTP_AUTHORIZATION='Bearer scraper-secret')
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_open_only_in_debug_without_token_or_address(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with override_settings(DEBUG=True):
+            self._scrape()
+        with override_settings(METRICS_ENABLED=False, DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    def test_collectors_are_not_run_on_every_scrape(self):
+        self._scrape()
+        with self.assertNumQueries(0):
+            text = self._scrape()
+        self.assertIn('# TYPE support_tickets gauge', text)
+
+    def test_processes_are_summed_from_their_files(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        registry = metrics.Registry()
+        counter = metrics.Counter('jobs_total', 'Jobs.', ['kind'], registry=registry)
+        histogram = metrics.Histogram('job_seconds', 'Job time.', buckets=(1, 10), registry=registry)
+
+        with override_settings(METRICS_DIR=directory):
+            counter.inc(kind='a')
+            histogram.observe(0.5)
+            histogram.observe(20)
+            # Another worker's file, written while the first keeps counting.
+            other = metrics.MmapStore(os.path.join(directory, '999999.db'))
+            for index in range(2000):  # Enough keys to grow the file
+                other.add(counter._key({'kind': f'k{index}'}), 1)
+            other.add(counter._key({'kind': 'a'}), 2)
+            counter.inc(kind='a')
+            text = registry.render()
+
+        self.assertIn('jobs_total{kind="a"} 4', text)
+        self.assertIn('jobs_total{kind="k1999"} 1', text)
+        self.assertIn('job_seconds_bucket{le="1"} 1', text)
+        self.assertIn('job_seconds_bucket{le="10"} 1', text)
+        self.assertIn('job_seconds_bucket{le="+Inf"} 2', text)
+        self.assertIn('job_seconds_sum 20.5', text)
+        self.assertEqual(metrics.MmapStore(os.path.join(directory, '999999.db')).positions.keys(), other.positions.keys())
+
+
+# --- Purge engine ---
+class PurgeTests(TestCase):
+
+    def test_clean_db_removes_generated_data_in_batches(self):
+        call_command(
+            'generate_load_data', applications=40, experts=3, institutions=2, tickets=10,
+            seed=11, end_date=date(2025, 6, 30), stdout=StringIO(),
+        )
+        admin = User.objects.create_superuser(email='admin@example.com', password='password123', full_name='Admin')
+        output = StringIO()
+        call_command('clean_db', batch_size=7, stdout=output)
+
+        self.assertFalse(Application.objects.exists())
+        self.assertFalse(SupportTicket.objects.exists())
+        self.assertFalse(University.objects.exists())
+        self.assertEqual(list(User.objects.all()), [admin])
+        self.assertIn('applications.ApplicationLog: 7 deleted', output.getvalue())
+        self.assertFalse(Program.objects.exists())
+
+    def test_clean_db_keeps_finished_steps_unless_atomic(self):
+        call_command(
+            'generate_load_data', applications=5, experts=1, institutions=1, tickets=0,
+            seed=13, end_date=date(2025, 6, 30), stdout=StringIO(),
+        )
+        purge = Purger.purge
+
+        def fail_on_programs(purger, queryset):
+            if queryset.model is Program:
+                raise RuntimeError('interrupted')
+            return purge(purger, queryset)
+
+        with mock.patch.object(Purger, 'purge', fail_on_programs):
+            with self.assertRaises(RuntimeError):
+                call_command('clean_db', atomic=True, stdout=StringIO())
+            self.assertEqual(Application.objects.count(), 5)
+            with self.assertRaises(RuntimeError):
+                call_command('clean_db', stdout=StringIO())
+            self.assertFalse(Application.objects.exists())
+
+    def test_protected_rows_stop_the_purge_before_deleting(self):
+        call_command(
+            'generate_load_data', applications=5, experts=1, institutions=1, tickets=0,
+            seed=12, end_date=date(2025, 6, 30), stdout=StringIO(),
+        )
+        programs = Program.objects.count()
+        with self.assertRaises(ProtectedError):
+            Purger(batch_size=2).purge(University.objects.all())
+        self.assertEqual(Program.objects.count(), programs)
+
+    def test_self_referencing_rows_take_their_descendants(self):
+        root = OrganizationUnit.objects.create(name='Root')
+        child = OrganizationUnit.objects.create(name='Child', parent=root)
+        OrganizationUnit.objects.create(name='Grandchild', parent=child)
+        other = OrganizationUnit.objects.create(name='Other')
+
+        purger = Purger(batch_size=1)
+        self.assertEqual(purger.purge(OrganizationUnit.objects.filter(pk=root.pk)), 3)
+        self.assertEqual(list(OrganizationUnit.objects.all()), [other])
+
+
+# --- Identifier allocator ---
+class IdentifierTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='ids@example.com', password='password123', full_name='Ids')
+
+    def test_codes_round_trip_and_reject_typos(self):
+        for value in (0, 1, 31, 32, 1023, 123456, 32 ** 5 + 7):
+            self.assertEqual(identifiers.decode(identifiers.encode(value, 5)), value)
+        code = identifiers.encode(123456, 5)
+        self.assertEqual(identifiers.decode(code.lower()), 123456)
+        for index in range(len(code)):
+            for replacement in identifiers.ALPHABET:
+                if replacement != code[index]:
+                    self.assertIsNone(identifiers.decode(code[:index] + replacement + code[index + 1:]))
+        swapped = code[1] + code[0] + code[2:]
+        if swapped != code:
+            self.assertIsNone(identifiers.decode(swapped))
+
+    def test_new_records_get_sequential_codes_per_year(self):
+        first = Application.objects.create(applicant=self.user, full_name='First')
+        second = Application.objects.create(applicant=self.user, full_name='Second')
+        ticket = SupportTicket.objects.create(user=self.user, subject='Help', category='General')
+
+        year = timezone.now().year
+        self.assertRegex(first.tracking_code, rf'^ISA-{year}-[0-9A-Z]{{6}}$')
+        self.assertEqual(identifiers.parse('tracking_code', second.tracking_code)[1],
+                         identifiers.parse('tracking_code', first.tracking_code)[1] + 1)
+        self.assertRegex(ticket.ticket_id, rf'^SPT-{year % 100:02d}-[0-9A-Z]{{5}}$')
+        self.assertEqual(identifiers.allocate('ticket_id', now=datetime(2031, 1, 1)), f'SPT-31-0001{identifiers.check_character("0001")}')
+        # Codes issued before the allocator never match the new formats.
+        self.assertIsNone(identifiers.parse('tracking_code', 'ISA-2024-AB12F'))
+        self.assertIsNone(identifiers.parse('ticket_id', 'SPT-A1F-123'))
+
+    def test_sync_moves_counters_past_restored_codes(self):
+        year = timezone.now().year
+        restored = f'ISA-{year}-{identifiers.encode(5000, 5)}'
+        Application.objects.create(applicant=self.user, full_name='Restored', tracking_code=restored)
+        Application.objects.create(applicant=self.user, full_name='Legacy', tracking_code=f'ISA-{year}-0A1B2')
+
+        output = StringIO()
+        call_command('sync_identifier_sequences', stdout=output)
+        self.assertIn('1 identifier(s) in an older format', output.getvalue())
+        created = Application.objects.create(applicant=self.user, full_name='Next')
+        self.assertEqual(identifiers.parse('tracking_code', created.tracking_code), (year, 5001))
+
+
+# --- Read replica routing ---
+class ReplicaRouterTests(SimpleTestCase):
+
+    def test_reads_stay_on_the_primary_without_a_replica(self):
+        router = replicas.ReplicaRouter()
+        with override_settings(REPLICA_DATABASE='missing'), replicas.replica_reads():
+            self.assertIsNone(router.db_for_read(Application))
+        self.assertEqual(router.db_for_write(Application), 'default')
+
+    def test_replica_is_chosen_only_inside_replica_reads(self):
+        router = replicas.ReplicaRouter()
+        with override_settings(REPLICA_DATABASE='default'):
+            self.assertIsNone(router.db_for_read(Application))
+            with replicas.replica_reads():
+                self.assertEqual(router.db_for_read(Application), 'default')
+            self.assertIsNone(router.db_for_read(Application))
+
+
+REPLICA_CONFIGURED = settings.REPLICA_DATABASE in settings.DATABASES
+
+
+@skipUnless(REPLICA_CONFIGURED, 'Configure DB_REPLICA_NAME or DB_REPLICA_HOST to test replica routing.')
+@override_settings(REPLICA_ROUTE_TEST_MIRROR=True)
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {'default', settings.REPLICA_DATABASE} if REPLICA_CONFIGURED else {'default'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='replica@example.com', password='password123', full_name='Replica')
+        Notification.objects.create(user=self.user, title='Hello', message='World')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.addCleanup(cache.clear)
+
+    def replica_queries(self, method, path):
+        with CaptureQueriesContext(connections[replicas.replica_alias()]) as captured:
+            response = getattr(self.client, method)(path)
+        self.assertLess(response.status_code, 400)
+        return len(captured.captured_queries)
+
+    def test_annotated_reads_use_the_replica_until_the_user_writes(self):
+        self.assertGreater(self.replica_queries('get', '/api/v1/choices/dashboard-stats/'), 0)
+        self.assertGreater(self.replica_queries('get', '/api/v1/applications/my/'), 0)
+        # Views without the annotation keep reading the primary.
+        self.assertEqual(self.replica_queries('get', '/api/v1/choices/notifications/'), 0)
+
+        self.assertEqual(self.replica_queries('post', '/api/v1/choices/notifications/mark-all-read/'), 0)
+        self.assertEqual(self.replica_queries('get', '/api/v1/choices/dashboard-stats/'), 0)
+
+
+# --- Concurrent read sections ---
+class ConcurrentSectionsTests(TransactionTestCase):
+    """Other connections only see committed rows, hence a TransactionTestCase."""
+
+    def test_asgi_requests_run_sections_concurrently_with_the_same_results(self):
+        head, _ = benchmarks.seed_dataset(applications=30)['head']
+        client = APIClient()
+        client.force_authenticate(head)
+        async_client = AsyncClient()
+        authorization = f'Bearer {AccessToken.for_user(head)}'
+        paths = [
+            '/api/v1/choices/dashboard-stats/',
+            '/api/v1/choices/reports/summary/?start_date=2024-07-01&end_date=2025-06-30&time_grouping=month',
+        ]
+        for path in paths:
+            expected = client.get(path).json()
+            with mock.patch('apps.core.sections.gather', new_callable=mock.AsyncMock, side_effect=sections.gather) as gather:
+                response = async_to_sync(self.async_get)(async_client, path, authorization)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), expected)
+            gather.assert_called_once()
+
+    async def async_get(self, client, path, authorization):
+        return await client.get(path, headers={'Authorization': authorization})
+
+    def test_sections_run_sequentially_inside_a_transaction(self):
+        request = AsyncRequestFactory().get('/api/v1/choices/dashboard-stats/')
+        self.assertTrue(sections.is_concurrent(request))
+        with transaction.atomic():
+            self.assertFalse(sections.is_concurrent(request))
+
+    def test_nest_groups_keys_with_several_parts(self):
+        self.assertEqual(
+            sections.nest({('totals',): {'all': 3}, ('overview', 'users'): 2, ('overview', 'tickets'): 1}),
+            {'totals': {'all': 3}, 'overview': {'users': 2, 'tickets': 1}},
+        )
+
+
+# --- Startup cost ---
+class StartupBenchmarkTests(SimpleTestCase):
+
+    def test_urlconf_does_not_import_the_exporters(self):
+        output = StringIO()
+        call_command('benchmark_startup', settings.ROOT_URLCONF, top=0, stdout=output)
+        self.assertIn(settings.ROOT_URLCONF, output.getvalue())
+        with self.assertRaisesMessage(CommandError, 'should load lazily'):
+            call_command('benchmark_startup', 'apps.applications.exporters', top=0, stdout=StringIO(), stderr=StringIO())
+
+
+# --- Admin paging ---
+class EstimatedCountPaginatorTests(TestCase):
+
+    def setUp(self):
+        for index in range(3):
+            University.objects.create(name=f'Estimated {index}')
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000)
+    def test_only_unfiltered_lists_of_large_tables_use_the_estimate(self):
+        queryset = University.objects.order_by('pk')
+        with mock.patch.object(admin_paging, 'estimated_count', return_value=250000):
+            self.assertEqual(admin_paging.EstimatedCountPaginator(queryset, 10).count, 250000)
+            self.assertEqual(admin_paging.EstimatedCountPaginator(queryset.filter(name__endswith='1'), 10).count, 1)
+        with mock.patch.object(admin_paging, 'estimated_count', return_value=500):
+            self.assertEqual(admin_paging.EstimatedCountPaginator(queryset, 10).count, 3)
+
+    @skipUnless(connections['default'].vendor != 'postgresql', 'PostgreSQL has row estimates.')
+    def test_other_databases_have_no_estimate(self):
+        self.assertIsNone(admin_paging.estimated_count(University.objects.all()))
@@ -5,7 +5,7 @@ from rest_framework_nested import routers
 from .views import (
     UniversityViewSet, ProgramViewSet, DocumentTypesView, OrganizationChartView,
     NotificationTemplateViewSet, SystemListNameView, SystemListDetailView, PermitViewSet,
-    ScholarshipViewSet, NotificationViewSet, DashboardStatsView, ReportsView
+    ScholarshipViewSet, NotificationViewSet, DashboardStatsView, ReportsView, ProfilingTokenView
 )
 
 router = DefaultRouter()
@@ -26,6 +26,9 @@ urlpatterns = [
     
     # NEW: The dedicated endpoint for the reporting engine
     path('reports/summary/', ReportsView.as_view(), name='reports-summary'),
+
+    # Staff-only tokens for profiling single requests (see apps/core/profiling.py)
+    path('profiling/token/', ProfilingTokenView.as_view(), name='profiling-token'),
     
     # System List management endpoints
     path('settings/lists/', SystemListNameView.as_view(), name='system-list-names'),
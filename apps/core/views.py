@@ -1,7 +1,9 @@
 # start of apps/core/views.py
 # apps/core/views.py
+from django.conf import settings
 from django.db.models import Count, Q
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from rest_framework import viewsets, permissions, status
 from rest_framework.views import APIView
 from rest_framework.decorators import action
@@ -19,6 +21,10 @@ from .serializers import (
 )
 from .filters import PermitFilter, ScholarshipFilter
 from .reports import ReportGenerator 
+from . import metrics, profiling
+from .downloads import can_access, serve, verify
+from .replicas import ReplicaReadMixin
+from .sections import nest, run_sections
 from apps.users.permissions import HasPermission
 from apps.applications.models import Application, ApplicationTask
 from apps.support.models import SupportTicket
@@ -28,18 +34,18 @@ from django.contrib.auth.decorators import user_passes_test
 from django.shortcuts import render
 from django.core.management import call_command
 from django.contrib import messages
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponse, HttpResponseRedirect
 from django.urls import reverse
 import io
 
 # --- Existing Views (unchanged) ---
 DOCUMENT_TYPES = [{"value": "مدرک هویتی", "label": "مدرک هویتی"}, {"value": "مدرک شغلی", "label": "مدرک شغلی"}, {"value": "سایر", "label": "سایر"}]
-class UniversityViewSet(viewsets.ReadOnlyModelViewSet):
+class UniversityViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = University.objects.all().order_by('name')
     serializer_class = UniversitySerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class ProgramViewSet(viewsets.ReadOnlyModelViewSet):
+class ProgramViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = ProgramSerializer
     permission_classes = [permissions.IsAuthenticated]
     def get_queryset(self):
@@ -51,7 +57,7 @@ class DocumentTypesView(APIView):
     def get(self, request, *args, **kwargs):
         return Response(DOCUMENT_TYPES, status=status.HTTP_200_OK)
 
-class OrganizationChartView(ListAPIView):
+class OrganizationChartView(ReplicaReadMixin, ListAPIView):
     queryset = OrganizationUnit.objects.filter(parent__isnull=True)
     serializer_class = OrganizationUnitSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -62,7 +68,7 @@ class NotificationTemplateViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, HasPermission]
     required_permission = 'manage_system_settings'
 
-class SystemListNameView(ListAPIView):
+class SystemListNameView(ReplicaReadMixin, ListAPIView):
     queryset = SystemList.objects.all().values_list('name', flat=True)
     permission_classes = [permissions.IsAuthenticated]
     def get(self, request, *args, **kwargs):
@@ -75,7 +81,7 @@ class SystemListDetailView(RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated, HasPermission]
     required_permission = 'manage_system_settings'
 
-class PermitViewSet(viewsets.ModelViewSet):
+class PermitViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Permit.objects.all()
     serializer_class = PermitSerializer
     permission_classes = [permissions.IsAuthenticated, HasPermission]
@@ -83,7 +89,7 @@ class PermitViewSet(viewsets.ModelViewSet):
     filterset_class = PermitFilter
     ordering_fields = ['institution_name', 'status', 'issue_date', 'expiry_date']
 
-class ScholarshipViewSet(viewsets.ReadOnlyModelViewSet):
+class ScholarshipViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Scholarship.objects.filter(is_active=True).select_related('university')
     serializer_class = ScholarshipSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -107,57 +113,72 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         notification.save(update_fields=['is_read'])
         return Response(self.get_serializer(notification).data)
 
-class DashboardStatsView(APIView):
+class DashboardStatsView(ReplicaReadMixin, APIView):
+    """Counts for the signed-in user's dashboard. Each count is a section, run concurrently under ASGI."""
     permission_classes = [permissions.IsAuthenticated]
     def get(self, request, *args, **kwargs):
         user = request.user
-        stats = {}
         primary_role = user.roles.first().name if user.roles.exists() else None
+        sections = self.get_sections(user, primary_role)
+        return Response(nest(run_sections(request, sections)))
+
+    def get_sections(self, user, primary_role):
+        """{(group, name) or (group,): callable} of the independent queries shown to `primary_role`."""
         if primary_role == 'Applicant':
             applicant_apps = Application.objects.filter(applicant=user)
-            stats['my_applications'] = applicant_apps.aggregate(
-                total=Count('id'),
-                pending=Count('id', filter=Q(status='PENDING_REVIEW')),
-                requires_action=Count('id', filter=Q(status='PENDING_CORRECTION')),
-                approved=Count('id', filter=Q(status='APPROVED')),
-                rejected=Count('id', filter=Q(status='REJECTED')),
-            )
-            stats['my_tickets'] = SupportTicket.objects.filter(user=user).aggregate(
-                open=Count('id', filter=Q(status='OPEN')),
-                awaiting_reply=Count('id', filter=Q(status='AWAITING_REPLY')),
-            )
-        elif primary_role == 'UniversityExpert':
+            return {
+                ('my_applications',): lambda: applicant_apps.aggregate(
+                    total=Count('id'),
+                    pending=Count('id', filter=Q(status='PENDING_REVIEW')),
+                    requires_action=Count('id', filter=Q(status='PENDING_CORRECTION')),
+                    approved=Count('id', filter=Q(status='APPROVED')),
+                    rejected=Count('id', filter=Q(status='REJECTED')),
+                ),
+                ('my_tickets',): lambda: SupportTicket.objects.filter(user=user).aggregate(
+                    open=Count('id', filter=Q(status='OPEN')),
+                    awaiting_reply=Count('id', filter=Q(status='AWAITING_REPLY')),
+                ),
+            }
+        if primary_role == 'UniversityExpert':
             expert_universities = user.universities.all()
-            stats['expert_workbench'] = {
-                'unclaimed_tasks': ApplicationTask.objects.filter(university__in=expert_universities, status='UNCLAIMED').count(),
-                'my_assigned_tasks': ApplicationTask.objects.filter(assigned_expert=user, status='ASSIGNED').count(),
-                'completed_by_me_30d': ApplicationTask.objects.filter(
+            return {
+                ('expert_workbench', 'unclaimed_tasks'): ApplicationTask.objects.filter(
+                    university__in=expert_universities, status='UNCLAIMED'
+                ).count,
+                ('expert_workbench', 'my_assigned_tasks'): ApplicationTask.objects.filter(
+                    assigned_expert=user, status='ASSIGNED'
+                ).count,
+                ('expert_workbench', 'completed_by_me_30d'): ApplicationTask.objects.filter(
                     assigned_expert=user, status='COMPLETED',
                     application__updated_at__gte=timezone.now() - timezone.timedelta(days=30)
-                ).count(),
+                ).count,
             }
-        elif primary_role == 'Recruitment Institution':
+        if primary_role == 'Recruitment Institution':
             institution_universities = user.universities.all()
             institution_apps = Application.objects.filter(
                 university_choices__university__in=institution_universities
             ).distinct()
-            stats['institution_dashboard'] = institution_apps.aggregate(
-                total_applicants=Count('id'),
-                pending_review=Count('id', filter=Q(status__in=['PENDING_REVIEW', 'PENDING_CORRECTION'])),
-                approved=Count('id', filter=Q(status='APPROVED')),
-                rejected=Count('id', filter=Q(status='REJECTED')),
-            )
-        elif primary_role == 'HeadOfOrganization':
-            stats['system_overview'] = {
-                'total_applications': Application.objects.count(),
-                'total_users': User.objects.count(),
-                'open_support_tickets': SupportTicket.objects.filter(status__in=['OPEN', 'AWAITING_REPLY']).count(),
-                'active_permits': Permit.objects.filter(status='ACTIVE').count(),
+            return {
+                ('institution_dashboard',): lambda: institution_apps.aggregate(
+                    total_applicants=Count('id'),
+                    pending_review=Count('id', filter=Q(status__in=['PENDING_REVIEW', 'PENDING_CORRECTION'])),
+                    approved=Count('id', filter=Q(status='APPROVED')),
+                    rejected=Count('id', filter=Q(status='REJECTED')),
+                ),
+            }
+        if primary_role == 'HeadOfOrganization':
+            return {
+                ('system_overview', 'total_applications'): Application.objects.count,
+                ('system_overview', 'total_users'): User.objects.count,
+                ('system_overview', 'open_support_tickets'): SupportTicket.objects.filter(
+                    status__in=['OPEN', 'AWAITING_REPLY']
+                ).count,
+                ('system_overview', 'active_permits'): Permit.objects.filter(status='ACTIVE').count,
             }
-        return Response(stats)
+        return {}
 
 
-class ReportsView(APIView):
+class ReportsView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.IsAuthenticated, HasPermission]
     required_permission = 'view_reports'
 
@@ -176,13 +197,79 @@ class ReportsView(APIView):
                 'start_date': report_generator.start_date.isoformat(),
                 'end_date': report_generator.end_date.isoformat(),
             },
-            'applications_by_type': report_generator.get_applications_by_type(),
-            'applications_over_time': report_generator.get_applications_over_time(group_by=time_grouping),
-            'status_distribution': report_generator.get_status_distribution(),
-            'top_countries': report_generator.get_top_countries(),
+            # The datasets are independent queries, run concurrently under ASGI.
+            **run_sections(request, report_generator.get_sections(group_by=time_grouping)),
         }
 
         return Response(response_data)
+
+
+
+class ProfilingTokenView(APIView):
+    """
+    Issues a short-lived token with which a staff member profiles their own requests:
+    send it in the X-Profile header (or `?_profile=`) and follow `X-Profile-URL`.
+    `mode` is "cprofile" (.prof file) or "sample" (collapsed stacks for a flamegraph).
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        mode = request.data.get('mode', 'cprofile')
+        if mode not in profiling.MODES:
+            return Response({"mode": f"Choose one of: {', '.join(profiling.MODES)}."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'token': profiling.issue_token(request.user, mode),
+            'mode': mode,
+            'expires_in': settings.PROFILING_TOKEN_TTL_SECONDS,
+            'header': 'X-Profile',
+        })
+
+
+# --- Protected Media Downloads ---
+class ProtectedFileView(APIView):
+    """
+    Serves a media file to a signed-in user who may see the record it belongs to.
+    Unknown and forbidden files both answer 404, so file names cannot be probed.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, name):
+        if not can_access(request.user, name):
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        return serve(name, as_attachment=request.query_params.get('download') == '1')
+
+
+class SignedFileView(APIView):
+    """Serves a media file from a signed URL issued by ProtectedMediaStorage; no authentication or database access."""
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, name):
+        if not verify(name, request.query_params.get('expires'), request.query_params.get('signature')):
+            return Response({"detail": "This link is invalid or has expired."}, status=status.HTTP_403_FORBIDDEN)
+        return serve(name, as_attachment=request.query_params.get('download') == '1')
+
+
+
+# --- Metrics ---
+def metrics_view(request):
+    """
+    Prometheus text exposition of apps/core/metrics.py; 404 while METRICS_ENABLED is off.
+    The scraper sends METRICS_TOKEN as `Authorization: Bearer <token>` or scrapes from
+    one of METRICS_ALLOWED_IPS. Only DEBUG serves it to anyone when no token is set.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    token = settings.METRICS_TOKEN
+    allowed = (
+        (token and constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'))
+        or request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+        or (settings.DEBUG and not token)
+    )
+    if not allowed:
+        return HttpResponse(status=401 if token else 403)
+    return HttpResponse(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
     
 @user_passes_test(lambda u: u.is_staff and u.is_superuser)
 def management_actions_view(request):
@@ -1,26 +1,31 @@
 # apps/support/admin.py
 from django.contrib import admin
+from apps.core.admin_paging import EstimatedCountMixin, PaginatedInline
 from .models import SupportTicket, TicketMessage
 
-class TicketMessageInline(admin.TabularInline):
-    """Allows viewing and adding messages directly within the ticket admin page."""
+class TicketMessageInline(PaginatedInline):
+    """The ticket's conversation, newest first, a page at a time. Replies are sent through the API."""
     model = TicketMessage
-    extra = 1
-    readonly_fields = ('sender', 'timestamp')
     fields = ('sender', 'message', 'attachment', 'timestamp')
+    readonly_fields = fields
+    ordering = ('-timestamp',)
+    list_select_related = ('sender',)
 
 @admin.register(SupportTicket)
-class SupportTicketAdmin(admin.ModelAdmin):
-    list_display = ('ticket_id', 'subject', 'user', 'category', 'status', 'updated_at')
-    list_filter = ('status', 'category', 'created_at')
+class SupportTicketAdmin(EstimatedCountMixin, admin.ModelAdmin):
+    list_display = ('ticket_id', 'subject', 'user', 'category', 'status', 'message_count', 'last_message_at', 'updated_at')
+    list_filter = ('status', 'category', 'last_sender_is_staff', 'created_at')
     search_fields = ('ticket_id', 'subject', 'user__email')
-    readonly_fields = ('ticket_id', 'created_at', 'updated_at')
+    readonly_fields = ('ticket_id', 'created_at', 'updated_at', 'last_message_at', 'message_count', 'last_sender_is_staff')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
     inlines = [TicketMessageInline]
 
 @admin.register(TicketMessage)
-class TicketMessageAdmin(admin.ModelAdmin):
+class TicketMessageAdmin(EstimatedCountMixin, admin.ModelAdmin):
     """A standalone admin view for messages, useful for searching all messages."""
     list_display = ('ticket', 'sender', 'timestamp')
+    list_select_related = ('ticket', 'sender')
     list_filter = ('timestamp',)
     search_fields = ('message', 'sender__email', 'ticket__ticket_id')
     raw_id_fields = ('ticket', 'sender') # Better UI for selecting FKs with many options
\ No newline at end of file
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.13 on 2026-10-19 02:52
+
+from django.db import migrations, models
+
+
+def backfill_thread_summary(apps, schema_editor):
+    SupportTicket = apps.get_model('support', 'SupportTicket')
+    TicketMessage = apps.get_model('support', 'TicketMessage')
+    for ticket in SupportTicket.objects.iterator():
+        last = TicketMessage.objects.filter(ticket=ticket).select_related('sender').order_by('-timestamp', '-id').first()
+        if last is None:
+            continue
+        sender = last.sender
+        SupportTicket.objects.filter(pk=ticket.pk).update(
+            message_count=TicketMessage.objects.filter(ticket=ticket).count(),
+            last_message_at=last.timestamp,
+            last_sender_is_staff=sender.is_staff or sender.roles.filter(name='SupportStaff').exists(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0001_initial'),
+        ('users', '0004_passwordresettoken_institutionprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supportticket',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Last Message At'),
+        ),
+        migrations.AddField(
+            model_name='supportticket',
+            name='last_sender_is_staff',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Last Sender Is Staff'),
+        ),
+        migrations.AddField(
+            model_name='supportticket',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Message Count'),
+        ),
+        migrations.RunPython(backfill_thread_summary, migrations.RunPython.noop),
+    ]
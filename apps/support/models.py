@@ -1,13 +1,12 @@
 # apps/support/models.py
-import uuid
 from django.db import models
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
 def generate_ticket_id():
-    """Generates a unique, human-readable ticket ID like 'SPT-ABC-123'."""
-    # This combination provides a good balance of uniqueness and readability.
-    return f"SPT-{str(uuid.uuid4().hex[:3]).upper()}-{str(uuid.uuid4().int)[:3]}"
+    """Allocates the next ticket ID of the year, like 'SPT-26-001ZK' (see apps/core/identifiers.py)."""
+    from apps.core.identifiers import allocate
+    return allocate('ticket_id')
 
 class SupportTicket(models.Model):
     class StatusChoices(models.TextChoices):
@@ -28,6 +27,10 @@ class SupportTicket(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized from the thread so ticket lists never have to touch the messages table.
+    last_message_at = models.DateTimeField(_("Last Message At"), null=True, blank=True, editable=False)
+    message_count = models.PositiveIntegerField(_("Message Count"), default=0, editable=False)
+    last_sender_is_staff = models.BooleanField(_("Last Sender Is Staff"), default=False, editable=False)
 
     class Meta:
         verbose_name = _("Support Ticket")
@@ -37,6 +40,23 @@ class SupportTicket(models.Model):
     def __str__(self):
         return f"Ticket {self.ticket_id} - {self.subject}"
 
+    def record_message(self, message, sent_by_staff, status=None):
+        """
+        Updates the denormalized thread columns (and optionally the status) for a new message.
+        The count is incremented in the database so concurrent replies are not lost.
+        """
+        changes = {
+            'last_message_at': message.timestamp,
+            'last_sender_is_staff': sent_by_staff,
+            'updated_at': message.timestamp,  # Brings the ticket to the top of lists.
+        }
+        if status is not None:
+            changes['status'] = status
+        SupportTicket.objects.filter(pk=self.pk).update(message_count=models.F('message_count') + 1, **changes)
+        for field, value in changes.items():
+            setattr(self, field, value)
+        self.refresh_from_db(fields=['message_count'])
+
 class TicketMessage(models.Model):
     ticket = models.ForeignKey(SupportTicket, on_delete=models.CASCADE, related_name="messages")
     sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
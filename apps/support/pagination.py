@@ -0,0 +1,10 @@
+# apps/support/pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+class TicketMessagePagination(CursorPagination):
+    """Pages a ticket thread from the newest message backwards; `next` loads older messages."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-timestamp', '-id')
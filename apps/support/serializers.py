@@ -3,38 +3,51 @@
 from rest_framework import serializers
 from .models import SupportTicket, TicketMessage
 from apps.users.serializers import UserSerializer
+from apps.uploads.serializers import AttachesUploadsMixin, UploadReferenceField
 
-class TicketMessageSerializer(serializers.ModelSerializer):
+class TicketMessageSerializer(AttachesUploadsMixin, serializers.ModelSerializer):
     """Serializer for an individual ticket message."""
     sender = UserSerializer(read_only=True)
+    # An attachment sent through the resumable upload API, instead of inline.
+    upload_id = UploadReferenceField(source='attachment', write_only=True, required=False)
     class Meta:
         model = TicketMessage
-        fields = ['id', 'sender', 'message', 'attachment', 'timestamp']
+        fields = ['id', 'sender', 'message', 'attachment', 'upload_id', 'timestamp']
         read_only_fields = ['id', 'sender', 'timestamp']
 
 class SupportTicketListSerializer(serializers.ModelSerializer):
     """A simplified serializer for listing multiple support tickets."""
     class Meta:
         model = SupportTicket
-        fields = ['ticket_id', 'subject', 'category', 'status', 'updated_at']
+        fields = [
+            'ticket_id', 'subject', 'category', 'status', 'updated_at',
+            'last_message_at', 'message_count', 'last_sender_is_staff',
+        ]
 
 class SupportTicketDetailSerializer(serializers.ModelSerializer):
-    """A detailed serializer for viewing a single ticket and its full conversation."""
+    """
+    A detailed serializer for viewing a single ticket.
+    The view adds the newest page of the conversation as `messages` and a link to
+    older ones as `older_messages`, rather than embedding the whole thread.
+    """
     user = UserSerializer(read_only=True)
-    messages = TicketMessageSerializer(many=True, read_only=True)
     class Meta:
         model = SupportTicket
-        fields = ['ticket_id', 'user', 'subject', 'category', 'status', 'created_at', 'updated_at', 'messages']
+        fields = [
+            'ticket_id', 'user', 'subject', 'category', 'status', 'created_at', 'updated_at',
+            'last_message_at', 'message_count', 'last_sender_is_staff',
+        ]
 
-class SupportTicketCreateSerializer(serializers.ModelSerializer):
+class SupportTicketCreateSerializer(AttachesUploadsMixin, serializers.ModelSerializer):
     """Serializer used for creating a new support ticket."""
     # The first message is created along with the ticket, so we accept its content here.
     # These fields do not exist on the SupportTicket model but are used by the view.
     message = serializers.CharField(write_only=True, required=True, min_length=10)
     attachment = serializers.FileField(write_only=True, required=False, allow_null=True)
+    upload_id = UploadReferenceField(source='attachment', write_only=True, required=False)
     
     class Meta:
         model = SupportTicket
         # The user will be set automatically from the request.
-        fields = ['subject', 'category', 'message', 'attachment']
+        fields = ['subject', 'category', 'message', 'attachment', 'upload_id']
 # end of apps/support/serializers.py
\ No newline at end of file
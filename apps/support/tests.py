@@ -0,0 +1,73 @@
+# apps/support/tests.py
+from rest_framework.test import APITestCase
+
+from apps.users.models import Role, User
+from .models import SupportTicket
+
+
+class TicketThreadTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='password123', full_name='Owner')
+        cls.other = User.objects.create_user(email='other@example.com', password='password123', full_name='Other')
+        cls.staff = User.objects.create_user(email='staff@example.com', password='password123', full_name='Staff')
+        cls.staff.roles.add(Role.objects.create(name='SupportStaff'))
+
+    def setUp(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.post('/api/v1/support/tickets/', {
+            'subject': 'Cannot upload', 'category': 'Technical', 'message': 'The upload keeps failing.',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.ticket_id = response.data['ticket_id']
+
+    def messages_url(self, ticket_id=None):
+        return f'/api/v1/support/tickets/{ticket_id or self.ticket_id}/messages/'
+
+    def reply(self, user, text):
+        self.client.force_authenticate(user)
+        return self.client.post(self.messages_url(), {'message': text})
+
+    def test_replies_update_the_thread_columns(self):
+        self.assertEqual(self.reply(self.staff, 'Which browser are you using?').status_code, 201)
+        ticket = SupportTicket.objects.get(ticket_id=self.ticket_id)
+        self.assertEqual((ticket.message_count, ticket.last_sender_is_staff), (2, True))
+        self.assertEqual(ticket.status, SupportTicket.StatusChoices.AWAITING_REPLY)
+        self.assertEqual(ticket.last_message_at, ticket.messages.order_by('-timestamp').first().timestamp)
+
+        self.assertEqual(self.reply(self.owner, 'Firefox, latest version.').status_code, 201)
+        ticket.refresh_from_db()
+        self.assertEqual((ticket.message_count, ticket.last_sender_is_staff), (3, False))
+        self.assertEqual(ticket.status, SupportTicket.StatusChoices.OPEN)
+
+        listed = self.client.get('/api/v1/support/tickets/').data['results']
+        self.assertEqual(listed[0]['message_count'], 3)
+
+    def test_messages_cannot_be_edited_or_deleted(self):
+        message_id = self.client.get(self.messages_url()).data['results'][0]['id']
+        url = f'{self.messages_url()}{message_id}/'
+        self.assertEqual(self.client.patch(url, {'message': 'Edited message text.'}).status_code, 405)
+        self.assertEqual(self.client.delete(url).status_code, 405)
+        self.assertEqual(SupportTicket.objects.get(ticket_id=self.ticket_id).message_count, 1)
+
+    def test_update_returns_the_thread(self):
+        self.reply(self.staff, 'Which browser are you using?')
+        self.client.force_authenticate(self.owner)
+        response = self.client.patch(f'/api/v1/support/tickets/{self.ticket_id}/', {'subject': 'Upload fails in Firefox'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['subject'], 'Upload fails in Firefox')
+        self.assertEqual([message['message'] for message in response.data['messages']], [
+            'The upload keeps failing.', 'Which browser are you using?',
+        ])
+        self.assertIsNone(response.data['older_messages'])
+
+    def test_tickets_and_threads_are_visible_to_owner_and_staff_only(self):
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(f'/api/v1/support/tickets/{self.ticket_id}/').status_code, 404)
+        self.assertEqual(self.client.get(self.messages_url()).data['results'], [])
+        self.assertEqual(self.reply(self.other, 'Let me in on this thread.').status_code, 403)
+
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.get(f'/api/v1/support/tickets/{self.ticket_id}/').status_code, 200)
+        self.assertEqual(len(self.client.get(self.messages_url()).data['results']), 1)
@@ -1,14 +1,39 @@
 # start of apps/support/views.py
 # apps/support/views.py
 from django.db import transaction
-from rest_framework import viewsets, permissions, status
+from django.urls import reverse
+from rest_framework import mixins, viewsets, permissions, status
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.response import Response
 from .models import SupportTicket, TicketMessage
+from .pagination import TicketMessagePagination
 from .serializers import (
     SupportTicketListSerializer, SupportTicketDetailSerializer,
     SupportTicketCreateSerializer, TicketMessageSerializer
 )
 
+
+def is_support_staff(user):
+    return user.is_staff or user.roles.filter(name='SupportStaff').exists()
+
+
+def visible_tickets(user):
+    """
+    Users can only see their own tickets.
+    Staff with the 'SupportStaff' role (or is_staff) can see all tickets.
+    """
+    if is_support_staff(user):
+        return SupportTicket.objects.all()
+    return SupportTicket.objects.filter(user=user)
+
+
+def thread_queryset(ticket):
+    # TicketMessageSerializer renders the full sender, including roles and universities.
+    return ticket.messages.select_related('sender__organization_unit').prefetch_related(
+        'sender__roles', 'sender__universities'
+    )
+
+
 class SupportTicketViewSet(viewsets.ModelViewSet):
     """ViewSet for creating and viewing support tickets."""
     queryset = SupportTicket.objects.all()
@@ -23,17 +48,34 @@ class SupportTicketViewSet(viewsets.ModelViewSet):
         return SupportTicketListSerializer
 
     def get_queryset(self):
-        """
-        Users can only see their own tickets.
-        Staff with the 'SupportStaff' role (or is_staff) can see all tickets.
-        """
-        user = self.request.user
-        base_queryset = SupportTicket.objects.prefetch_related('messages__sender', 'user')
-        
-        # Check if the user is part of a dedicated support role or is a general staff member.
-        if user.is_staff or user.roles.filter(name='SupportStaff').exists():
-            return base_queryset
-        return base_queryset.filter(user=user)
+        queryset = visible_tickets(self.request.user)
+        if self.action == 'list':
+            # The list serializer only reads the ticket's own (denormalized) columns.
+            return queryset
+        return queryset.select_related('user__organization_unit').prefetch_related('user__roles', 'user__universities')
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self._detail_data(self.get_object()))
+
+    def _detail_data(self, ticket):
+        """Ticket details plus the newest page of its thread, oldest first, and a link to older messages."""
+        paginator = TicketMessagePagination()
+        page = paginator.paginate_queryset(thread_queryset(ticket), self.request, view=self)
+        # The cursor links must point at the messages endpoint, not at the ticket itself.
+        paginator.base_url = self.request.build_absolute_uri(
+            reverse('ticket-message-list', kwargs={'ticket_ticket_id': ticket.ticket_id})
+        )
+        data = SupportTicketDetailSerializer(ticket, context=self.get_serializer_context()).data
+        data['messages'] = TicketMessageSerializer(
+            list(reversed(page)), many=True, context=self.get_serializer_context()
+        ).data
+        data['older_messages'] = paginator.get_next_link()
+        return data
+
+    def update(self, request, *args, **kwargs):
+        """Returns the detailed view of the updated ticket, like create and retrieve."""
+        super().update(request, *args, **kwargs)
+        return Response(self._detail_data(self.get_object()))
 
     def perform_create(self, serializer):
         """Handle the creation of the ticket and its initial message atomically."""
@@ -46,12 +88,13 @@ class SupportTicketViewSet(viewsets.ModelViewSet):
             # Save the SupportTicket instance, linking it to the current user.
             ticket = serializer.save(user=user)
             # Create the first message for this new ticket.
-            TicketMessage.objects.create(
+            message = TicketMessage.objects.create(
                 ticket=ticket, 
                 sender=user, 
                 message=message_text, 
                 attachment=attachment_file
             )
+            ticket.record_message(message, sent_by_staff=is_support_staff(user))
 
     def create(self, request, *args, **kwargs):
         """Override create to return the detailed view of the new ticket for a better UX."""
@@ -59,21 +102,30 @@ class SupportTicketViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         
-        # After creation, serialize the instance with the detailed serializer.
-        detail_serializer = SupportTicketDetailSerializer(serializer.instance)
-        headers = self.get_success_headers(detail_serializer.data)
-        return Response(detail_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+        # After creation, return the detailed view of the ticket.
+        data = self._detail_data(serializer.instance)
+        headers = self.get_success_headers(data)
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
 
-class TicketMessageViewSet(viewsets.ModelViewSet):
-    """ViewSet for replying to an existing support ticket."""
+class TicketMessageViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                           mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    ViewSet for replying to an existing support ticket.
+    Listing pages through the thread newest first; follow `next` to load older messages.
+    Messages cannot be edited or deleted, which keeps the ticket's thread columns true.
+    """
     queryset = TicketMessage.objects.all()
     serializer_class = TicketMessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TicketMessagePagination
 
     def get_queryset(self):
-        """Filter messages to only those belonging to the specified ticket in the URL."""
+        """Messages of the ticket in the URL, provided the user can see that ticket."""
         ticket_id = self.kwargs.get('ticket_ticket_id')
-        return TicketMessage.objects.filter(ticket__ticket_id=ticket_id)
+        ticket = visible_tickets(self.request.user).filter(ticket_id=ticket_id).first()
+        if ticket is None:
+            return TicketMessage.objects.none()
+        return thread_queryset(ticket)
 
     def perform_create(self, serializer):
         """Handle the creation of a new message and update the parent ticket."""
@@ -81,27 +133,25 @@ class TicketMessageViewSet(viewsets.ModelViewSet):
         try:
             ticket = SupportTicket.objects.get(ticket_id=ticket_id)
         except SupportTicket.DoesNotExist:
-            raise permissions.NotFound("Ticket not found.")
+            raise NotFound("Ticket not found.")
             
         user = self.request.user
-        is_staff = user.is_staff or user.roles.filter(name='SupportStaff').exists()
+        is_staff = is_support_staff(user)
 
         # Permission check: user must be the ticket owner or a staff member.
         if ticket.user != user and not is_staff:
-            raise permissions.PermissionDenied("You do not have permission to reply to this ticket.")
+            raise PermissionDenied("You do not have permission to reply to this ticket.")
             
         with transaction.atomic():
             message = serializer.save(sender=user, ticket=ticket)
             
-            # Update ticket timestamp to bring it to the top of lists.
-            ticket.updated_at = message.timestamp
-            
             # Update ticket status based on who replied.
             if is_staff:
                 # If staff replies, the ball is in the user's court.
-                ticket.status = SupportTicket.StatusChoices.AWAITING_REPLY
+                new_status = SupportTicket.StatusChoices.AWAITING_REPLY
             else:
                 # If the user replies, the ticket is now 'Open' for staff to see.
-                ticket.status = SupportTicket.StatusChoices.OPEN
-            ticket.save()
+                new_status = SupportTicket.StatusChoices.OPEN
+            # Also bumps updated_at to bring the ticket to the top of lists.
+            ticket.record_message(message, sent_by_staff=is_staff, status=new_status)
 # end of apps/support/views.py
\ No newline at end of file
@@ -0,0 +1,11 @@
+# apps/uploads/admin.py
+from django.contrib import admin
+from .models import ChunkedUpload
+
+@admin.register(ChunkedUpload)
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'owner', 'status', 'offset', 'size', 'created_at', 'expires_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('filename', 'owner__email', 'sha256')
+    readonly_fields = ('id', 'offset', 'sha256', 'completed_at', 'created_at')
+    raw_id_fields = ('owner',)
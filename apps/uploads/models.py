@@ -0,0 +1,49 @@
+# apps/uploads/models.py
+import os
+import uuid
+from django.db import models
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+
+class ChunkedUpload(models.Model):
+    """
+    A file uploaded in chunks through the resumable upload API.
+    Once complete, its id can be given to one of the document, certificate and ticket
+    attachment endpoints instead of sending the file itself. The record then shares
+    the stored file, so the upload is marked attached and cannot be used again.
+    """
+    class StatusChoices(models.TextChoices):
+        UPLOADING = 'UPLOADING', _('Uploading')
+        COMPLETE = 'COMPLETE', _('Complete')
+        ATTACHED = 'ATTACHED', _('Attached')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="chunked_uploads")
+    filename = models.CharField(_("Filename"), max_length=255)
+    content_type = models.CharField(_("Content Type"), max_length=100, blank=True)
+    size = models.BigIntegerField(_("Size"), help_text=_("Total length announced by the client, in bytes."))
+    offset = models.BigIntegerField(_("Offset"), default=0, help_text=_("Number of bytes received so far."))
+    file = models.FileField(_("File"), max_length=255, blank=True)
+    sha256 = models.CharField(_("SHA-256"), max_length=64, blank=True)
+    status = models.CharField(_("Status"), max_length=10, choices=StatusChoices.choices, default=StatusChoices.UPLOADING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(_("Completed At"), null=True, blank=True)
+    expires_at = models.DateTimeField(_("Expires At"))
+
+    class Meta:
+        verbose_name = _("Chunked Upload")
+        verbose_name_plural = _("Chunked Uploads")
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'expires_at'], name='uploads_expiry_idx')]
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def extension(self):
+        return os.path.splitext(self.filename)[1].lstrip('.').lower()
+
+    @property
+    def is_complete(self):
+        return self.status != self.StatusChoices.UPLOADING
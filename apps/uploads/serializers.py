@@ -0,0 +1,58 @@
+# apps/uploads/serializers.py
+from django.db import transaction
+from rest_framework import serializers
+from .models import ChunkedUpload
+from .storage import UploadError, attach_upload, attachable_upload
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    """Read-only view of an upload's progress."""
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'filename', 'content_type', 'size', 'offset', 'status', 'sha256', 'created_at', 'completed_at', 'expires_at']
+        read_only_fields = fields
+
+
+class UploadReferenceField(serializers.UUIDField):
+    """
+    Accepts the id of a completed upload owned by the requesting user and resolves it
+    to the stored file's name, so it can be written straight into a FileField.
+    An upload can be attached once. Validation only checks it is free; the root serializer
+    must use AttachesUploadsMixin, which marks it attached when the record is saved.
+    Declare it with `source` pointing at the FileField it fills, e.g.
+    `upload_id = UploadReferenceField(source='file', write_only=True, required=False)`.
+    """
+    default_error_messages = {
+        'invalid_upload': 'Invalid upload: {message}',
+    }
+
+    def to_internal_value(self, data):
+        upload_id = super().to_internal_value(data)
+        request = self.context.get('request')
+        try:
+            upload = attachable_upload(upload_id, request.user if request else None)
+        except UploadError as exc:
+            self.fail('invalid_upload', message=str(exc))
+        referenced = getattr(self.root, '_referenced_uploads', None)
+        if referenced is None:
+            referenced = self.root._referenced_uploads = []
+        referenced.append(upload.pk)
+        return upload.file.name
+
+
+class AttachesUploadsMixin:
+    """
+    Saves the record and marks the uploads its UploadReferenceFields accepted as attached,
+    in one transaction, so a request that fails leaves its uploads free to reuse.
+    """
+
+    def save(self, **kwargs):
+        request = self.context.get('request')
+        with transaction.atomic():
+            instance = super().save(**kwargs)
+            for upload_id in dict.fromkeys(getattr(self, '_referenced_uploads', [])):
+                try:
+                    attach_upload(upload_id, request.user if request else None)
+                except UploadError as exc:
+                    raise serializers.ValidationError({'upload_id': [f'Invalid upload: {exc}']})
+        return instance
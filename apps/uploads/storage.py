@@ -0,0 +1,246 @@
+# apps/uploads/storage.py
+import base64
+import hashlib
+import os
+import shutil
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models import ChunkedUpload
+
+CHUNK_READ_SIZE = 64 * 1024
+CHECKSUM_ALGORITHMS = {'sha1': hashlib.sha1, 'sha256': hashlib.sha256, 'md5': hashlib.md5}
+
+# Leading bytes every file of a type must start with; checked until they are all stored.
+SIGNATURES = {
+    'pdf': (b'%PDF',),
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'jpg': (b'\xff\xd8\xff',),
+    'jpeg': (b'\xff\xd8\xff',),
+}
+SIGNATURE_LENGTH = max(len(signature) for signatures in SIGNATURES.values() for signature in signatures)
+
+
+class UploadError(Exception):
+    """An upload request that cannot be accepted; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def max_upload_size():
+    return settings.UPLOAD_MAX_SIZE
+
+
+def allowed_extensions():
+    return [extension.lower() for extension in settings.UPLOAD_ALLOWED_EXTENSIONS]
+
+
+def validate_announced_file(filename, size):
+    """Rejects an upload from its name and announced length, before any content is sent."""
+    if size < 0:
+        raise UploadError("Upload-Length must not be negative.")
+    if size > max_upload_size():
+        raise UploadError(f"File too large. Size should not exceed {max_upload_size() // (1024 * 1024)} MB.", status=413)
+    extension = os.path.splitext(filename)[1].lstrip('.').lower()
+    if extension not in allowed_extensions():
+        raise UploadError(f"File extension '{extension}' is not allowed. Allowed: {', '.join(allowed_extensions())}.", status=415)
+
+
+def start_upload(owner, filename, size, content_type=''):
+    validate_announced_file(filename, size)
+    upload = ChunkedUpload(
+        owner=owner, filename=filename[:255], size=size, content_type=content_type[:100],
+        expires_at=timezone.now() + timedelta(hours=settings.UPLOAD_EXPIRY_HOURS),
+    )
+    name = f"uploads/{upload.id}/{get_valid_filename(os.path.basename(filename)) or 'file'}"
+    # Reserve the file up front so every chunk can be appended in place.
+    upload.file.name = default_storage.save(name, ContentFile(b''))
+    upload.save()
+    if size == 0:
+        _complete(upload, hashlib.sha256())
+    return upload
+
+
+def parse_checksum(header):
+    """Parses a tus `Upload-Checksum: <algorithm> <base64 digest>` header."""
+    if not header:
+        return None
+    try:
+        algorithm, encoded = header.split(' ', 1)
+        digest = base64.b64decode(encoded.strip(), validate=True)
+    except ValueError:
+        raise UploadError("Malformed Upload-Checksum header.")
+    if algorithm.lower() not in CHECKSUM_ALGORITHMS:
+        raise UploadError(f"Unsupported checksum algorithm '{algorithm}'.")
+    return algorithm.lower(), digest
+
+
+def _hash_prefix(path, length):
+    """Hashes the bytes already on disk, so the final chunk can finish the whole-file digest."""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as stored:
+        remaining = length
+        while remaining:
+            block = stored.read(min(CHUNK_READ_SIZE, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def _check_signature(extension, head, partial=False):
+    """Checks the leading bytes of a file; a `partial` head only has to agree with a signature so far."""
+    signatures = SIGNATURES.get(extension)
+    if not signatures:
+        return
+    if partial:
+        matches = any(head[:len(signature)] == signature[:len(head)] for signature in signatures)
+    else:
+        matches = any(head.startswith(signature) for signature in signatures)
+    if not matches:
+        raise UploadError(f"File content does not match its '.{extension}' extension.", status=415)
+
+
+def _stored_head(path, offset):
+    """The bytes of the signature already on disk, up to `offset`."""
+    with open(path, 'rb') as stored:
+        return stored.read(min(offset, SIGNATURE_LENGTH))
+
+
+def _lock_upload(upload_id, owner, offset):
+    """The upload row, locked, provided a chunk at `offset` may still be appended to it."""
+    upload = ChunkedUpload.objects.select_for_update().filter(pk=upload_id, owner=owner).first()
+    if upload is None:
+        raise UploadError("Upload not found.", status=404)
+    if upload.is_complete:
+        raise UploadError("Upload is already complete.", status=403)
+    if upload.expires_at <= timezone.now():
+        raise UploadError("Upload has expired.", status=410)
+    if offset != upload.offset:
+        raise UploadError(f"Upload-Offset {offset} does not match the current offset {upload.offset}.", status=409)
+    return upload
+
+
+def append_chunk(upload_id, owner, offset, stream, length, checksum=None):
+    """
+    Appends `length` bytes read from `stream` at `offset` of an upload and returns it.
+
+    The body is streamed into a part file next to the stored one, never held in memory,
+    and the upload row is only locked to check the offset again and append the part.
+    The signature of the file type is checked until SIGNATURE_LENGTH bytes are stored;
+    the final chunk completes the upload and records its SHA-256.
+    """
+    with transaction.atomic():
+        upload = _lock_upload(upload_id, owner, offset)
+    if length is None or offset + length > upload.size:
+        raise UploadError("Chunk would exceed the announced Upload-Length.", status=413)
+
+    is_final = offset + length == upload.size
+    path = default_storage.path(upload.file.name)
+    # Bytes before the offset no longer change, so they can be read without the lock.
+    whole_file = _hash_prefix(path, offset) if is_final else None
+    chunk_hash = CHECKSUM_ALGORITHMS[checksum[0]]() if checksum else None
+    head = _stored_head(path, offset) if offset < SIGNATURE_LENGTH else None
+
+    part_path = f'{path}.{uuid.uuid4().hex}.part'
+    received = 0
+    try:
+        with open(part_path, 'wb') as part:
+            try:
+                while received < length:
+                    block = stream.read(min(CHUNK_READ_SIZE, length - received))
+                    if not block:
+                        break
+                    if head is not None:
+                        head += block
+                        if len(head) >= SIGNATURE_LENGTH:
+                            _check_signature(upload.extension, head)
+                            head = None
+                    part.write(block)
+                    received += len(block)
+                    if whole_file is not None:
+                        whole_file.update(block)
+                    if chunk_hash is not None:
+                        chunk_hash.update(block)
+            except OSError:
+                pass  # Client went away mid-chunk; keep what arrived so it can resume from there.
+        if head is not None:
+            _check_signature(upload.extension, head, partial=offset + received < upload.size)
+        if chunk_hash is not None and (received != length or chunk_hash.digest() != checksum[1]):
+            raise UploadError("Checksum mismatch.", status=460)
+
+        with transaction.atomic():
+            upload = _lock_upload(upload_id, owner, offset)
+            with open(path, 'r+b') as stored, open(part_path, 'rb') as part:
+                stored.seek(offset)
+                stored.truncate()
+                shutil.copyfileobj(part, stored, CHUNK_READ_SIZE)
+            upload.offset = offset + received
+            if upload.offset == upload.size and whole_file is not None:
+                _complete(upload, whole_file)
+            else:
+                upload.save(update_fields=['offset'])
+    finally:
+        os.remove(part_path)
+    return upload
+
+
+def _complete(upload, hasher):
+    upload.offset = upload.size
+    upload.sha256 = hasher.hexdigest()
+    upload.status = ChunkedUpload.StatusChoices.COMPLETE
+    upload.completed_at = timezone.now()
+    upload.save()
+
+
+def discard_upload(upload):
+    default_storage.delete(upload.file.name)
+    upload.delete()
+
+
+def attachable_upload(upload_id, owner):
+    """Returns the completed upload `upload_id` of `owner` if it is still free to attach to a record."""
+    upload = ChunkedUpload.objects.filter(pk=upload_id, owner=owner).first()
+    if upload is None:
+        raise UploadError("Upload not found.", status=404)
+    if upload.status == ChunkedUpload.StatusChoices.UPLOADING:
+        raise UploadError("Upload is not complete yet.")
+    if upload.status == ChunkedUpload.StatusChoices.ATTACHED:
+        raise UploadError("Upload has already been attached.", status=409)
+    return upload
+
+
+def attach_upload(upload_id, owner):
+    """
+    Marks the completed upload `upload_id` of `owner` attached to the record being saved:
+    the record keeps the stored file, so no other record may take it. Call it in the
+    transaction that saves the record, so a failed save leaves the upload free.
+    """
+    upload = attachable_upload(upload_id, owner)
+    attached = ChunkedUpload.objects.filter(pk=upload.pk, status=ChunkedUpload.StatusChoices.COMPLETE).update(
+        status=ChunkedUpload.StatusChoices.ATTACHED
+    )
+    if not attached:
+        raise UploadError("Upload has already been attached.", status=409)
+    upload.status = ChunkedUpload.StatusChoices.ATTACHED
+    return upload
+
+
+def purge_expired_uploads():
+    """Deletes unfinished uploads past their expiry together with their partial files."""
+    expired = ChunkedUpload.objects.filter(status=ChunkedUpload.StatusChoices.UPLOADING, expires_at__lte=timezone.now())
+    count = 0
+    for upload in expired.iterator():
+        discard_upload(upload)
+        count += 1
+    return count
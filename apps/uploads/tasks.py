@@ -0,0 +1,10 @@
+# apps/uploads/tasks.py
+from celery import shared_task
+
+from .storage import purge_expired_uploads
+
+
+@shared_task(name="purge_expired_uploads", ignore_result=True)
+def purge_expired_uploads_task():
+    """Removes resumable uploads that were abandoned before completion."""
+    return purge_expired_uploads()
@@ -0,0 +1,137 @@
+# apps/uploads/tests.py
+import base64
+import hashlib
+import shutil
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from apps.core.models import Program, University
+from apps.users.models import User
+from .models import ChunkedUpload
+
+PDF = b'%PDF-1.4\n' + b'x' * 5000 + b'\n%%EOF'
+
+
+def metadata(**values):
+    return ','.join(f"{key} {base64.b64encode(value.encode()).decode()}" for key, value in values.items())
+
+
+class ResumableUploadTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='uploader@example.com', password='password123', full_name='Uploader')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root, UPLOAD_MAX_SIZE=10_000))
+        self.client.force_authenticate(self.user)
+
+    def create(self, size, filename='scan.pdf'):
+        return self.client.post(
+            '/api/v1/uploads/', HTTP_UPLOAD_LENGTH=str(size), HTTP_UPLOAD_METADATA=metadata(filename=filename),
+        )
+
+    def patch(self, location, offset, body, **headers):
+        return self.client.generic(
+            'PATCH', location, body, content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset), **headers,
+        )
+
+    def test_resumes_from_reported_offset_and_hashes_content(self):
+        location = self.create(len(PDF))['Location']
+        self.assertEqual(self.patch(location, 0, PDF[:3000]).status_code, 204)
+
+        self.assertEqual(self.client.head(location)['Upload-Offset'], '3000')
+        response = self.patch(location, 3000, PDF[3000:])
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response['Upload-Offset'], str(len(PDF)))
+
+        upload = ChunkedUpload.objects.get()
+        self.assertTrue(upload.is_complete)
+        self.assertEqual(upload.sha256, hashlib.sha256(PDF).hexdigest())
+        with upload.file.open('rb') as stored:
+            self.assertEqual(stored.read(), PDF)
+
+    def test_limits_are_enforced_before_content_is_accepted(self):
+        self.assertEqual(self.create(20_000).status_code, 413)
+        self.assertEqual(self.create(100, filename='script.exe').status_code, 415)
+
+        location = self.create(len(PDF))['Location']
+        self.assertEqual(self.patch(location, 0, b'MZ' + PDF[2:1000]).status_code, 415)
+        self.assertEqual(self.client.head(location)['Upload-Offset'], '0')
+        self.assertEqual(self.patch(location, 10, PDF[10:]).status_code, 409)
+
+    def test_signature_is_checked_across_short_chunks(self):
+        location = self.create(len(PDF))['Location']
+        self.assertEqual(self.patch(location, 0, b'MZ').status_code, 415)
+        self.assertEqual(self.patch(location, 0, PDF[:2]).status_code, 204)
+        self.assertEqual(self.patch(location, 2, b'XX' + PDF[4:1000]).status_code, 415)
+        self.assertEqual(self.client.head(location)['Upload-Offset'], '2')
+        self.assertEqual(self.patch(location, 2, PDF[2:]).status_code, 204)
+        self.assertTrue(ChunkedUpload.objects.get().is_complete)
+
+    def test_checksum_mismatch_discards_chunk(self):
+        location = self.create(len(PDF))['Location']
+        wrong = base64.b64encode(hashlib.sha1(b'other').digest()).decode()
+        self.assertEqual(self.patch(location, 0, PDF, HTTP_UPLOAD_CHECKSUM=f'sha1 {wrong}').status_code, 460)
+        self.assertEqual(self.client.head(location)['Upload-Offset'], '0')
+
+    def test_completed_upload_attaches_to_ticket_message(self):
+        location = self.create(len(PDF))['Location']
+        self.patch(location, 0, PDF)
+        upload = ChunkedUpload.objects.get()
+
+        response = self.client.post('/api/v1/support/tickets/', {
+            'subject': 'Scan', 'category': 'Documents', 'message': 'Please see the attached scan.', 'upload_id': str(upload.id),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertIn(upload.file.name, response.data['messages'][0]['attachment'])
+
+        other = User.objects.create_user(email='other@example.com', password='password123', full_name='Other')
+        self.client.force_authenticate(other)
+        response = self.client.post('/api/v1/support/tickets/', {
+            'subject': 'Scan', 'category': 'Documents', 'message': 'Not my upload, though.', 'upload_id': str(upload.id),
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_upload_is_attached_once_and_kept_once_complete(self):
+        location = self.create(len(PDF))['Location']
+        self.patch(location, 0, PDF)
+        upload = ChunkedUpload.objects.get()
+        self.assertEqual(self.client.delete(location).status_code, 409)
+
+        ticket = {'subject': 'Scan', 'category': 'Documents', 'message': 'Please see the attached scan.', 'upload_id': str(upload.id)}
+        self.assertEqual(self.client.post('/api/v1/support/tickets/', ticket, format='json').status_code, 201)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, ChunkedUpload.StatusChoices.ATTACHED)
+        self.assertEqual(self.client.post('/api/v1/support/tickets/', ticket, format='json').status_code, 400)
+        self.assertEqual(self.client.delete(location).status_code, 409)
+        self.assertTrue(default_storage.exists(upload.file.name))
+
+    def test_failed_request_leaves_the_upload_free(self):
+        location = self.create(len(PDF))['Location']
+        self.patch(location, 0, PDF)
+        upload = ChunkedUpload.objects.get()
+
+        ticket = {'subject': 'Scan', 'category': 'Documents', 'message': 'Too short', 'upload_id': str(upload.id)}
+        self.assertEqual(self.client.post('/api/v1/support/tickets/', ticket, format='json').status_code, 400)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, ChunkedUpload.StatusChoices.COMPLETE)
+
+        ticket['message'] = 'Please see the attached scan.'
+        self.assertEqual(self.client.post('/api/v1/support/tickets/', ticket, format='json').status_code, 201)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, ChunkedUpload.StatusChoices.ATTACHED)
+
+    def test_unfinished_upload_can_be_abandoned(self):
+        location = self.create(len(PDF))['Location']
+        self.patch(location, 0, PDF[:1000])
+        name = ChunkedUpload.objects.get().file.name
+        self.assertEqual(self.client.delete(location).status_code, 204)
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertFalse(default_storage.exists(name))
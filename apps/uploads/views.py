@@ -0,0 +1,123 @@
+# apps/uploads/views.py
+import base64
+import binascii
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import ChunkedUpload
+from .serializers import ChunkedUploadSerializer
+from .storage import CHECKSUM_ALGORITHMS, UploadError, append_chunk, discard_upload, parse_checksum, start_upload
+
+TUS_VERSION = '1.0.0'
+
+
+def _tus_headers(response, upload=None):
+    response['Tus-Resumable'] = TUS_VERSION
+    response['Cache-Control'] = 'no-store'
+    if upload is not None:
+        response['Upload-Offset'] = str(upload.offset)
+        response['Upload-Length'] = str(upload.size)
+        response['Upload-Expires'] = upload.expires_at.strftime('%a, %d %b %Y %H:%M:%S GMT')
+    return response
+
+
+def _error(exc):
+    return _tus_headers(Response({"detail": str(exc)}, status=exc.status))
+
+
+def _parse_metadata(header):
+    """Parses tus `Upload-Metadata`: comma-separated `key base64value` pairs."""
+    metadata = {}
+    for pair in filter(None, (item.strip() for item in (header or '').split(','))):
+        key, _, encoded = pair.partition(' ')
+        try:
+            metadata[key] = base64.b64decode(encoded, validate=True).decode() if encoded else ''
+        except (binascii.Error, UnicodeDecodeError):
+            raise UploadError(f"Malformed Upload-Metadata value for '{key}'.")
+    return metadata
+
+
+class UploadCreateView(APIView):
+    """
+    Starts a resumable upload, following the tus 1.0 protocol (creation, termination,
+    checksum and expiration extensions). The size and file type are checked here,
+    before any content is sent.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def options(self, request, *args, **kwargs):
+        response = Response(status=status.HTTP_204_NO_CONTENT)
+        response['Tus-Version'] = TUS_VERSION
+        response['Tus-Extension'] = 'creation,termination,checksum,expiration'
+        response['Tus-Max-Size'] = str(settings.UPLOAD_MAX_SIZE)
+        response['Tus-Checksum-Algorithm'] = ','.join(CHECKSUM_ALGORITHMS)
+        return _tus_headers(response)
+
+    def post(self, request, *args, **kwargs):
+        try:
+            size = int(request.headers.get('Upload-Length', ''))
+        except ValueError:
+            return _tus_headers(Response({"detail": "Upload-Length header is required."}, status=status.HTTP_400_BAD_REQUEST))
+        try:
+            metadata = _parse_metadata(request.headers.get('Upload-Metadata'))
+            if not metadata.get('filename'):
+                raise UploadError("Upload-Metadata must include a filename.")
+            upload = start_upload(request.user, metadata['filename'], size, metadata.get('filetype', ''))
+        except UploadError as exc:
+            return _error(exc)
+
+        response = Response(ChunkedUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+        response['Location'] = request.build_absolute_uri(reverse('upload-detail', kwargs={'pk': upload.pk}))
+        return _tus_headers(response, upload)
+
+
+class UploadDetailView(APIView):
+    """HEAD reports the offset to resume from, PATCH appends a chunk, DELETE abandons an unfinished upload."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self, pk):
+        return get_object_or_404(ChunkedUpload, pk=pk, owner=self.request.user)
+
+    def head(self, request, pk):
+        return _tus_headers(Response(status=status.HTTP_200_OK), self.get_object(pk))
+
+    def get(self, request, pk):
+        upload = self.get_object(pk)
+        return _tus_headers(Response(ChunkedUploadSerializer(upload).data), upload)
+
+    def patch(self, request, pk):
+        if request.content_type != 'application/offset+octet-stream':
+            return _tus_headers(Response(
+                {"detail": "Content-Type must be application/offset+octet-stream."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            ))
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.headers.get('Content-Length', ''))
+        except ValueError:
+            return _tus_headers(Response(
+                {"detail": "Upload-Offset and Content-Length headers are required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            ))
+        try:
+            # Read from the raw request so the body is never parsed or spooled.
+            upload = append_chunk(
+                pk, request.user, offset, request._request, length,
+                checksum=parse_checksum(request.headers.get('Upload-Checksum')),
+            )
+        except UploadError as exc:
+            return _error(exc)
+        return _tus_headers(Response(status=status.HTTP_204_NO_CONTENT), upload)
+
+    def delete(self, request, pk):
+        upload = self.get_object(pk)
+        if upload.is_complete:
+            # The file may already be, or be about to become, a document or attachment.
+            return _error(UploadError("A completed upload cannot be deleted.", status=409))
+        discard_upload(upload)
+        return _tus_headers(Response(status=status.HTTP_204_NO_CONTENT))
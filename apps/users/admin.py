@@ -2,6 +2,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
+from apps.core.admin_paging import EstimatedCountMixin
 from .models import User, Role
 
 @admin.register(Role)
@@ -13,7 +14,7 @@ class RoleAdmin(admin.ModelAdmin):
     search_fields = ('name',)
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(EstimatedCountMixin, BaseUserAdmin):
     """
     Customized admin view for the custom User model.
     """
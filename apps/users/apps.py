@@ -5,4 +5,8 @@ from django.utils.translation import gettext_lazy as _
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.users'
-    verbose_name = _('User Management')
\ No newline at end of file
+    verbose_name = _('User Management')
+
+    def ready(self):
+        """Registers the profile picture signal handlers."""
+        import apps.users.signals  # noqa: F401
@@ -57,6 +57,10 @@ class User(AbstractUser):
     full_name = models.CharField(_("Full Name"), max_length=255)
     phone_number = models.CharField(_("Phone Number"), max_length=20, blank=True)
     profile_picture = models.ImageField(_("Profile Picture"), upload_to='profile_pics/', null=True, blank=True)
+    image_variants = models.JSONField(
+        _("Image Variants"), default=dict, blank=True, editable=False,
+        help_text=_("Derivatives of the profile picture, filled in by a background task.")
+    )
     roles = models.ManyToManyField(Role, related_name="users", verbose_name=_("Roles"), blank=True)
     universities = models.ManyToManyField('core.University', related_name="experts", blank=True, verbose_name=_("Affiliated Universities"))
     organization_unit = models.ForeignKey('core.OrganizationUnit', on_delete=models.SET_NULL, null=True, blank=True, related_name='staff', verbose_name=_("Organization Unit"))
@@ -2,6 +2,16 @@
 # apps/users/permissions.py
 from rest_framework.permissions import BasePermission
 
+
+def has_role_permission(user, codename):
+    """True if one of the user's roles grants the permission `codename`; superusers have them all."""
+    if not (user and user.is_authenticated):
+        return False
+    if user.is_superuser:
+        return True
+    return user.roles.filter(permissions__codename=codename).exists()
+
+
 class IsHeadOfOrganization(BasePermission):
     """Allows access only to users with the 'HeadOfOrganization' role."""
     message = "You do not have permission to perform this action. Administrator access is required."
@@ -38,15 +48,5 @@ class HasPermission(BasePermission):
             # Deny access if the view doesn't specify a required permission for safety.
             return False
 
-        user = request.user
-        if not (user and user.is_authenticated):
-            return False
-
-        # Superusers bypass all permission checks.
-        if user.is_superuser:
-            return True
-
-        # Check if any of the user's roles contain the required permission.
-        # This is an efficient query that checks the relationship across tables.
-        return user.roles.filter(permissions__codename=required_permission).exists()
+        return has_role_permission(request.user, required_permission)
 # end of apps/users/permissions.py
\ No newline at end of file
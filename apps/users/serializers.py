@@ -6,6 +6,7 @@ from rest_framework import serializers
 from .models import User, Role, Permission, UserNotificationSettings, InstitutionProfile
 from apps.applications.models import ApplicationTask
 from apps.core.serializers import UniversitySerializer
+from apps.core.images import variant_urls
 # --- Read-Only & Helper Serializers ---
 class PermissionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -25,6 +26,8 @@ class UserSerializer(serializers.ModelSerializer):
     universities = UniversitySerializer(many=True, read_only=True)
     # FIX: Use StringRelatedField to include the organization unit's name.
     organization_unit = serializers.StringRelatedField(read_only=True)
+    # Thumbnail/preview/optimized URLs; use the thumbnail for avatars.
+    profile_picture_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = User
@@ -32,9 +35,12 @@ class UserSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'email', 'full_name', 'phone_number', 
             'roles', 'universities', 'organization_unit', 
-            'profile_picture', 'is_active', 'is_staff'
+            'profile_picture', 'profile_picture_variants', 'is_active', 'is_staff'
         ]
 
+    def get_profile_picture_variants(self, obj):
+        return variant_urls(obj.profile_picture, obj.image_variants, self.context.get('request'))
+
 # --- Action-Specific Serializers ---
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password], style={'input_type': 'password'})
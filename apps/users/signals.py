@@ -0,0 +1,12 @@
+# apps/users/signals.py
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.core.images import schedule_variants
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def on_user_save(sender, instance, **kwargs):
+    """Renders avatar-sized copies of a new profile picture in the background."""
+    schedule_variants(instance, 'profile_picture')
@@ -1,42 +1,37 @@
 # apps/users/tasks.py
 from celery import shared_task
-from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
+from apps.core.mail import enqueue_email
 from .models import User
 
-# THE FIX 1: Add bind=True to the decorator
-@shared_task(name="send_password_reset_email", bind=True)
-# THE FIX 2: Add 'self' as the first argument
-def send_password_reset_email_task(self, user_id, token_str):
+def queue_password_reset_email(user, token_str):
     """
-    Asynchronously sends a password reset email to a user.
+    Renders the password reset email and adds it to the email outbox.
+    Call it inside the transaction that created the token; the outbox worker
+    delivers it in a batch once that transaction commits.
+    """
+    frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:3000')
+    context = {
+        'full_name': user.full_name or user.email,
+        'reset_link': f"{frontend_url}/reset-password?token={token_str}",
+    }
+    return enqueue_email(
+        to_email=user.email,
+        subject=render_to_string('emails/password_reset_subject.txt', context).strip(),
+        body_html=render_to_string('emails/password_reset_body.html', context),
+        dedupe_key=f"password-reset:{token_str}",
+    )
+
+@shared_task(name="send_password_reset_email")
+def send_password_reset_email_task(user_id, token_str):
+    """
+    Kept so that messages already sitting in the Celery queue are still handled;
+    new code should call `queue_password_reset_email` directly.
     """
     try:
         user = User.objects.get(pk=user_id)
-        frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:3000')
-        reset_link = f"{frontend_url}/reset-password?token={token_str}"
-        
-        context = {
-            'full_name': user.full_name or user.email,
-            'reset_link': reset_link,
-        }
-        
-        subject = render_to_string('emails/password_reset_subject.txt', context).strip()
-        html_message = render_to_string('emails/password_reset_body.html', context)
-        
-        send_mail(
-            subject=subject,
-            message='',
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        return f"Password reset email sent to {user.email}"
     except User.DoesNotExist:
         return f"User with ID {user_id} not found. Cannot send email."
-    except Exception as e:
-        # It's better to re-raise the exception to have Celery mark the task as failed
-        # and retry based on its configuration. The 'self.retry' call is now correct.
-        raise self.retry(exc=e, countdown=60)
\ No newline at end of file
+    queue_password_reset_email(user, token_str)
+    return f"Password reset email queued for {user.email}"
@@ -1,5 +1,18 @@
 # apps/users/tests.py
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from apps.core.mail import drain_outbox
+from apps.core.models import OutgoingEmail
+from .models import PasswordResetToken, User
+from .serializers import UserSerializer
 
 # Create your tests here.
 # Example test structure:
@@ -26,4 +39,68 @@ from django.test import TestCase
 #         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 #         self.assertTrue(User.objects.filter(email="newapplicant@example.com").exists())
 #         new_user = User.objects.get(email="newapplicant@example.com")
-#         self.assertTrue(new_user.roles.filter(name='Applicant').exists())
\ No newline at end of file
+#         self.assertTrue(new_user.roles.filter(name='Applicant').exists())
+
+
+# --- Password reset email outbox ---
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class PasswordResetOutboxTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='reset@example.com', password='password123', full_name='Reset User')
+
+    def test_reset_request_enqueues_and_outbox_delivers(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post('/api/v1/auth/password-reset/', {'email': 'RESET@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        token = PasswordResetToken.objects.get(user=self.user)
+        self.assertEqual(email.dedupe_key, f'password-reset:{token.token}')
+
+        self.assertEqual(drain_outbox(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reset@example.com'])
+        self.assertIn(str(token.token), mail.outbox[0].alternatives[0][0])
+        self.assertEqual(OutgoingEmail.objects.get().status, OutgoingEmail.StatusChoices.SENT)
+
+
+# --- Profile picture variants ---
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
+class ProfilePictureVariantTests(APITestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.user = User.objects.create_user(email='avatar@example.com', password='password123', full_name='Avatar User')
+
+    def upload_picture(self, size=(2000, 1200)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'teal').save(buffer, 'PNG')
+        self.user.profile_picture = SimpleUploadedFile('me.png', buffer.getvalue(), content_type='image/png')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.user.refresh_from_db()
+
+    def test_variants_are_rendered_next_to_the_original(self):
+        self.upload_picture()
+        variants = self.user.image_variants['variants']
+        self.assertEqual(set(variants), {'thumbnail', 'preview', 'optimized'})
+        self.assertTrue(variants['thumbnail'].startswith('profile_pics/me'))
+
+        storage = self.user.profile_picture.storage
+        with storage.open(variants['thumbnail']) as thumbnail:
+            self.assertEqual(Image.open(thumbnail).size, (128, 128))
+        with storage.open(variants['preview']) as preview:
+            self.assertEqual(max(Image.open(preview).size), 1024)
+
+        urls = UserSerializer(self.user).data['profile_picture_variants']
+        self.assertEqual(urls['thumbnail'], storage.url(variants['thumbnail']))
+
+    def test_replacing_the_picture_drops_old_variants(self):
+        self.upload_picture()
+        old = self.user.image_variants['variants']
+        self.upload_picture(size=(300, 300))
+        self.assertNotEqual(self.user.image_variants['variants'], old)
+        self.assertFalse(any(self.user.profile_picture.storage.exists(name) for name in old.values()))
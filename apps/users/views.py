@@ -19,7 +19,7 @@ from .serializers import (
 )
 from .permissions import IsHeadOfOrganization, HasPermission, IsRecruitmentInstitution # --- FIX: Import new permission
 from .filters import UserFilter
-from .tasks import send_password_reset_email_task
+from .tasks import queue_password_reset_email
 import logging
 
 logger = logging.getLogger(__name__)
@@ -50,9 +50,10 @@ class PasswordResetRequestView(generics.GenericAPIView):
         serializer.is_valid(raise_exception=True)
         try:
             user = User.objects.get(email__iexact=serializer.validated_data['email'])
-            PasswordResetToken.objects.filter(user=user).delete()
-            reset_token = PasswordResetToken.objects.create(user=user)
-            send_password_reset_email_task.delay(user.id, str(reset_token.token))
+            with transaction.atomic():
+                PasswordResetToken.objects.filter(user=user).delete()
+                reset_token = PasswordResetToken.objects.create(user=user)
+                queue_password_reset_email(user, str(reset_token.token))
         except User.DoesNotExist: pass
         return Response({"detail": "If an account with that email exists, a password reset link has been sent."}, status=status.HTTP_200_OK)
 
@@ -2,6 +2,10 @@
 ASGI config for student_affairs_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests for the Server-Sent Events stream (``/api/v1/stream/``) are answered by
+``apps.core.streams.EventStreamApp``; everything else goes to Django. Under ASGI
+the dashboard and report endpoints run their queries concurrently
+(``apps.core.sections``).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +17,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_affairs_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up, since the stream app touches settings and models.
+from apps.core.streams import EventStreamRouter  # noqa: E402
+
+application = EventStreamRouter(django_application)
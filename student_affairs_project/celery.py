@@ -0,0 +1,12 @@
+# student_affairs_project/celery.py
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_affairs_project.settings')
+
+app = Celery('student_affairs_project')
+
+# Read every CELERY_* setting from settings.py, e.g. CELERY_BROKER_URL -> broker_url.
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
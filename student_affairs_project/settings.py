@@ -39,9 +39,13 @@ INSTALLED_APPS = [
     'users',
     'applications',
     'apps.support',
+    'apps.uploads',
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.RequestInstrumentationMiddleware',  # Outermost, so it times everything below it
+    'apps.core.middleware.RequestProfilerMiddleware',  # Only acts on requests carrying a profiling token
+    'apps.core.middleware.ReplicaPinningMiddleware',  # Only installed when a read replica is configured
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -58,7 +62,7 @@ ROOT_URLCONF = 'student_affairs_project.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -85,6 +89,41 @@ DATABASES = {
     }
 }
 
+# --- Read Replica (see apps/core/replicas.py) ---
+# Set DB_REPLICA_HOST (or DB_REPLICA_NAME, for a second local database) to serve lists,
+# exports, reports and reference data from a replica. Pinning users to the primary after
+# a write needs a cache shared by all workers (CACHE_REDIS_URL) in production.
+REPLICA_DATABASE = 'replica'
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+REPLICA_ROUTE_TEST_MIRROR = False  # Tests of the routing itself turn this on
+if os.getenv('DB_REPLICA_HOST') or os.getenv('DB_REPLICA_NAME'):
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'HOST': os.getenv('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'USER': os.getenv('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['apps.core.replicas.ReplicaRouter']
+
+# --- Concurrent Read Sections (ASGI only, see apps/core/sections.py) ---
+# Threads, and so database connections, per ASGI worker for running the independent
+# queries of the dashboard and reports concurrently. 0 runs them one after another.
+SECTION_POOL_SIZE = int(os.getenv('SECTION_POOL_SIZE', 4))
+
+# --- Cache ---
+# Backends from apps/core/cache.py count hits and misses for /metrics.
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'apps.core.cache.RedisCache', 'LOCATION': CACHE_REDIS_URL,
+    } if CACHE_REDIS_URL else {
+        'BACKEND': 'apps.core.cache.LocMemCache',
+    }
+}
+
 # --- Custom User Model ---
 AUTH_USER_MODEL = 'users.User'
 
@@ -110,6 +149,21 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# --- Protected Media ---
+# Uploaded files are not published under MEDIA_URL outside DEBUG. File fields render
+# as short-lived signed links to /api/v1/files/signed/, and /api/v1/files/ serves
+# signed-in users according to the application and ticket permission rules.
+STORAGES = {
+    'default': {'BACKEND': 'apps.core.storage.ProtectedMediaStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+PROTECTED_MEDIA_SIGNED_URLS = os.getenv('PROTECTED_MEDIA_SIGNED_URLS', 'True') == 'True'
+SIGNED_URL_TTL_SECONDS = 300  # Links stay valid for between one and two TTLs
+# 'nginx' (X-Accel-Redirect), 'sendfile' (X-Sendfile, Apache/lighttpd) or '' to stream from Django
+PROTECTED_MEDIA_SERVER = os.getenv('PROTECTED_MEDIA_SERVER', '')
+# nginx `internal` location aliased to MEDIA_ROOT, used with PROTECTED_MEDIA_SERVER = 'nginx'
+PROTECTED_MEDIA_INTERNAL_URL = '/protected-media/'
+
 # --- Default primary key field type ---
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -154,6 +208,7 @@ CORS_ALLOWED_ORIGINS = [
     "https://students.nilva.ir",
     "https://studentbak.nilva.ir",
 ]
+CORS_EXPOSE_HEADERS = ['Server-Timing', 'X-Profile-URL']
 
 CSRF_TRUSTED_ORIGINS = [
     "https://students.nilva.ir",
@@ -163,6 +218,98 @@ CSRF_TRUSTED_ORIGINS = [
 # Celery Configuration (Placeholder for notifications)
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_BEAT_SCHEDULE = {
+    # Safety net for the outbox: picks up retries and anything whose trigger was lost.
+    'drain-email-outbox': {'task': 'drain_email_outbox', 'schedule': 60.0},
+    'dispatch-outbox-events': {'task': 'dispatch_outbox_events', 'schedule': 30.0},
+    'purge-expired-uploads': {'task': 'purge_expired_uploads', 'schedule': 60 * 60.0},
+    'purge-request-profiles': {'task': 'purge_request_profiles', 'schedule': 6 * 60 * 60.0},
+    'purge-outbox-events': {'task': 'purge_outbox_events', 'schedule': 24 * 60 * 60.0},
+}
+
+# --- Application Outbox (side effects of state changes) ---
+OUTBOX_BATCH_SIZE = 200
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_RETRY_BASE_SECONDS = 30  # Doubles after every failed attempt
+OUTBOX_RETENTION_DAYS = 30  # Delivered events are purged after this
+
+# --- Email Outbox ---
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'webmaster@localhost')
+EMAIL_OUTBOX_BATCH_SIZE = 100  # Messages sent per SMTP connection
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 60  # Doubles after every failed attempt
+
+# --- File Uploads ---
+# Shared by the resumable upload API and the multipart file validators.
+UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', 5 * 1024 * 1024))  # Bytes
+UPLOAD_ALLOWED_EXTENSIONS = ['pdf', 'jpg', 'jpeg', 'png']
+UPLOAD_EXPIRY_HOURS = 24  # Unfinished resumable uploads are purged after this
+# Derivatives of profile pictures and scanned documents (see apps/core/images.py)
+IMAGE_VARIANT_FORMAT = 'WEBP'  # Falls back to JPEG when Pillow lacks WebP support
+IMAGE_VARIANT_QUALITY = 80
+
+# --- Public Identifiers (tracking codes and ticket IDs, see apps/core/identifiers.py) ---
+IDENTIFIER_BLOCK_SIZE = 20  # Values each process reserves per PostgreSQL round trip
+
+# --- Admin (see apps/core/admin_paging.py) ---
+# Unfiltered changelists of larger tables show PostgreSQL's row estimate instead of COUNT(*).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ADMIN_ESTIMATED_COUNT_THRESHOLD', 100000))
+ADMIN_INLINE_PER_PAGE = 20  # Rows of paginated inlines (application logs, ticket messages)
+
+# --- Application Exports (see apps/applications/exports.py) ---
+# Exporters are imported on first use. Set EXPORTERS_PRELOAD=True on a worker that
+# serves the export endpoints to import them at boot instead.
+APPLICATION_EXPORTERS = {
+    'xlsx': 'apps.applications.exporters.generate_excel_response',
+    'pdf': 'apps.applications.exporters.generate_pdf_response',
+}
+APPLICATION_EXPORTERS_PRELOAD = os.getenv('EXPORTERS_PRELOAD', 'False') == 'True'
+
+# --- Bulk Application Import ---
+APPLICATION_IMPORT_MAX_ROWS = 1000
+APPLICATION_IMPORT_MAX_ARCHIVE_SIZE = int(os.getenv('APPLICATION_IMPORT_MAX_ARCHIVE_SIZE', 200 * 1024 * 1024))  # Bytes
+
+# --- Request Instrumentation (see apps/core/middleware.py) ---
+# Staff get Server-Timing headers; slow requests and a sample of the rest are logged as JSON.
+REQUEST_INSTRUMENTATION_ENABLED = os.getenv('REQUEST_INSTRUMENTATION_ENABLED', 'True') == 'True'
+REQUEST_INSTRUMENTATION_LOG_SAMPLE_RATE = float(os.getenv('REQUEST_INSTRUMENTATION_LOG_SAMPLE_RATE', 0.01))
+REQUEST_INSTRUMENTATION_SLOW_REQUEST_MS = int(os.getenv('REQUEST_INSTRUMENTATION_SLOW_REQUEST_MS', 1000))  # Always logged
+REQUEST_INSTRUMENTATION_SLOW_QUERY_MS = 100  # Statements listed in the log line
+REQUEST_INSTRUMENTATION_DUPLICATE_THRESHOLD = 5  # Runs of one statement per request that flag an N+1
+REQUEST_INSTRUMENTATION_TOP_QUERIES = 3
+# Slow query log: statements over the threshold are grouped by fingerprint in a Celery task (Admin > Slow Queries)
+# and a sample is explained out-of-band (EXPLAIN ANALYZE on PostgreSQL, always rolled back).
+SLOW_QUERY_CAPTURE_ENABLED = os.getenv('SLOW_QUERY_CAPTURE_ENABLED', 'True') == 'True'
+SLOW_QUERY_THRESHOLD_MS = int(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0.1))
+SLOW_QUERY_EXPLAIN_INTERVAL_MINUTES = 60  # At most one plan per fingerprint in this window
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = 10000
+SLOW_QUERY_MAX_PLANS = 20  # Plans kept per fingerprint
+# On-demand profiles: staff send a token from /api/v1/choices/profiling/token/ in X-Profile.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True') == 'True'
+PROFILING_TOKEN_TTL_SECONDS = 15 * 60
+PROFILING_SAMPLE_INTERVAL_MS = 1  # Sampling mode; the GIL switch interval (5 ms) is the practical floor
+PROFILING_RETENTION_HOURS = 72  # Stored profiles are purged after this
+
+# --- Metrics (Prometheus text format at /metrics, see apps/core/metrics.py) ---
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+# One memory-mapped file per process, summed on scrape. Required under gunicorn or with
+# Celery workers; empty the directory before the service starts.
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')  # Bearer token the scraper must send, when set
+# Scrapers allowed without the token. Outside DEBUG, /metrics needs the token or one of these addresses.
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '').split(',') if ip.strip()]
+METRICS_COLLECTOR_TTL_SECONDS = 30  # Queue depths are queried at most this often per process
+
+# --- Event Stream (Server-Sent Events) ---
+# Leave EVENT_STREAM_REDIS_URL unset to keep events inside a single process; the web
+# process then delivers each event it records on commit, and events left to celery beat
+# (retries, events held back behind an earlier one) are not streamed. Set it when running several ASGI workers, so that
+# every worker sees every event and the outbox is dispatched in Celery.
+EVENT_STREAM_REDIS_URL = os.getenv('EVENT_STREAM_REDIS_URL')
+EVENT_STREAM_HISTORY_SIZE = 100  # Per-user events kept for Last-Event-ID resume
+EVENT_STREAM_HISTORY_USERS = 10000  # Users whose history is kept; the least recently active are dropped
+EVENT_STREAM_KEEPALIVE_SECONDS = 15
 
 LOGGING = {
     'version': 1,
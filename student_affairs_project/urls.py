@@ -9,7 +9,7 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
-from apps.core.views import management_actions_view
+from apps.core.views import management_actions_view, metrics_view, ProtectedFileView, SignedFileView
 # --- API URL Patterns ---
 # Group all v1 API endpoints together for clarity and versioning.
 api_v1_urlpatterns = [
@@ -18,6 +18,11 @@ api_v1_urlpatterns = [
     path('choices/', include('apps.core.urls')),
     # --- FIX: Add the support app's URLs to the main API ---
     path('support/', include('apps.support.urls')),
+    # Resumable (tus) uploads, attachable to documents, certificates and ticket messages
+    path('uploads/', include('apps.uploads.urls')),
+    # Protected media: signed links first, then the permission-checked endpoint
+    path('files/signed/<path:name>', SignedFileView.as_view(), name='signed-file'),
+    path('files/<path:name>', ProtectedFileView.as_view(), name='protected-file'),
 ]
 
 # --- Main URL Patterns ---
@@ -34,6 +39,9 @@ urlpatterns = [
     # Application API v1
     path('api/v1/', include(api_v1_urlpatterns)),
 
+    # Prometheus scrape endpoint (see apps/core/metrics.py)
+    path('metrics', metrics_view, name='metrics'),
+
     # django-impersonate URL (optional, useful for browser-based admin testing)
     path('impersonate/', include('impersonate.urls')),
 ]